@@ -1,10 +1,12 @@
 from flask import Flask, jsonify, request, make_response
+import logging
 import os
 from flask_cors import CORS
 
 # Extensions
-from src.extensions import limiter
+from src.extensions import limiter, limitar_blueprints
 from src.auth.jwt_utils import JWT_SECRET
+from src.config.database import init_app as init_db
 
 
 def create_app(config_object=None):
@@ -13,6 +15,12 @@ def create_app(config_object=None):
     - config_object: objeto de configuración opcional
     """
 
+    # Logging por nivel (LOG_LEVEL=DEBUG muestra el detalle de los intentos de login)
+    logging.basicConfig(
+        level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+        format='%(asctime)s %(levelname)s %(name)s %(message)s',
+    )
+
     app = Flask(__name__)
 
     # Evitar redirecciones por trailing slash que rompan preflight CORS
@@ -44,6 +52,8 @@ def create_app(config_object=None):
 
     # Inicializar extensiones
     limiter.init_app(app)
+    # Conexión por request: un solo commit/rollback al final de cada request
+    init_db(app)
 
     # Safety check: evitar arrancar en producción con la clave por defecto
     env = os.environ.get('FLASK_ENV') or app.config.get('ENV')
@@ -81,6 +91,9 @@ def create_app(config_object=None):
         # es preferible ver el error en los logs y corregir el módulo de rutas.
         app.logger.debug('No se pudo registrar programas_bp (archivo src.routes.programas_routes faltante o con errores)')
 
+    # Límites por defecto y presupuesto de BD de cada blueprint (ver src/extensions.py)
+    limitar_blueprints(app)
+
     @app.route('/health')
     def health():
         return jsonify({'status': 'ok'}), 200
@@ -108,5 +121,6 @@ def create_app(config_object=None):
 
 if __name__ == '__main__':
     app = create_app()
-    # En dev, correr en 0.0.0.0:5000
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Servidor de desarrollo (un proceso); en producción: gunicorn -c gunicorn.conf.py wsgi:app
+    debug = os.environ.get('FLASK_DEBUG', 'false').lower() in ('1', 'true', 'yes')
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', '5000')), debug=debug)
\ No newline at end of file
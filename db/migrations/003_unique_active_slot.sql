@@ -0,0 +1,38 @@
+-- ============================================
+-- Migración: a lo sumo una reserva activa por turno de sala
+-- ============================================
+-- Descripción:
+--   - Agrega la columna generada slot_activo (1 si la reserva está activa, NULL si no)
+--   - Agrega UNIQUE (nombre_sala, edificio, fecha, id_turno, slot_activo)
+--     Como NULL no colisiona en un índice único, las reservas canceladas /
+--     finalizadas / sin asistencia pueden repetirse; las activas no.
+--   - Requiere MySQL 8.0 (columnas generadas STORED con índice)
+-- ============================================
+
+USE proyecto;
+
+SELECT 'Iniciando migración 003: turno activo único por sala' as mensaje;
+
+-- ============================================
+-- PASO 1: Verificar que no haya duplicados activos
+-- Si esta consulta devuelve filas, hay que cancelar las reservas sobrantes
+-- antes de continuar (el ALTER del paso 2 fallaría).
+-- ============================================
+SELECT nombre_sala, edificio, fecha, id_turno, COUNT(*) AS activas
+FROM reserva
+WHERE estado = 'activa'
+GROUP BY nombre_sala, edificio, fecha, id_turno
+HAVING COUNT(*) > 1;
+
+-- ============================================
+-- PASO 2: Columna generada + índice único
+-- ============================================
+ALTER TABLE reserva
+ADD COLUMN slot_activo TINYINT
+    GENERATED ALWAYS AS (IF(estado = 'activa', 1, NULL)) STORED,
+ADD UNIQUE KEY ux_reserva_slot_activo (nombre_sala, edificio, fecha, id_turno, slot_activo);
+
+SELECT 'Estructura DESPUÉS de la migración:' as mensaje;
+SHOW CREATE TABLE reserva;
+
+SELECT '✅ Migración 003 completada exitosamente' as mensaje;
@@ -0,0 +1,25 @@
+-- ============================================
+-- Migración: checkpoint de procesos por lotes
+-- ============================================
+-- Descripción:
+--   - Crea proceso_checkpoint: una fila por (proceso, fecha procesada)
+--   - ultimo_id: último id_reserva confirmado de esa fecha (para reanudar)
+--   - completado: la fecha terminó de procesarse (marca de agua alta)
+--   - Lo usa scripts/procesar_sanciones_diarias.py
+-- ============================================
+
+USE proyecto;
+
+SELECT 'Iniciando migración 004: checkpoint de procesos' as mensaje;
+
+CREATE TABLE IF NOT EXISTS proceso_checkpoint (
+    proceso VARCHAR(50) NOT NULL,
+    fecha DATE NOT NULL,
+    ultimo_id INT NOT NULL DEFAULT 0,
+    completado BOOLEAN NOT NULL DEFAULT false,
+    procesadas INT NOT NULL DEFAULT 0,
+    actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (proceso, fecha)
+);
+
+SELECT '✅ Migración 004 completada exitosamente' as mensaje;
@@ -0,0 +1,46 @@
+-- ============================================
+-- Migración: tabla resumen de uso diario
+-- ============================================
+-- Descripción:
+--   - Crea uso_diario: una fila por (fecha, edificio, sala, turno, estado)
+--     con la cantidad de reservas, participantes inscriptos y asistentes
+--   - id_turno = 0 representa reservas sin turno (la PK no admite NULL)
+--   - La mantienen los caminos que escriben reservas/asistencia (src/models/uso_diario_model.py)
+--   - La leen los reportes de salas, turnos, edificios, tipos de sala y usadas/canceladas
+--   - Carga inicial desde reserva; para reconstruir: python scripts/reconstruir_uso_diario.py
+-- ============================================
+
+USE proyecto;
+
+SELECT 'Iniciando migración 005: tabla uso_diario' as mensaje;
+
+CREATE TABLE IF NOT EXISTS uso_diario (
+    fecha DATE NOT NULL,
+    edificio VARCHAR(20) NOT NULL,
+    nombre_sala VARCHAR(20) NOT NULL,
+    id_turno INT NOT NULL DEFAULT 0,
+    estado ENUM('activa','cancelada','sin asistencia','finalizada') NOT NULL,
+    reservas INT NOT NULL DEFAULT 0,
+    participantes INT NOT NULL DEFAULT 0,
+    asistentes INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, edificio, nombre_sala, id_turno, estado),
+    KEY idx_uso_diario_sala (nombre_sala, edificio),
+    KEY idx_uso_diario_turno (id_turno)
+);
+
+SELECT 'Cargando uso_diario desde reserva...' as mensaje;
+
+INSERT INTO uso_diario (fecha, edificio, nombre_sala, id_turno, estado, reservas, participantes, asistentes)
+SELECT r.fecha, r.edificio, r.nombre_sala, COALESCE(r.id_turno, 0), r.estado,
+       COUNT(DISTINCT r.id_reserva),
+       COUNT(rp.ci_participante),
+       COALESCE(SUM(CASE WHEN rp.asistencia = 1 THEN 1 ELSE 0 END), 0)
+FROM reserva r
+LEFT JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+GROUP BY r.fecha, r.edificio, r.nombre_sala, COALESCE(r.id_turno, 0), r.estado
+ON DUPLICATE KEY UPDATE
+    reservas = VALUES(reservas),
+    participantes = VALUES(participantes),
+    asistentes = VALUES(asistentes);
+
+SELECT '✅ Migración 005 completada exitosamente' as mensaje;
@@ -0,0 +1,52 @@
+-- ============================================
+-- Migración: índices para las consultas frecuentes
+-- ============================================
+-- Descripción:
+--   - turno: hora_inicio / hora_fin como TIME NOT NULL (creacionDeTablas.sql los
+--     crea DATETIME; arreglo_turnos.sql ya los convertía) + índice por horario
+--   - reserva: (estado, fecha) barrido de vencidas y reportes; (fecha) filtros
+--     de rango y listados; (edificio, fecha) mapa de ocupación
+--     (las búsquedas por turno de sala usan ux_reserva_slot_activo, migración 003)
+--   - reserva_participante: (id_reserva, asistencia) para los JOIN desde reserva
+--     (el PK empieza por ci_participante)
+--   - sancion_participante: (fecha_fin) para sanciones vigentes
+--   - admin: (email) para el login
+--   - sala: (tipo_sala) para las reglas de límites (solo salas libres)
+--   - Verificar con: python scripts/explain_hot_queries.py
+-- ============================================
+
+USE proyecto;
+
+SELECT 'Iniciando migración 006: índices para consultas frecuentes' as mensaje;
+
+-- ============================================
+-- PASO 1: turno con columnas TIME
+-- ============================================
+ALTER TABLE turno
+MODIFY hora_inicio TIME NOT NULL,
+MODIFY hora_fin TIME NOT NULL,
+ADD KEY idx_turno_horario (hora_inicio, hora_fin);
+
+-- ============================================
+-- PASO 2: índices secundarios
+-- ============================================
+ALTER TABLE reserva
+ADD KEY idx_reserva_estado_fecha (estado, fecha),
+ADD KEY idx_reserva_fecha (fecha),
+ADD KEY idx_reserva_edificio_fecha (edificio, fecha);
+
+ALTER TABLE reserva_participante
+ADD KEY idx_rp_reserva_asistencia (id_reserva, asistencia);
+
+ALTER TABLE sancion_participante
+ADD KEY idx_sancion_fecha_fin (fecha_fin);
+
+ALTER TABLE admin
+ADD KEY idx_admin_email (email);
+
+ALTER TABLE sala
+ADD KEY idx_sala_tipo (tipo_sala);
+
+ANALYZE TABLE turno, reserva, reserva_participante, sancion_participante, admin, sala;
+
+SELECT '✅ Migración 006 completada exitosamente' as mensaje;
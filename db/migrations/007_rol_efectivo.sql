@@ -0,0 +1,50 @@
+-- ============================================
+-- Migración: rol efectivo materializado por participante
+-- ============================================
+-- Descripción:
+--   - Agrega participante.rol_efectivo: docente > postgrado > alumno según sus
+--     programas (con el tipo de programa como respaldo), NULL si no tiene programa.
+--     Es la misma regla que src/models/rol_efectivo_model.rol_efectivo.
+--   - Las reservas la leen en lugar de unir participante_programa_academico y
+--     programa_academico por cada participante.
+--   - La app la mantiene al dar de alta / registrar / actualizar programas.
+--     Si se cargan programas por fuera de la app (seeds), volver a correr el PASO 2.
+-- ============================================
+
+USE proyecto;
+
+SELECT 'Iniciando migración 007: rol efectivo por participante' as mensaje;
+
+-- ============================================
+-- PASO 1: Columna
+-- ============================================
+ALTER TABLE participante
+ADD COLUMN rol_efectivo ENUM('alumno', 'postgrado', 'docente') NULL;
+
+-- ============================================
+-- PASO 2: Backfill (se puede volver a correr)
+-- ============================================
+UPDATE participante p
+LEFT JOIN (
+    SELECT ppa.ci_participante,
+           CASE
+               WHEN SUM(ppa.rol = 'docente') > 0 THEN 'docente'
+               WHEN SUM(ppa.rol = 'postgrado') > 0 THEN 'postgrado'
+               WHEN SUM(ppa.rol = 'alumno') > 0 THEN 'alumno'
+               WHEN SUM(pa.tipo = 'postgrado') > 0 THEN 'postgrado'
+               ELSE 'alumno'
+           END AS rol
+    FROM participante_programa_academico ppa
+    JOIN programa_academico pa ON ppa.nombre_programa = pa.nombre_programa
+    GROUP BY ppa.ci_participante
+) x ON x.ci_participante = p.ci
+SET p.rol_efectivo = x.rol;
+
+-- ============================================
+-- PASO 3: Verificación
+-- ============================================
+SELECT rol_efectivo, COUNT(*) AS participantes
+FROM participante
+GROUP BY rol_efectivo;
+
+SELECT '✅ Migración 007 completada exitosamente' as mensaje;
@@ -0,0 +1,35 @@
+-- ============================================
+-- Migración: refresh tokens rotativos
+-- ============================================
+-- Descripción:
+--   - Crea refresh_token: una fila por token emitido. Se guarda el SHA-256 del
+--     token (nunca el token en claro); la renovación es una búsqueda por PK.
+--   - familia: todos los tokens que salen de un mismo login (cada renovación
+--     marca el anterior como usado y emite uno nuevo en la misma familia).
+--     Presentar un token ya usado revoca la familia entera (reutilización).
+--   - Sin DELETE para app_user: se revoca con UPDATE; las filas vencidas se
+--     borran con scripts/purgar_refresh_tokens.py (rol admin).
+--   - Lo usa src/auth/refresh_tokens.py (/api/auth/refresh y /api/auth/logout)
+-- ============================================
+
+USE proyecto;
+
+SELECT 'Iniciando migración 008: refresh tokens' as mensaje;
+
+CREATE TABLE IF NOT EXISTS refresh_token (
+    token_hash CHAR(64) NOT NULL,
+    familia CHAR(32) NOT NULL,
+    correo VARCHAR(30) NOT NULL,
+    user_type ENUM('admin', 'participante') NOT NULL,
+    user_id INT NULL,
+    creado DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expira DATETIME NOT NULL,
+    usado DATETIME NULL,
+    revocado DATETIME NULL,
+    PRIMARY KEY (token_hash),
+    KEY idx_refresh_familia (familia),
+    KEY idx_refresh_correo (correo),
+    KEY idx_refresh_expira (expira)
+);
+
+SELECT '✅ Migración 008 completada exitosamente' as mensaje;
@@ -0,0 +1,81 @@
+"""
+Configuración de gunicorn (pre-fork, varios workers con hilos).
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Variables de entorno:
+- PORT (5000)
+- WEB_CONCURRENCY: procesos worker (default: 2 * CPUs + 1)
+- GUNICORN_THREADS: hilos por worker (4); el trabajo es mayormente espera de MySQL
+- GUNICORN_TIMEOUT (60) / GUNICORN_GRACEFUL_TIMEOUT (30): segundos
+- GUNICORN_MAX_REQUESTS (1000): reciclar cada worker después de N requests (0 = nunca)
+- DB_WARMUP_ROLES ('readonly,user') / DB_WARMUP_CONNECTIONS (2): conexiones que
+  cada worker abre al arrancar
+- Con más de un worker, REPORT_CACHE_BACKEND y RATELIMIT_STORAGE_URI pasan a
+  'file' y 'sqlite:///tmp/ratelimit.db' si no se configuraron (ver abajo)
+
+Cada worker tiene sus propios pools de conexiones (DB_POOL_SIZE por rol), así que
+el total contra MySQL es hasta WEB_CONCURRENCY * DB_POOL_SIZE por rol.
+
+Reinicio sin cortar requests: `kill -HUP <master>` levanta workers nuevos y
+termina los viejos cuando completan lo que están atendiendo (hasta
+GUNICORN_GRACEFUL_TIMEOUT). Como la app está precargada en el master, un cambio
+de código requiere reiniciar el master (`kill -USR2` y luego `-TERM` al viejo,
+o reiniciar el contenedor).
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = max_requests // 10
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+# Con varios workers, los backends en memoria no se comparten: cada worker
+# invalidaría solo su cache de reportes y contaría sus propios rate limits
+# (multiplicándolos por la cantidad de workers). Si no se configuró otro, se usan
+# los backends compartidos entre procesos de la máquina; con varias máquinas,
+# configurar redis en los dos.
+if workers > 1:
+    os.environ.setdefault('REPORT_CACHE_BACKEND', 'file')
+    os.environ.setdefault('RATELIMIT_STORAGE_URI', 'sqlite:///tmp/ratelimit.db')
+
+DB_WARMUP_ROLES = [r.strip() for r in os.getenv('DB_WARMUP_ROLES', 'readonly,user').split(',') if r.strip()]
+DB_WARMUP_CONNECTIONS = int(os.getenv('DB_WARMUP_CONNECTIONS', '2'))
+
+
+def when_ready(server):
+    if workers <= 1:
+        return
+    if os.getenv('REPORT_CACHE_BACKEND', 'memory') == 'memory':
+        server.log.warning("REPORT_CACHE_BACKEND=memory con %s workers: las invalidaciones no llegan "
+                           "a los demás workers (reportes viejos hasta REPORT_CACHE_TTL)", workers)
+    if os.getenv('RATELIMIT_STORAGE_URI', 'memory://').startswith('memory'):
+        server.log.warning("RATELIMIT_STORAGE_URI=memory:// con %s workers: cada worker cuenta por "
+                           "separado y los límites se multiplican por %s", workers, workers)
+
+
+def post_fork(server, worker):
+    # Las conexiones (y locks) que el master haya creado al precargar la app no
+    # se comparten con los workers: cada uno arma sus propios pools
+    from src.config.database import reset_pools_after_fork
+    reset_pools_after_fork()
+
+
+def post_worker_init(worker):
+    # Precalentar el pool de conexiones y el de bcrypt antes de aceptar requests
+    from src.auth.password_pool import get_password_pool
+    from src.config.database import warmup_pools
+    get_password_pool()
+    if DB_WARMUP_CONNECTIONS > 0:
+        abiertas = warmup_pools(DB_WARMUP_ROLES, DB_WARMUP_CONNECTIONS)
+        worker.log.info("Worker %s: conexiones precalentadas %s", worker.pid, abiertas)
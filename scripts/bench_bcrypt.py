@@ -0,0 +1,98 @@
+"""
+Benchmark de verificación de contraseñas (bcrypt) a través del pool de login.
+
+Para cada costo simula una ráfaga de logins concurrentes: `--clientes` hilos
+llaman a `verify_password` (la misma función que usa /api/auth/login) hasta
+completar `--logins`, y reporta logins/s, latencia p50/p99 y cuántos pedidos
+fueron rechazados por el pool lleno (los que el endpoint respondería con 503).
+No necesita base de datos.
+
+Uso:
+    python scripts/bench_bcrypt.py
+    python scripts/bench_bcrypt.py --costos 10 11 12 13 --logins 200 --clientes 50 --workers 4 --cola 32
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.auth.login import _hashpw, verify_password
+from src.auth.password_pool import PasswordPool, PoolSaturado, set_password_pool
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def medir(costo: int, logins: int, clientes: int, workers: int, cola: int):
+    set_password_pool(PasswordPool(workers=workers, max_en_curso=cola, timeout=60))
+    plain = 'contraseña-de-prueba'
+    hashed = _hashpw(plain, costo)
+
+    latencias, rechazados = [], [0]
+    lock = threading.Lock()
+    restantes = [logins]
+
+    def cliente():
+        while True:
+            with lock:
+                if restantes[0] <= 0:
+                    return
+                restantes[0] -= 1
+            inicio = time.perf_counter()
+            try:
+                ok = verify_password(plain, hashed)
+            except PoolSaturado:
+                with lock:
+                    rechazados[0] += 1
+                continue
+            ms = (time.perf_counter() - inicio) * 1000
+            if not ok:
+                raise RuntimeError('verify_password devolvió False')
+            with lock:
+                latencias.append(ms)
+
+    hilos = [threading.Thread(target=cliente) for _ in range(clientes)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    total = time.perf_counter() - inicio
+    return {
+        'costo': costo,
+        'logins_s': len(latencias) / total if total else 0.0,
+        'p50': _percentil(latencias, 50),
+        'p99': _percentil(latencias, 99),
+        'ok': len(latencias),
+        'rechazados': rechazados[0],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de bcrypt a través del pool de login')
+    parser.add_argument('--costos', type=int, nargs='+', default=[10, 11, 12])
+    parser.add_argument('--logins', type=int, default=100, help='logins por costo (default: 100)')
+    parser.add_argument('--clientes', type=int, default=32, help='hilos concurrentes (default: 32)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='hilos del pool de bcrypt')
+    parser.add_argument('--cola', type=int, default=None,
+                        help='máximo de trabajos en curso (default: igual a --clientes, sin rechazos)')
+    args = parser.parse_args(argv)
+    cola = args.cola or args.clientes
+
+    print(f"{args.logins} logins por costo, {args.clientes} clientes, pool de {args.workers} hilos, cola {cola}")
+    print(f"{'costo':>5} {'logins/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'ok':>6} {'503':>6}")
+    for costo in args.costos:
+        r = medir(costo, args.logins, args.clientes, args.workers, cola)
+        print(f"{r['costo']:>5} {r['logins_s']:>10.1f} {r['p50']:>9.1f} {r['p99']:>9.1f} {r['ok']:>6} {r['rechazados']:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+Micro-benchmark de los reportes que antes juntaban varias consultas en Python.
+
+Compara, sobre una misma conexión, la forma anterior contra la actual:
+  - usadas vs canceladas: 3 COUNT(*) separados / 1 pasada con SUM(CASE ...) / tabla uso_diario
+  - reservas y asistencias por rol: consulta principal + 1 consulta de asistencia
+    por grupo / 1 pasada con SUM(CASE ...)
+
+Para cada variante informa consultas ejecutadas, filas leídas por el motor
+(deltas de Handler_read_* de la sesión; Handler_read_rnd_next ~ filas de scans
+completos) y tiempo de pared (mediana de --repeticiones).
+
+Con --seed N primero carga N reservas sintéticas (con 1 a 4 participantes
+tomados de participante_programa_academico) a partir de --seed-desde, recorriendo
+(fecha, sala, turno) sin repetir, y reconstruye uso_diario para ese rango.
+--limpiar borra las reservas de ese rango. Usar una BD de pruebas.
+
+Uso:
+    python scripts/bench_reportes.py --seed 1000000 --seed-desde 2000-01-01
+    python scripts/bench_reportes.py --repeticiones 5
+    python scripts/bench_reportes.py --limpiar --seed-desde 2000-01-01 --seed-hasta 2010-12-31
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.database import get_connection
+from src.models.uso_diario_model import reconstruir_uso_diario
+
+ESTADOS = ('finalizada', 'finalizada', 'finalizada', 'sin asistencia', 'cancelada', 'activa')
+ASISTENCIAS = (1, 1, 0, None)
+LOTE_SEED = 5000
+
+
+def _fecha(valor: str) -> date:
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+# ---------------------------------------------------------------------------
+# Carga de datos
+# ---------------------------------------------------------------------------
+
+def seed(n: int, desde: date, semilla: int = 42):
+    """Inserta `n` reservas a partir de `desde`; devuelve la última fecha usada."""
+    rnd = random.Random(semilla)
+    conn = get_connection(role='admin', request_scoped=False)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT nombre_sala, edificio FROM sala ORDER BY nombre_sala, edificio")
+            salas = [(f['nombre_sala'], f['edificio']) for f in cur.fetchall()]
+            cur.execute("SELECT id_turno FROM turno ORDER BY id_turno")
+            turnos = [f['id_turno'] for f in cur.fetchall()]
+            cur.execute("SELECT DISTINCT ci_participante FROM participante_programa_academico")
+            cis = [f['ci_participante'] for f in cur.fetchall()]
+            cur.execute("SELECT COALESCE(MAX(id_reserva), 0) AS maximo FROM reserva")
+            siguiente_id = cur.fetchone()['maximo'] + 1
+        if not salas or not turnos or not cis:
+            raise RuntimeError('Se necesitan salas, turnos y participantes cargados para el seed')
+
+        por_dia = len(salas) * len(turnos)
+        reservas, participantes = [], []
+        inicio = time.perf_counter()
+        for i in range(n):
+            dia, resto = divmod(i, por_dia)
+            sala = salas[resto // len(turnos)]
+            id_turno = turnos[resto % len(turnos)]
+            id_reserva = siguiente_id + i
+            fecha = desde + timedelta(days=dia)
+            reservas.append((id_reserva, sala[0], sala[1], fecha, id_turno, rnd.choice(ESTADOS)))
+            for ci in rnd.sample(cis, min(len(cis), rnd.randint(1, 4))):
+                participantes.append((ci, id_reserva, fecha, rnd.choice(ASISTENCIAS)))
+            if len(reservas) >= LOTE_SEED or i == n - 1:
+                with conn.cursor() as cur:
+                    cur.executemany("""
+                        INSERT INTO reserva (id_reserva, nombre_sala, edificio, fecha, id_turno, estado)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                    """, reservas)
+                    cur.executemany("""
+                        INSERT INTO reserva_participante (ci_participante, id_reserva, fecha_solicitud_reserva, asistencia)
+                        VALUES (%s, %s, %s, %s)
+                    """, participantes)
+                conn.commit()
+                print(f"  {i + 1}/{n} reservas ({time.perf_counter() - inicio:.1f}s)")
+                reservas, participantes = [], []
+        hasta = desde + timedelta(days=(n - 1) // por_dia)
+    finally:
+        conn.close()
+
+    print(f"Reconstruyendo uso_diario del {desde} al {hasta}...")
+    reconstruir_uso_diario(desde, hasta)
+    return hasta
+
+
+def limpiar(desde: date, hasta: date):
+    conn = get_connection(role='admin', request_scoped=False)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                DELETE rp FROM reserva_participante rp
+                JOIN reserva r ON r.id_reserva = rp.id_reserva
+                WHERE r.fecha BETWEEN %s AND %s
+            """, (desde, hasta))
+            cur.execute("DELETE FROM reserva WHERE fecha BETWEEN %s AND %s", (desde, hasta))
+            borradas = cur.rowcount
+            cur.execute("DELETE FROM uso_diario WHERE fecha BETWEEN %s AND %s", (desde, hasta))
+        conn.commit()
+        print(f"Borradas {borradas} reservas del {desde} al {hasta}")
+    finally:
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Variantes a comparar
+# ---------------------------------------------------------------------------
+
+def usadas_3_consultas(cur):
+    cur.execute("SELECT COUNT(*) AS total_reservas FROM reserva r")
+    cur.fetchall()
+    cur.execute("SELECT COUNT(*) AS used FROM reserva r WHERE r.estado = 'finalizada'")
+    cur.fetchall()
+    cur.execute("SELECT COUNT(*) AS cancelled_or_no_show FROM reserva r WHERE r.estado IN ('cancelada', 'sin asistencia')")
+    cur.fetchall()
+    return 3
+
+
+def usadas_1_pasada(cur):
+    cur.execute("""
+        SELECT COUNT(*) AS total_reservas,
+               SUM(CASE WHEN r.estado = 'finalizada' THEN 1 ELSE 0 END) AS used,
+               SUM(CASE WHEN r.estado IN ('cancelada', 'sin asistencia') THEN 1 ELSE 0 END) AS cancelled_or_no_show
+        FROM reserva r
+    """)
+    cur.fetchall()
+    return 1
+
+
+def usadas_uso_diario(cur):
+    cur.execute("""
+        SELECT SUM(u.reservas) AS total_reservas,
+               SUM(CASE WHEN u.estado = 'finalizada' THEN u.reservas ELSE 0 END) AS used,
+               SUM(CASE WHEN u.estado IN ('cancelada', 'sin asistencia') THEN u.reservas ELSE 0 END) AS cancelled_or_no_show
+        FROM uso_diario u
+    """)
+    cur.fetchall()
+    return 1
+
+
+_ROL_BASE = """
+    FROM participante_programa_academico ppa
+    JOIN programa_academico pa ON ppa.nombre_programa = pa.nombre_programa
+    JOIN reserva_participante rp ON ppa.ci_participante = rp.ci_participante
+    JOIN reserva r ON rp.id_reserva = r.id_reserva
+"""
+
+
+def rol_n_mas_1(cur):
+    cur.execute(f"""
+        SELECT ppa.rol, pa.tipo AS tipo_programa, COUNT(DISTINCT rp.ci_participante) AS participantes_unicos,
+               COUNT(DISTINCT rp.id_reserva) AS total_reservas
+        {_ROL_BASE}
+        GROUP BY ppa.rol, pa.tipo
+    """)
+    grupos = cur.fetchall()
+    for g in grupos:
+        cur.execute(f"""
+            SELECT COUNT(*) AS total, rp.asistencia
+            {_ROL_BASE}
+            WHERE ppa.rol = %s AND pa.tipo = %s
+            GROUP BY rp.asistencia
+        """, (g['rol'], g['tipo_programa']))
+        cur.fetchall()
+    return 1 + len(grupos)
+
+
+def rol_1_pasada(cur):
+    cur.execute(f"""
+        SELECT ppa.rol, pa.tipo AS tipo_programa, COUNT(DISTINCT rp.ci_participante) AS participantes_unicos,
+               COUNT(DISTINCT rp.id_reserva) AS total_reservas,
+               SUM(CASE WHEN rp.asistencia = 1 THEN 1 ELSE 0 END) AS total_asistencias,
+               SUM(CASE WHEN rp.asistencia = 0 THEN 1 ELSE 0 END) AS total_inasistencias,
+               SUM(CASE WHEN rp.asistencia IS NULL THEN 1 ELSE 0 END) AS asistencias_sin_registrar
+        {_ROL_BASE}
+        GROUP BY ppa.rol, pa.tipo
+    """)
+    cur.fetchall()
+    return 1
+
+
+VARIANTES = [
+    ('usadas vs canceladas: 3 consultas', usadas_3_consultas),
+    ('usadas vs canceladas: 1 pasada', usadas_1_pasada),
+    ('usadas vs canceladas: uso_diario', usadas_uso_diario),
+    ('asistencia por rol: 1 + N consultas', rol_n_mas_1),
+    ('asistencia por rol: 1 pasada', rol_1_pasada),
+]
+
+
+def _filas_leidas(cur):
+    cur.execute("SHOW SESSION STATUS LIKE 'Handler_read%'")
+    return {f['Variable_name']: int(f['Value']) for f in cur.fetchall()}
+
+
+def medir(cur, fn, repeticiones):
+    tiempos = []
+    antes = _filas_leidas(cur)
+    consultas = 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        consultas = fn(cur)
+        tiempos.append(time.perf_counter() - inicio)
+    despues = _filas_leidas(cur)
+    leidas = {k: (despues[k] - antes.get(k, 0)) // repeticiones for k in despues}
+    return consultas, leidas, statistics.median(tiempos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara consultas de reportes de varias pasadas contra una sola')
+    parser.add_argument('--seed', type=int, default=0, help='reservas sintéticas a cargar antes de medir')
+    parser.add_argument('--seed-desde', type=_fecha, default=date(2000, 1, 1), help='primera fecha del seed')
+    parser.add_argument('--seed-hasta', type=_fecha, help='última fecha a borrar con --limpiar')
+    parser.add_argument('--limpiar', action='store_true', help='borra las reservas del rango del seed y termina')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.limpiar:
+        if not args.seed_hasta:
+            parser.error('--limpiar requiere --seed-hasta')
+        limpiar(args.seed_desde, args.seed_hasta)
+        return
+    if args.repeticiones <= 0:
+        parser.error('--repeticiones debe ser positivo')
+    if args.seed:
+        print(f"Cargando {args.seed} reservas desde {args.seed_desde}...")
+        hasta = seed(args.seed, args.seed_desde)
+        print(f"Seed listo ({args.seed_desde} a {hasta}); para borrarlo: --limpiar --seed-hasta {hasta}")
+
+    conn = get_connection(role='readonly', request_scoped=False)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) AS n FROM reserva")
+            print(f"\nreserva: {cur.fetchone()['n']} filas, {args.repeticiones} repetición(es) por variante\n")
+            print(f"{'variante':<38} {'consultas':>9} {'rnd_next':>12} {'read_key':>10} {'read_next':>12} {'mediana':>10}")
+            for nombre, fn in VARIANTES:
+                consultas, leidas, mediana = medir(cur, fn, args.repeticiones)
+                print(f"{nombre:<38} {consultas:>9} {leidas.get('Handler_read_rnd_next', 0):>12} "
+                      f"{leidas.get('Handler_read_key', 0):>10} {leidas.get('Handler_read_next', 0):>12} "
+                      f"{mediana * 1000:>8.1f}ms")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Stress test de reservas concurrentes sobre un mismo turno de sala.
+
+Dispara N `POST /reservas` en paralelo contra el mismo (sala, edificio, fecha,
+turno), cada uno con un participante distinto, y verifica que exactamente una
+reserva gane. Informa códigos de respuesta, throughput y latencias p50/p99.
+
+Uso:
+    python scripts/bench_reservas_concurrentes.py \
+        --sala "Sala 101" --edificio "Central" --fecha 2030-03-02 \
+        --turnos 1 2 3 --participantes 11111111 22222222 33333333 44444444
+
+Cada turno es una ronda independiente; elegir una fecha futura sin reservas.
+Sale con código 1 si en alguna ronda no hubo exactamente un ganador.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+
+def _post(url, cuerpo, token, timeout):
+    datos = json.dumps(cuerpo).encode('utf-8')
+    req = urllib.request.Request(url, data=datos, method='POST')
+    req.add_header('Content-Type', 'application/json')
+    if token:
+        req.add_header('Authorization', f'Bearer {token}')
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            status, body = resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        status, body = e.code, e.read()
+    except Exception as e:
+        status, body = 0, str(e).encode('utf-8')
+    return status, body, time.perf_counter() - inicio
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    idx = min(len(ordenados) - 1, int(round(p / 100.0 * (len(ordenados) - 1))))
+    return ordenados[idx]
+
+
+def ronda(args, id_turno):
+    """Lanza una solicitud por participante, todas liberadas a la vez por una barrera."""
+    url = args.url.rstrip('/') + '/reservas/'
+    n = len(args.participantes)
+    barrera = threading.Barrier(n)
+    resultados = [None] * n
+
+    def trabajador(i, ci):
+        cuerpo = {
+            'nombre_sala': args.sala,
+            'edificio': args.edificio,
+            'fecha': args.fecha,
+            'turnos': [id_turno],
+            'participantes': [ci],
+        }
+        barrera.wait()
+        resultados[i] = _post(url, cuerpo, args.token, args.timeout)
+
+    hilos = [threading.Thread(target=trabajador, args=(i, ci)) for i, ci in enumerate(args.participantes)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+
+    codigos = Counter(r[0] for r in resultados)
+    latencias = [r[2] for r in resultados]
+    ganadores = codigos.get(201, 0)
+    errores = [r[1].decode('utf-8', 'replace')[:200] for r in resultados if r[0] not in (201, 400)]
+
+    print(f"turno {id_turno}: {n} solicitudes en {duracion:.3f}s "
+          f"({n / duracion:.1f} req/s) códigos={dict(codigos)} "
+          f"p50={_percentil(latencias, 50) * 1000:.1f}ms p99={_percentil(latencias, 99) * 1000:.1f}ms "
+          f"ganadores={ganadores}")
+    for e in errores[:3]:
+        print(f"  respuesta inesperada: {e}")
+    return ganadores, n, duracion, latencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reservas concurrentes sobre un mismo turno')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--sala', required=True)
+    parser.add_argument('--edificio', required=True)
+    parser.add_argument('--fecha', required=True, help='YYYY-MM-DD (futura, sin reservas)')
+    parser.add_argument('--turnos', type=int, nargs='+', required=True, help='una ronda por turno')
+    parser.add_argument('--participantes', nargs='+', required=True,
+                        help='CIs distintos; una solicitud concurrente por CI')
+    parser.add_argument('--token', default=None, help='JWT opcional para el header Authorization')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+
+    total, total_tiempo, todas = 0, 0.0, []
+    fallidas = []
+    for id_turno in args.turnos:
+        ganadores, n, duracion, latencias = ronda(args, id_turno)
+        total += n
+        total_tiempo += duracion
+        todas.extend(latencias)
+        if ganadores != 1:
+            fallidas.append((id_turno, ganadores))
+
+    print(f"\nTotal: {total} solicitudes, {total / total_tiempo:.1f} req/s, "
+          f"p50={_percentil(todas, 50) * 1000:.1f}ms p99={_percentil(todas, 99) * 1000:.1f}ms")
+    if fallidas:
+        for id_turno, ganadores in fallidas:
+            print(f"FALLO: turno {id_turno} tuvo {ganadores} ganadores (se esperaba 1)")
+        sys.exit(1)
+    print("OK: exactamente una reserva ganó en cada turno")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Prueba de carga HTTP: servidor de desarrollo (`python app.py`) vs gunicorn.
+
+`--clientes` hilos hacen GET a `--path` durante `--duracion` segundos (cada hilo
+con su conexión keep-alive) y se reporta requests/s, latencia p50/p99 y la
+cuenta por status.
+
+- Contra un servidor ya levantado:
+    python scripts/carga_http.py --url http://localhost:5000 --path /health
+- Comparando los dos modos (los levanta en puertos libres, con el rate limit
+  apagado para que no responda 429, y los baja al terminar):
+    python scripts/carga_http.py --comparar --path /health
+    python scripts/carga_http.py --comparar --path /api/reports/most-reserved-rooms --token <JWT>
+
+Los endpoints que consultan la base necesitan MySQL levantado y un JWT válido;
+/health no.
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def cargar(url: str, path: str, duracion: float, clientes: int, headers=None):
+    """Corre la carga y devuelve {'rps', 'p50', 'p99', 'total', 'status'}."""
+    destino = urlsplit(url)
+    latencias, status = [], {}
+    lock = threading.Lock()
+    fin = time.perf_counter() + duracion
+
+    def cliente():
+        conn = http.client.HTTPConnection(destino.hostname, destino.port or 80, timeout=30)
+        propias, cuenta = [], {}
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            for intento in range(2):
+                try:
+                    conn.request('GET', path, headers=headers or {})
+                    respuesta = conn.getresponse()
+                    respuesta.read()
+                    codigo = respuesta.status
+                    break
+                except (OSError, http.client.HTTPException) as e:
+                    conn.close()
+                    conn = http.client.HTTPConnection(destino.hostname, destino.port or 80, timeout=30)
+                    codigo = 'error'
+                    # Un keep-alive cerrado por el servidor (p. ej. al reciclar un
+                    # worker) se reintenta una vez, como hace cualquier cliente HTTP
+                    if not isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError,
+                                          BrokenPipeError)):
+                        break
+            propias.append((time.perf_counter() - inicio) * 1000)
+            cuenta[codigo] = cuenta.get(codigo, 0) + 1
+        conn.close()
+        with lock:
+            latencias.extend(propias)
+            for codigo, n in cuenta.items():
+                status[codigo] = status.get(codigo, 0) + n
+
+    hilos = [threading.Thread(target=cliente) for _ in range(clientes)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    total = time.perf_counter() - inicio
+    return {
+        'rps': len(latencias) / total if total else 0.0,
+        'p50': _percentil(latencias, 50),
+        'p99': _percentil(latencias, 99),
+        'total': len(latencias),
+        'status': status,
+    }
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _esperar(url: str, proceso, espera: float = 30) -> None:
+    destino = urlsplit(url)
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f'El servidor terminó con código {proceso.returncode}')
+        try:
+            conn = http.client.HTTPConnection(destino.hostname, destino.port, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError(f'{url} no respondió /health en {espera:g}s')
+
+
+def _levantar(modo: str, puerto: int, workers: int, hilos: int):
+    env = dict(os.environ, PORT=str(puerto), RATELIMIT_ENABLED='false', FLASK_DEBUG='false')
+    if modo == 'gunicorn':
+        env.update(WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(hilos))
+        comando = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+    else:
+        comando = [sys.executable, 'app.py']
+    return subprocess.Popen(comando, cwd=RAIZ, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _imprimir(nombre: str, r) -> None:
+    codigos = ' '.join(f'{k}:{v}' for k, v in sorted(r['status'].items(), key=lambda kv: str(kv[0])))
+    print(f"{nombre:<10} {r['rps']:>10.1f} {r['p50']:>9.1f} {r['p99']:>9.1f} {r['total']:>8}  {codigos}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prueba de carga HTTP (dev server vs gunicorn)')
+    parser.add_argument('--url', default='http://localhost:5000', help='servidor ya levantado')
+    parser.add_argument('--path', default='/health')
+    parser.add_argument('--duracion', type=float, default=10, help='segundos por corrida (default: 10)')
+    parser.add_argument('--clientes', type=int, default=32, help='hilos concurrentes (default: 32)')
+    parser.add_argument('--token', help='JWT para el header Authorization')
+    parser.add_argument('--comparar', action='store_true',
+                        help='levantar python app.py y gunicorn y medir los dos')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='workers de gunicorn en --comparar (default: CPUs)')
+    parser.add_argument('--hilos', type=int, default=4, help='hilos por worker en --comparar (default: 4)')
+    args = parser.parse_args(argv)
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+
+    print(f"GET {args.path}: {args.clientes} clientes, {args.duracion:g}s por corrida")
+    print(f"{'servidor':<10} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'total':>8}  status")
+    if not args.comparar:
+        _imprimir(args.url, cargar(args.url, args.path, args.duracion, args.clientes, headers))
+        return
+
+    for modo in ('dev', 'gunicorn'):
+        puerto = _puerto_libre()
+        url = f'http://127.0.0.1:{puerto}'
+        proceso = _levantar(modo, puerto, args.workers, args.hilos)
+        try:
+            _esperar(url, proceso)
+            cargar(url, args.path, min(1.0, args.duracion), args.clientes, headers)  # calentamiento
+            _imprimir(modo, cargar(url, args.path, args.duracion, args.clientes, headers))
+        finally:
+            proceso.terminate()
+            try:
+                proceso.wait(timeout=35)
+            except subprocess.TimeoutExpired:
+                proceso.kill()
+
+
+if __name__ == '__main__':
+    main()
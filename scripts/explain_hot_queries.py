@@ -0,0 +1,138 @@
+"""
+Chequeo de regresión de planes: corre EXPLAIN sobre las consultas frecuentes
+de la aplicación y falla si alguna recorre entera una tabla grande sin índice.
+
+Pensado para correr contra la BD local de docker compose con las migraciones
+aplicadas (en particular 003 y 006):
+
+    docker exec flask_app python3 /app/scripts/explain_hot_queries.py
+    DB_HOST=127.0.0.1 DB_PORT=3307 python scripts/explain_hot_queries.py --estricto -v   # desde el host
+
+Por defecto una fila del plan falla si es `type=ALL` sobre una tabla grande y no
+hay ningún índice aplicable (`possible_keys` vacío): eso no cambia con el volumen
+de datos. Con --estricto también falla si hay índice pero el optimizador eligió
+recorrer la tabla (útil con datos cargados, p. ej. scripts/bench_reportes.py --seed).
+Sale con código 1 si alguna consulta falla.
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.auth.login import _SELECT_LOGIN
+from src.config.database import get_connection
+from src.models.reglas_reserva import (
+    _SELECT_HORAS_DIARIAS,
+    _SELECT_RESERVAS_SEMANALES,
+    _SELECT_SANCIONADOS,
+    inicio_semana,
+)
+from src.models.reserva_model import (
+    _GROUP_BY_RESERVA,
+    _SELECT_OCUPACION_EDIFICIO,
+    _SELECT_RESERVA,
+    _SELECT_TURNOS_OCUPADOS,
+    _SELECT_TURNOS_OCUPADOS_SALA,
+    _consulta_reservas,
+)
+from src.models.rol_efectivo_model import _SELECT_ROLES
+from src.models.sancion_model import _consulta_vencidas
+from src.models.sql_utils import placeholders
+from src.models.uso_diario_model import _consulta_usadas_vs_canceladas
+
+# Tablas que crecen con el uso; las de catálogo (sala, turno, edificio, ...) pueden recorrerse
+TABLAS_GRANDES = {'reserva', 'reserva_participante', 'sancion_participante', 'uso_diario',
+                  'participante', 'participante_programa_academico', 'admin', 'login'}
+# EXPLAIN muestra el alias de la consulta, no el nombre de la tabla
+ALIAS = {'r': 'reserva', 'rp': 'reserva_participante', 'u': 'uso_diario', 'sp': 'sancion_participante',
+         'p': 'participante', 'ppa': 'participante_programa_academico', 'l': 'login', 'a': 'admin'}
+
+
+def _muestra(cur):
+    """Valores reales para los parámetros (o valores plausibles si la BD está vacía)."""
+    cur.execute("SELECT nombre_sala, edificio, fecha, id_turno, id_reserva FROM reserva ORDER BY id_reserva DESC LIMIT 1")
+    r = cur.fetchone() or {'nombre_sala': 'X', 'edificio': 'X', 'fecha': date.today(), 'id_turno': 1, 'id_reserva': 1}
+    cur.execute("SELECT ci_participante FROM reserva_participante LIMIT 1")
+    p = cur.fetchone() or {'ci_participante': 1}
+    cur.execute("SELECT email FROM admin LIMIT 1")
+    a = cur.fetchone() or {'email': 'x@x'}
+    return {**r, 'ci': p['ci_participante'], 'email': a['email']}
+
+
+def consultas(m):
+    """(nombre, sql, params) de las consultas frecuentes, tomadas de los modelos."""
+    slot = (m['nombre_sala'], m['edificio'], m['fecha'], m['id_turno'])
+    un_ci = placeholders([m['ci']])
+    return [
+        ('turnos ocupados (reservar)',
+         _SELECT_TURNOS_OCUPADOS.format(slots=placeholders([slot], '(%s,%s,%s,%s)')), slot),
+        ('turnos ocupados de una sala', _SELECT_TURNOS_OCUPADOS_SALA, slot[:3]),
+        ('mapa de ocupación por edificio', _SELECT_OCUPACION_EDIFICIO,
+         (m['edificio'], m['fecha'], m['fecha'])),
+        ('sanciones vigentes de participantes', _SELECT_SANCIONADOS.format(cis=un_ci), (m['ci'],)),
+        ('horas diarias (límites)',
+         _SELECT_HORAS_DIARIAS.format(cis=un_ci, fechas=placeholders([m['fecha']])), (m['ci'], m['fecha'])),
+        ('reservas semanales (límites)',
+         _SELECT_RESERVAS_SEMANALES.format(cis=un_ci),
+         (m['ci'], inicio_semana(m['fecha']), m['fecha'])),
+        ('barrido de reservas vencidas', *_consulta_vencidas(0, 500, m['fecha'], m['fecha'])),
+        ('listado de reservas de un participante (página)',
+         *_consulta_reservas(ci_participante=m['ci'], limit=51)),
+        ('listado de reservas por rango (página siguiente)',
+         *_consulta_reservas(desde=m['fecha'], hasta=m['fecha'], after=(m['fecha'], 0, m['id_reserva']), limit=51)),
+        ('detalle de reserva',
+         _SELECT_RESERVA + " WHERE r.id_reserva = %s" + _GROUP_BY_RESERVA, (m['id_reserva'],)),
+        ('rol efectivo de participantes', _SELECT_ROLES.format(ph=un_ci), (m['ci'],)),
+        ('login: credenciales e identidad', _SELECT_LOGIN, (m['email'],)),
+        ('reporte: usadas vs canceladas por rango', *_consulta_usadas_vs_canceladas(m['fecha'], m['fecha'])),
+    ]
+
+
+def revisar(plan, estricto):
+    """Filas del plan que son un recorrido completo de una tabla grande."""
+    malas = []
+    for fila in plan:
+        tabla = ALIAS.get(fila.get('table'), fila.get('table'))
+        if fila.get('type') != 'ALL' or tabla not in TABLAS_GRANDES:
+            continue
+        if estricto or not fila.get('possible_keys'):
+            malas.append(fila)
+    return malas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='EXPLAIN de las consultas frecuentes; falla ante recorridos completos')
+    parser.add_argument('--estricto', action='store_true', help='falla ante cualquier type=ALL en tablas grandes')
+    parser.add_argument('-v', '--verbose', action='store_true', help='muestra el plan de cada consulta')
+    args = parser.parse_args(argv)
+
+    conn = get_connection(role='readonly', request_scoped=False)
+    fallas = 0
+    try:
+        with conn.cursor() as cur:
+            for nombre, sql, params in consultas(_muestra(cur)):
+                cur.execute("EXPLAIN " + sql, params)
+                plan = cur.fetchall()
+                malas = revisar(plan, args.estricto)
+                print(f"{'❌' if malas else '✅'} {nombre}")
+                if args.verbose or malas:
+                    for fila in plan:
+                        marca = '  <-- recorrido completo' if fila in malas else ''
+                        print(f"     {fila.get('table')}: type={fila.get('type')} key={fila.get('key')} "
+                              f"possible_keys={fila.get('possible_keys')} rows={fila.get('rows')} "
+                              f"extra={fila.get('Extra')}{marca}")
+                fallas += bool(malas)
+    finally:
+        conn.close()
+
+    if fallas:
+        print(f"❌ {fallas} consulta(s) con recorridos completos")
+        sys.exit(1)
+    print("✅ Ninguna consulta frecuente recorre tablas grandes sin índice")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,75 +1,165 @@
 """
 Script para procesar sanciones automáticas diariamente.
-Se ejecuta vía cronjob y busca reservas del día anterior sin asistencia.
+Se ejecuta vía cronjob y procesa las reservas activas de días ya pasados:
+  - si alguien asistió -> 'finalizada'
+  - si nadie asistió  -> 'sin asistencia' + sanción para todos los participantes
+
+Trabaja por fecha y en lotes de tamaño fijo, una transacción por lote. Cada lote
+avanza un checkpoint en `proceso_checkpoint` (migración 004), así si el proceso
+se corta se reanuda desde el último lote confirmado, y sirve para recuperar días
+que no se corrieron.
+
+Uso:
+    python scripts/procesar_sanciones_diarias.py                  # desde la última fecha completa hasta ayer
+    python scripts/procesar_sanciones_diarias.py --desde 2025-10-01 --hasta 2025-10-31
+    python scripts/procesar_sanciones_diarias.py --desde 2025-10-01 --dry-run
 """
-import sys
+import argparse
+import logging
 import os
-from datetime import date, timedelta
+import sys
+import time
+from datetime import date, datetime, timedelta
 
 # Agregar el directorio raíz al path para importar módulos
-sys.path.insert(0, '/app')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.models.sancion_model import aplicar_sanciones_por_reserva
-from src.config.database import get_connection
+from src.config.database import run_in_transaction
+from src.models.checkpoint_model import guardar_checkpoint, obtener_checkpoint, ultima_fecha_completada
+from src.models.sancion_model import procesar_lote_vencidas
+from src.utils.report_cache import invalidar_reportes
 
+PROCESO = 'sanciones_diarias'
+SANCION_DIAS = 60
 
-def procesar_sanciones_diarias():
-    """
-    Busca todas las reservas del día anterior que están activas
-    y aplica sanciones si corresponde (nadie asistió).
-    """
-    ayer = date.today() - timedelta(days=1)
-    
-    print(f"[{date.today()}] Iniciando procesamiento de sanciones para reservas del {ayer}")
-    
-    try:
-        # Obtener reservas activas del día anterior
-        conn = get_connection('readonly')
+logger = logging.getLogger('sanciones_diarias')
+
+
+def _fecha(valor: str) -> date:
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+def rango_por_defecto(hoy: date):
+    """Desde el día siguiente a la última fecha completa (o ayer si no hay) hasta ayer."""
+    ayer = hoy - timedelta(days=1)
+    ultima = ultima_fecha_completada(PROCESO)
+    desde = ultima + timedelta(days=1) if ultima else ayer
+    return desde, ayer
+
+
+def procesar_fecha(fecha: date, chunk_size: int, dry_run: bool, sancion_dias: int):
+    """Procesa todas las reservas activas de `fecha` en lotes; devuelve totales de la fecha."""
+    def _leer(conn):
         cur = conn.cursor()
-        
-        cur.execute("""
-            SELECT id_reserva, nombre_sala, edificio, fecha
-            FROM reserva
-            WHERE fecha = %s 
-            AND estado = 'activa'
-        """, (ayer,))
-        
-        reservas = cur.fetchall()
-        cur.close()
-        conn.close()
-        
-        if not reservas:
-            print(f"No hay reservas activas del día {ayer}")
+        try:
+            return obtener_checkpoint(cur, PROCESO, fecha)
+        finally:
+            cur.close()
+
+    checkpoint = run_in_transaction(_leer, role='user')
+    if checkpoint and checkpoint['completado']:
+        logger.info("%s ya completada (%s reservas), se omite", fecha, checkpoint['procesadas'])
+        return {'procesadas': 0, 'finalizadas': 0, 'sancionadas': 0, 'insertadas': 0}
+
+    despues_de = checkpoint['ultimo_id'] if checkpoint else 0
+    if despues_de:
+        logger.info("%s: reanudando después de id_reserva %s", fecha, despues_de)
+
+    totales = {'procesadas': 0, 'finalizadas': 0, 'sancionadas': 0, 'insertadas': 0}
+    numero = 0
+    while True:
+        numero += 1
+
+        def _lote(conn, despues_de=despues_de):
+            lote = procesar_lote_vencidas(conn, despues_de, chunk_size, sancion_dias,
+                                          desde=fecha, hasta=fecha, dry_run=dry_run)
+            if not dry_run:
+                cur = conn.cursor()
+                try:
+                    guardar_checkpoint(cur, PROCESO, fecha, lote['ultimo_id'], lote['procesadas'],
+                                       completado=lote['procesadas'] < chunk_size)
+                finally:
+                    cur.close()
+            return lote
+
+        inicio = time.perf_counter()
+        lote = run_in_transaction(_lote, role='user')
+        duracion = time.perf_counter() - inicio
+        if lote['procesadas'] and not dry_run:
+            # Solo tiene efecto con un backend compartido (file/redis)
+            invalidar_reportes('reservas', 'sanciones', al_confirmar=False)
+
+        totales['procesadas'] += lote['procesadas']
+        totales['finalizadas'] += len(lote['finalizadas'])
+        totales['sancionadas'] += len(lote['sancionadas'])
+        totales['insertadas'] += lote['insertadas_total']
+        if lote['procesadas']:
+            logger.info(
+                "%s lote %d: %d reservas (%d finalizadas, %d sin asistencia, %d sanciones) en %.3fs (%.0f reservas/s)%s",
+                fecha, numero, lote['procesadas'], len(lote['finalizadas']), len(lote['sancionadas']),
+                lote['insertadas_total'], duracion, lote['procesadas'] / duracion if duracion else 0.0,
+                ' [dry-run]' if dry_run else ''
+            )
+        despues_de = lote['ultimo_id']
+        if lote['procesadas'] < chunk_size:
+            break
+    return totales
+
+
+def procesar_sanciones_diarias(desde: date, hasta: date, chunk_size: int = 500,
+                               dry_run: bool = False, sancion_dias: int = SANCION_DIAS):
+    """Procesa el rango [desde, hasta] fecha por fecha y devuelve los totales."""
+    logger.info("Iniciando procesamiento de sanciones del %s al %s (lotes de %d)%s",
+                desde, hasta, chunk_size, ' [dry-run]' if dry_run else '')
+    inicio = time.perf_counter()
+    totales = {'procesadas': 0, 'finalizadas': 0, 'sancionadas': 0, 'insertadas': 0}
+    fecha = desde
+    while fecha <= hasta:
+        t0 = time.perf_counter()
+        del_dia = procesar_fecha(fecha, chunk_size, dry_run, sancion_dias)
+        if del_dia['procesadas']:
+            logger.info("%s: %d reservas en %.3fs", fecha, del_dia['procesadas'], time.perf_counter() - t0)
+        for clave in totales:
+            totales[clave] += del_dia[clave]
+        fecha += timedelta(days=1)
+
+    duracion = time.perf_counter() - inicio
+    logger.info(
+        "Resumen: %d reservas (%d finalizadas, %d sin asistencia), %d sanción(es) aplicada(s) en %.3fs (%.0f reservas/s)",
+        totales['procesadas'], totales['finalizadas'], totales['sancionadas'], totales['insertadas'],
+        duracion, totales['procesadas'] / duracion if duracion else 0.0
+    )
+    return totales
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Procesa reservas vencidas y aplica sanciones por inasistencia')
+    parser.add_argument('--desde', type=_fecha, help='YYYY-MM-DD (por defecto: día siguiente a la última fecha completa)')
+    parser.add_argument('--hasta', type=_fecha, help='YYYY-MM-DD inclusive (por defecto: ayer)')
+    parser.add_argument('--chunk-size', type=int, default=500, help='reservas por transacción')
+    parser.add_argument('--sancion-dias', type=int, default=SANCION_DIAS)
+    parser.add_argument('--dry-run', action='store_true', help='clasifica y reporta sin escribir nada')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s %(message)s')
+
+    hoy = date.today()
+    try:
+        desde_def, hasta_def = (None, None) if args.desde and args.hasta else rango_por_defecto(hoy)
+        desde = args.desde or desde_def
+        hasta = args.hasta or hasta_def
+        if hasta >= hoy:
+            parser.error('--hasta debe ser anterior a hoy')
+        if args.chunk_size <= 0:
+            parser.error('--chunk-size debe ser positivo')
+        if desde > hasta:
+            logger.info("No hay fechas pendientes (desde %s > hasta %s)", desde, hasta)
             return
-        
-        print(f"Encontradas {len(reservas)} reservas activas del día {ayer}")
-        
-        # Procesar cada reserva
-        total_sanciones = 0
-        for reserva in reservas:
-            id_reserva = reserva['id_reserva']
-            nombre_sala = reserva['nombre_sala']
-            
-            try:
-                resultado = aplicar_sanciones_por_reserva(id_reserva, sancion_dias=60)
-                
-                if resultado['insertadas'] > 0:
-                    print(f"  ✓ Reserva {id_reserva} ({nombre_sala}): {resultado['insertadas']} sanción(es) aplicada(s)")
-                    print(f"    - Sancionados: {resultado['sancionados']}")
-                    print(f"    - Motivo: {resultado['motivo']}")
-                    total_sanciones += resultado['insertadas']
-                else:
-                    print(f"  - Reserva {id_reserva} ({nombre_sala}): Sin sanciones ({resultado['motivo']})")
-                    
-            except Exception as e:
-                print(f"  ✗ Error procesando reserva {id_reserva}: {str(e)}")
-        
-        print(f"\nResumen: {total_sanciones} sanción(es) aplicada(s) en total")
-        
+        procesar_sanciones_diarias(desde, hasta, args.chunk_size, args.dry_run, args.sancion_dias)
     except Exception as e:
-        print(f"Error en procesamiento: {str(e)}")
+        logger.exception("Error en procesamiento: %s", e)
         sys.exit(1)
 
 
 if __name__ == '__main__':
-    procesar_sanciones_diarias()
+    main()
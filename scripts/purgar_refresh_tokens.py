@@ -0,0 +1,43 @@
+"""
+Borra los refresh tokens vencidos o revocados (migración 008).
+
+app_user no tiene DELETE, así que la app solo los marca; este script usa el rol
+admin. Pensado para correr una vez por día (por ejemplo junto al cron de sanciones).
+
+Uso:
+    python scripts/purgar_refresh_tokens.py            # vencidos/revocados hace más de 7 días
+    python scripts/purgar_refresh_tokens.py --dias 0
+"""
+import argparse
+import logging
+import os
+import sys
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.auth.refresh_tokens import purgar_vencidos
+
+logger = logging.getLogger('refresh_tokens')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Borra refresh tokens vencidos o revocados')
+    parser.add_argument('--dias', type=int, default=7, help='días de gracia después de vencer/revocarse')
+    parser.add_argument('--lote', type=int, default=5000, help='filas por transacción')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s %(message)s')
+    if args.dias < 0 or args.lote <= 0:
+        parser.error('--dias no puede ser negativo y --lote debe ser positivo')
+
+    try:
+        total = purgar_vencidos(args.dias, args.lote)
+        logger.info("Refresh tokens borrados: %d", total)
+    except Exception as e:
+        logger.exception("Error purgando refresh tokens: %s", e)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Reconstruye la tabla resumen `uso_diario` (migración 005) a partir de `reserva`.
+
+Sirve para la carga inicial, para recuperar después de cambios hechos a mano en
+la BD o si scripts/verificar_uso_diario.py encuentra diferencias. Trabaja por
+lotes de días, una transacción por lote.
+
+Uso:
+    python scripts/reconstruir_uso_diario.py                          # todo el rango con reservas
+    python scripts/reconstruir_uso_diario.py --desde 2025-10-01 --hasta 2025-10-31
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import date, datetime
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.uso_diario_model import reconstruir_uso_diario
+from src.utils.report_cache import invalidar_reportes
+
+logger = logging.getLogger('uso_diario')
+
+
+def _fecha(valor: str) -> date:
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Reconstruye la tabla resumen uso_diario desde reserva')
+    parser.add_argument('--desde', type=_fecha, help='YYYY-MM-DD (por defecto: primera fecha con reservas)')
+    parser.add_argument('--hasta', type=_fecha, help='YYYY-MM-DD inclusive (por defecto: última fecha con reservas)')
+    parser.add_argument('--dias-por-lote', type=int, default=31, help='días por transacción')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s %(message)s')
+
+    if args.dias_por_lote <= 0:
+        parser.error('--dias-por-lote debe ser positivo')
+    if args.desde and args.hasta and args.desde > args.hasta:
+        parser.error('--desde debe ser anterior o igual a --hasta')
+
+    try:
+        inicio = time.perf_counter()
+        lotes = reconstruir_uso_diario(args.desde, args.hasta, args.dias_por_lote)
+        for desde, hasta, filas in lotes:
+            logger.info("%s a %s: %d fila(s) afectada(s)", desde, hasta, filas)
+        if lotes:
+            # Solo tiene efecto con un backend compartido (file/redis)
+            invalidar_reportes('reservas', al_confirmar=False)
+        logger.info("Reconstrucción terminada: %d lote(s) en %.3fs", len(lotes), time.perf_counter() - inicio)
+    except Exception as e:
+        logger.exception("Error reconstruyendo uso_diario: %s", e)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Verifica el ruteo de conexiones a réplicas y los topes por rol de src/config/database.py.
+
+Sin argumentos usa un driver falso (no necesita MySQL) y comprueba:
+  - round-robin entre las réplicas de DB_READONLY_HOSTS
+  - que una réplica que no conecta sale de la rotación y se usa la siguiente
+  - que sin réplicas disponibles se conecta al primario, y que la réplica vuelve
+    a la rotación pasado DB_REPLICA_RETRY
+  - que 'readonly' lleva MAX_EXECUTION_TIME / read_timeout y 'user' no
+
+Con --real abre conexiones de verdad por rol y muestra a qué servidor fue cada
+una (@@hostname, @@port) y su @@max_execution_time. Para probar con dos
+contenedores MySQL locales:
+
+    DB_READONLY_HOSTS=127.0.0.1:3308,127.0.0.1:3309 DB_HOST=127.0.0.1 DB_PORT=3307 \\
+        python scripts/verificar_ruteo_bd.py --real -n 6
+
+Sale con código 1 si algún chequeo falla.
+"""
+import argparse
+import os
+import sys
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pymysql
+
+from src.config import database
+from src.config.database import HostRouter, get_connection, get_db_config, get_replica_hosts
+
+
+class DriverFalso:
+    """Reemplazo de pymysql.connect: registra a qué host se conectó y falla en los caídos."""
+
+    def __init__(self):
+        self.caidos = set()
+        self.conexiones = []
+
+    def __call__(self, **cfg):
+        host = (cfg['host'], cfg['port'])
+        if host in self.caidos:
+            raise pymysql.err.OperationalError(2003, f"Can't connect to MySQL server on '{host[0]}'")
+        self.conexiones.append(host)
+        return {'host': host, 'init_command': cfg.get('init_command'), 'read_timeout': cfg.get('read_timeout')}
+
+
+def _chequear(nombre, ok, detalle=''):
+    print(f"{'✅' if ok else '❌'} {nombre}{f' ({detalle})' if detalle else ''}")
+    return ok
+
+
+def verificar_falso() -> bool:
+    cfg = dict(get_db_config('readonly'), host='primario', port=3306)
+    r1, r2 = ('replica1', 3306), ('replica2', 3306)
+    driver = DriverFalso()
+    router = HostRouter(cfg, [r1, r2], connect=driver, retry=60)
+    oks = []
+
+    hosts = [router.connect()['host'] for _ in range(4)]
+    oks.append(_chequear('round-robin entre réplicas', hosts == [r1, r2, r1, r2], hosts))
+
+    driver.caidos.add(r1)
+    hosts = [router.connect()['host'] for _ in range(3)]
+    oks.append(_chequear('réplica caída sale de la rotación', hosts == [r2, r2, r2], hosts))
+
+    driver.caidos.add(r2)
+    router._caida_hasta.clear()
+    hosts = [router.connect()['host'] for _ in range(2)]
+    oks.append(_chequear('sin réplicas se usa el primario', hosts == [('primario', 3306)] * 2, hosts))
+
+    driver.caidos.clear()
+    router._caida_hasta.clear()  # equivale a que pasó DB_REPLICA_RETRY
+    hosts = {router.connect()['host'] for _ in range(2)}
+    oks.append(_chequear('las réplicas vuelven a la rotación', hosts == {r1, r2}, sorted(hosts)))
+
+    stats = router.stats()
+    oks.append(_chequear('stats por servidor', stats['replica1:3306']['fallas'] >= 1, stats))
+
+    ro, user = get_db_config('readonly'), get_db_config('user')
+    tope = database.ROLE_TIMEOUTS['readonly']['max_execution_ms']
+    oks.append(_chequear('readonly con MAX_EXECUTION_TIME',
+                         not tope or f"MAX_EXECUTION_TIME = {tope}" in ro.get('init_command', ''),
+                         ro.get('init_command')))
+    oks.append(_chequear('user sin tope de ejecución',
+                         'init_command' not in user or not database.ROLE_TIMEOUTS['user']['max_execution_ms'],
+                         user.get('init_command')))
+    return all(oks)
+
+
+def verificar_real(n: int) -> bool:
+    print(f"Réplicas readonly: {get_replica_hosts('readonly') or 'ninguna (primario)'}")
+    ok = True
+    for role in ('readonly', 'user'):
+        conns = [get_connection(role, request_scoped=False) for _ in range(n)]
+        try:
+            for conn in conns:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT @@hostname AS host, @@port AS port, @@max_execution_time AS tope")
+                    fila = cur.fetchone()
+                print(f"  {role}: {fila['host']}:{fila['port']} max_execution_time={fila['tope']}")
+                esperado = database.ROLE_TIMEOUTS[role]['max_execution_ms']
+                if esperado and int(fila['tope']) != esperado:
+                    ok = _chequear(f'{role}: max_execution_time', False, f"{fila['tope']} != {esperado}") and ok
+        finally:
+            for conn in conns:
+                conn.close()
+    print(database.pool_stats())
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Verifica ruteo a réplicas y topes por rol')
+    parser.add_argument('--real', action='store_true', help='conectar a los servidores configurados')
+    parser.add_argument('-n', type=int, default=4, help='conexiones por rol con --real (default: 4)')
+    args = parser.parse_args(argv)
+
+    ok = verificar_real(args.n) if args.real else verificar_falso()
+    if not ok:
+        sys.exit(1)
+    print('✅ Ruteo y topes por rol OK')
+
+
+if __name__ == '__main__':
+    main()
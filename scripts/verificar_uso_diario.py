@@ -0,0 +1,187 @@
+"""
+Verifica que la tabla resumen `uso_diario` coincida con `reserva`.
+
+Compara:
+  - fila por fila: el agrupado calculado desde reserva/reserva_participante
+    contra uso_diario (las filas en cero de uso_diario se ignoran)
+  - reporte por reporte: las consultas originales sobre reserva contra las
+    funciones de src/models/uso_diario_model.py que usan los endpoints
+
+Sale con código 1 si encuentra diferencias (en ese caso correr
+scripts/reconstruir_uso_diario.py para el rango afectado).
+
+Uso:
+    python scripts/verificar_uso_diario.py
+    python scripts/verificar_uso_diario.py --desde 2025-10-01 --hasta 2025-10-31
+"""
+import argparse
+import os
+import sys
+from datetime import date, datetime
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.database import execute_query
+from src.models.uso_diario_model import (
+    ocupacion_por_edificio,
+    reservas_por_tipo_sala,
+    salas_mas_reservadas,
+    turnos_mas_demandados,
+    usadas_vs_canceladas,
+)
+
+
+def _fecha(valor: str) -> date:
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+def _filtro(desde, hasta, alias='r'):
+    filtros, params = [], []
+    if desde:
+        filtros.append(f"{alias}.fecha >= %s")
+        params.append(desde)
+    if hasta:
+        filtros.append(f"{alias}.fecha <= %s")
+        params.append(hasta)
+    return filtros, params
+
+
+def _where(filtros):
+    return (" WHERE " + " AND ".join(filtros)) if filtros else ""
+
+
+def comparar_filas(desde, hasta):
+    filtros, params = _filtro(desde, hasta)
+    crudo = execute_query(f"""
+        SELECT r.fecha, r.edificio, r.nombre_sala, COALESCE(r.id_turno, 0) AS id_turno, r.estado,
+               COUNT(DISTINCT r.id_reserva) AS reservas,
+               COUNT(rp.ci_participante) AS participantes,
+               COALESCE(SUM(CASE WHEN rp.asistencia = 1 THEN 1 ELSE 0 END), 0) AS asistentes
+        FROM reserva r
+        LEFT JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+        {_where(filtros)}
+        GROUP BY r.fecha, r.edificio, r.nombre_sala, COALESCE(r.id_turno, 0), r.estado
+    """, tuple(params), role='readonly')
+    filtros_u, params_u = _filtro(desde, hasta, 'u')
+    filtros_u.append("(u.reservas > 0 OR u.participantes > 0 OR u.asistentes > 0)")
+    resumen = execute_query(f"""
+        SELECT u.fecha, u.edificio, u.nombre_sala, u.id_turno, u.estado, u.reservas, u.participantes, u.asistentes
+        FROM uso_diario u
+        {_where(filtros_u)}
+    """, tuple(params_u), role='readonly')
+
+    def _indexar(filas):
+        return {
+            (f['fecha'], f['edificio'].lower(), f['nombre_sala'].lower(), int(f['id_turno']), f['estado']):
+                (int(f['reservas']), int(f['participantes']), int(f['asistentes']))
+            for f in filas
+        }
+
+    a, b = _indexar(crudo), _indexar(resumen)
+    return [
+        f"{clave}: reserva={a.get(clave)} uso_diario={b.get(clave)}"
+        for clave in sorted(set(a) | set(b), key=str)
+        if a.get(clave) != b.get(clave)
+    ]
+
+
+def _por_clave(filas, claves, valores):
+    return {tuple(f[c] for c in claves): tuple(int(f[v] or 0) for v in valores) for f in filas}
+
+
+def comparar_reportes(desde, hasta):
+    filtros, params = _filtro(desde, hasta)
+    diferencias = []
+
+    def _comparar(nombre, crudo, resumen):
+        if crudo != resumen:
+            claves = sorted(set(crudo) | set(resumen), key=str)
+            for c in claves:
+                if crudo.get(c) != resumen.get(c):
+                    diferencias.append(f"{nombre} {c}: reserva={crudo.get(c)} uso_diario={resumen.get(c)}")
+
+    total_salas = execute_query("SELECT COUNT(*) AS n FROM sala", role='readonly')[0]['n']
+    crudo = execute_query(f"""
+        SELECT s.nombre_sala, s.edificio, COUNT(r.id_reserva) AS total_reservas
+        FROM sala s
+        LEFT JOIN reserva r ON s.nombre_sala = r.nombre_sala AND s.edificio = r.edificio
+        {_where(filtros)}
+        GROUP BY s.nombre_sala, s.edificio
+    """, tuple(params), role='readonly')
+    _comparar('salas_mas_reservadas',
+              _por_clave(crudo, ('nombre_sala', 'edificio'), ('total_reservas',)),
+              _por_clave(salas_mas_reservadas(desde, hasta, limit=max(total_salas, 1)),
+                         ('nombre_sala', 'edificio'), ('total_reservas',)))
+
+    crudo = execute_query(f"""
+        SELECT t.id_turno, COUNT(r.id_reserva) AS total_reservas
+        FROM turno t
+        LEFT JOIN reserva r ON t.id_turno = r.id_turno
+        {_where(filtros)}
+        GROUP BY t.id_turno
+    """, tuple(params), role='readonly')
+    _comparar('turnos_mas_demandados',
+              _por_clave(crudo, ('id_turno',), ('total_reservas',)),
+              _por_clave(turnos_mas_demandados(desde, hasta), ('id_turno',), ('total_reservas',)))
+
+    # total_salas/capacidad_total no se comparan: el reporte nuevo los calcula desde sala
+    crudo = execute_query(f"""
+        SELECT e.nombre_edificio AS edificio, COUNT(DISTINCT r.id_reserva) AS total_reservas,
+               COUNT(rp.ci_participante) AS total_participantes
+        FROM edificio e
+        JOIN sala s ON e.nombre_edificio = s.edificio
+        LEFT JOIN reserva r ON s.nombre_sala = r.nombre_sala AND s.edificio = r.edificio
+        LEFT JOIN reserva_participante rp ON r.id_reserva = rp.id_reserva
+        {_where(filtros)}
+        GROUP BY e.nombre_edificio
+    """, tuple(params), role='readonly')
+    _comparar('ocupacion_por_edificio',
+              _por_clave(crudo, ('edificio',), ('total_reservas', 'total_participantes')),
+              _por_clave(ocupacion_por_edificio(desde, hasta), ('edificio',), ('total_reservas', 'total_participantes')))
+
+    crudo = execute_query(f"""
+        SELECT s.tipo_sala, COUNT(r.id_reserva) AS total_reservas, COUNT(DISTINCT r.fecha) AS dias_con_reservas,
+               COUNT(DISTINCT CONCAT(r.nombre_sala, '-', r.edificio)) AS salas_usadas
+        FROM sala s
+        LEFT JOIN reserva r ON s.nombre_sala = r.nombre_sala AND s.edificio = r.edificio
+        {_where(filtros)}
+        GROUP BY s.tipo_sala
+    """, tuple(params), role='readonly')
+    columnas = ('total_reservas', 'dias_con_reservas', 'salas_usadas')
+    _comparar('reservas_por_tipo_sala',
+              _por_clave(crudo, ('tipo_sala',), columnas),
+              _por_clave(reservas_por_tipo_sala(desde, hasta), ('tipo_sala',), columnas))
+
+    crudo = execute_query(f"""
+        SELECT COUNT(*) AS total_reservas,
+               COALESCE(SUM(CASE WHEN r.estado = 'finalizada' THEN 1 ELSE 0 END), 0) AS used,
+               COALESCE(SUM(CASE WHEN r.estado IN ('cancelada', 'sin asistencia') THEN 1 ELSE 0 END), 0)
+                   AS cancelled_or_no_show
+        FROM reserva r
+        {_where(filtros)}
+    """, tuple(params), role='readonly')
+    columnas = ('total_reservas', 'used', 'cancelled_or_no_show')
+    _comparar('usadas_vs_canceladas',
+              _por_clave(crudo, (), columnas),
+              _por_clave([usadas_vs_canceladas(desde, hasta)], (), columnas))
+    return diferencias
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara uso_diario con las consultas sobre reserva')
+    parser.add_argument('--desde', type=_fecha, help='YYYY-MM-DD (por defecto: sin límite)')
+    parser.add_argument('--hasta', type=_fecha, help='YYYY-MM-DD inclusive (por defecto: sin límite)')
+    args = parser.parse_args(argv)
+
+    diferencias = comparar_filas(args.desde, args.hasta) + comparar_reportes(args.desde, args.hasta)
+    for d in diferencias:
+        print(f"❌ {d}")
+    if diferencias:
+        print(f"❌ {len(diferencias)} diferencia(s) entre uso_diario y reserva")
+        sys.exit(1)
+    print("✅ uso_diario coincide con reserva")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,30 +1,133 @@
+import logging
+import os
+import threading
+import time
+
 import bcrypt
+from src.auth.password_pool import PoolSaturado, get_password_pool
 from src.config.database import get_connection
 
+# Costo de bcrypt para hashes nuevos; los hashes con otro costo se regeneran al iniciar sesión
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+
+# Cache negativo: emails sin login, para no consultar la BD en cada intento con un email inexistente.
+# Es por proceso: con varios workers (o una réplica atrasada) un login recién creado
+# puede verse como inexistente hasta TTL segundos, por eso el default es corto.
+LOGIN_NEGATIVE_CACHE_TTL = float(os.getenv('LOGIN_NEGATIVE_CACHE_TTL', '3'))
+LOGIN_NEGATIVE_CACHE_MAX = int(os.getenv('LOGIN_NEGATIVE_CACHE_MAX', '10000'))
+
+logger = logging.getLogger(__name__)
+
+# Hash e identidad (admin o participante) del login en una sola consulta
+_SELECT_LOGIN = """
+	SELECT l.contrasena, a.ci AS admin_ci, p.ci AS participante_ci
+	FROM login l
+	LEFT JOIN admin a ON a.email = l.correo
+	LEFT JOIN participante p ON p.email = l.correo
+	WHERE l.correo = %s
+	LIMIT 1
+"""
+
+_desconocidos = {}  # correo en minúsculas -> vencimiento (monotonic)
+_desconocidos_lock = threading.Lock()
+
+
+def _hashpw(plain_password: str, rounds: int) -> str:
+	return bcrypt.hashpw(plain_password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _checkpw(plain_password: str, hashed_password: str) -> bool:
+	try:
+		return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+	except Exception:
+		return False
+
+
+def costo_hash(hashed_password: str):
+	"""Costo de un hash bcrypt ('$2b$12$...' -> 12), o None si no es un hash bcrypt."""
+	try:
+		return int(hashed_password.split('$')[2])
+	except (AttributeError, IndexError, ValueError):
+		return None
+
 
-def hash_password(plain_password: str) -> str:
+def hash_password(plain_password: str, rounds: int = None) -> str:
 	"""Genera un hash usando bcrypt y devuelve un string listo para guardar.
 
 	bcrypt genera y almacena la salt dentro del propio hash, por lo que no hace
-	falta guardarla por separado.
+	falta guardarla por separado. Corre en el pool de bcrypt (lanza PoolSaturado
+	si está lleno).
 	"""
 	if plain_password is None:
 		raise ValueError("La contraseña no puede ser nula")
-	hashed = bcrypt.hashpw(plain_password.encode('utf-8'), bcrypt.gensalt(rounds=12))
-	return hashed.decode('utf-8')
+	return get_password_pool().ejecutar(_hashpw, plain_password, rounds or BCRYPT_ROUNDS)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
 	"""Verifica la contraseña usando exclusivamente bcrypt.
 
 	Requiere que `hashed_password` sea un hash bcrypt (empieza con '$2').
+	Corre en el pool de bcrypt (lanza PoolSaturado si está lleno).
 	"""
 	if plain_password is None or hashed_password is None:
 		return False
+	return get_password_pool().ejecutar(_checkpw, plain_password, hashed_password)
+
+
+def _rehash(correo: str, plain_password: str, hash_anterior: str) -> None:
+	nuevo = _hashpw(plain_password, BCRYPT_ROUNDS)
+	conn = get_connection('user', request_scoped=False)
 	try:
-		return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
-	except Exception:
+		with conn.cursor() as cur:
+			# Solo si nadie cambió la contraseña mientras tanto
+			cur.execute(
+				"UPDATE login SET contrasena = %s WHERE correo = %s AND contrasena = %s",
+				(nuevo, correo, hash_anterior)
+			)
+		conn.commit()
+	except Exception as e:
+		conn.rollback()
+		logger.warning("No se pudo regenerar el hash de %s: %s", correo, e)
+	finally:
+		conn.close()
+
+
+def programar_rehash(correo: str, plain_password: str, hashed_password: str) -> bool:
+	"""Si el hash tiene un costo distinto de BCRYPT_ROUNDS, lo regenera en segundo
+	plano (sin demorar el login). Si el pool está lleno se deja para el próximo login."""
+	if costo_hash(hashed_password) == BCRYPT_ROUNDS:
+		return False
+	try:
+		get_password_pool().enviar(_rehash, correo, plain_password, hashed_password)
+	except PoolSaturado:
 		return False
+	return True
+
+
+def _es_desconocido(correo: str) -> bool:
+	with _desconocidos_lock:
+		vence = _desconocidos.get(correo)
+		if vence is None:
+			return False
+		if vence < time.monotonic():
+			del _desconocidos[correo]
+			return False
+		return True
+
+
+def _recordar_desconocido(correo: str) -> None:
+	if LOGIN_NEGATIVE_CACHE_TTL <= 0:
+		return
+	with _desconocidos_lock:
+		if len(_desconocidos) >= LOGIN_NEGATIVE_CACHE_MAX:
+			_desconocidos.clear()
+		_desconocidos[correo] = time.monotonic() + LOGIN_NEGATIVE_CACHE_TTL
+
+
+def olvidar_desconocido(correo: str) -> None:
+	"""Saca `correo` del cache de emails desconocidos (al crearle un login)."""
+	with _desconocidos_lock:
+		_desconocidos.pop((correo or '').strip().lower(), None)
 
 
 def authenticate_user(correo: str, plain_password: str):
@@ -33,49 +136,44 @@ def authenticate_user(correo: str, plain_password: str):
 	Retorna una tupla (ok: bool, data_or_message).
 	- Si ok=True -> data_or_message es el diccionario del usuario con tipo y ID
 	- Si ok=False -> data_or_message es un mensaje de error
+	Lanza PoolSaturado si el pool de bcrypt no admite más trabajo.
+
+	Hash, tipo de usuario e ID salen de una sola consulta; la conexión se
+	devuelve al pool antes de verificar la contraseña. Los emails sin login se
+	recuerdan `LOGIN_NEGATIVE_CACHE_TTL` segundos para no volver a consultarlos.
 	"""
 	if not correo or not plain_password:
 		return False, "correo y contraseña requeridos"
 
+	clave = correo.strip().lower()
+	if _es_desconocido(clave):
+		logger.debug("login rechazado correo=%s motivo=desconocido cache=hit", correo)
+		return False, "Usuario no encontrado"
+
 	conn = get_connection('readonly')
-	cur = conn.cursor()
-	cur.execute("SELECT correo, contrasena FROM login WHERE correo = %s", (correo,))
-	row = cur.fetchone()
+	try:
+		with conn.cursor() as cur:
+			cur.execute(_SELECT_LOGIN, (correo,))
+			row = cur.fetchone()
+	finally:
+		conn.close()
 
 	if not row:
-		cur.close()
-		conn.close()
-		print(f"[DEBUG] Usuario no encontrado: {correo}")
+		_recordar_desconocido(clave)
+		logger.debug("login rechazado correo=%s motivo=desconocido cache=miss", correo)
 		return False, "Usuario no encontrado"
 
-	hashed = row.get('contrasena') if isinstance(row, dict) else row[1]
-	print(f"[DEBUG] Email: {correo}")
-	print(f"[DEBUG] Hash from DB: {hashed[:20] if hashed else 'NULL'}...")
-	print(f"[DEBUG] Plain password: {plain_password}")
-	verify_result = verify_password(plain_password, hashed)
-	print(f"[DEBUG] Password verify result: {verify_result}")
-	if not verify_result:
-		cur.close()
-		conn.close()
+	hashed = row.get('contrasena')
+	if not verify_password(plain_password, hashed):
+		logger.info("login rechazado correo=%s motivo=credenciales", correo)
 		return False, "Credenciales incorrectas"
-	
-	# Determinar si es admin o participante
-	cur.execute("SELECT ci FROM admin WHERE email = %s", (correo,))
-	admin_row = cur.fetchone()
-	
-	if admin_row:
-		# Es admin
-		user_type = 'admin'
-		user_id = admin_row.get('ci') if isinstance(admin_row, dict) else admin_row[0]
+	programar_rehash(correo, plain_password, hashed)
+
+	if row.get('admin_ci') is not None:
+		user_type, user_id = 'admin', row['admin_ci']
 	else:
-		# Es participante
-		cur.execute("SELECT ci FROM participante WHERE email = %s", (correo,))
-		part_row = cur.fetchone()
-		user_type = 'participante'
-		user_id = part_row.get('ci') if part_row and isinstance(part_row, dict) else (part_row[0] if part_row else None)
-	
-	cur.close()
-	conn.close()
+		user_type, user_id = 'participante', row.get('participante_ci')
+	logger.debug("login ok correo=%s user_type=%s", correo, user_type)
 
 	return True, {
 		"correo": correo,
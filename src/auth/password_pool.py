@@ -0,0 +1,104 @@
+"""
+Pool acotado para el trabajo de bcrypt (verificar y generar hashes).
+
+bcrypt con costo 12 tarda cientos de milisegundos de CPU. Si corre en el hilo
+del request, una ráfaga de logins (cambio de clase) deja sin hilos al resto de
+los endpoints. Acá se ejecuta en un pool propio de `BCRYPT_WORKERS` hilos
+(bcrypt libera el GIL mientras calcula, así que los hilos corren en paralelo)
+con un máximo de `BCRYPT_QUEUE_MAX` trabajos en curso o en espera. Si el pool
+está lleno, `ejecutar` lanza `PoolSaturado` enseguida y el endpoint responde
+503 con `Retry-After` en lugar de encolar sin límite.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from typing import Any, Callable, Optional
+
+BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', str(min(4, os.cpu_count() or 1))))
+BCRYPT_QUEUE_MAX = int(os.getenv('BCRYPT_QUEUE_MAX', '32'))
+BCRYPT_TIMEOUT = float(os.getenv('BCRYPT_TIMEOUT', '10'))
+BCRYPT_RETRY_AFTER = int(os.getenv('BCRYPT_RETRY_AFTER', '2'))
+
+
+class PoolSaturado(RuntimeError):
+    """El pool de bcrypt no admite más trabajo; reintentar en `retry_after` segundos."""
+
+    def __init__(self, mensaje: str = 'Servidor ocupado, reintentar en unos segundos',
+                 retry_after: int = BCRYPT_RETRY_AFTER):
+        super().__init__(mensaje)
+        self.retry_after = retry_after
+
+
+class PasswordPool:
+    """Ejecutor de hilos con control de admisión (semáforo no bloqueante)."""
+
+    def __init__(self, workers: int = BCRYPT_WORKERS, max_en_curso: int = BCRYPT_QUEUE_MAX,
+                 timeout: float = BCRYPT_TIMEOUT):
+        self.workers = max(1, workers)
+        self.max_en_curso = max(self.workers, max_en_curso)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        self._cupos = threading.BoundedSemaphore(self.max_en_curso)
+        self._lock = threading.Lock()
+        self._stats = {'ejecutados': 0, 'rechazados': 0, 'vencidos': 0}
+
+    def enviar(self, fn: Callable[..., Any], *args):
+        """Encola `fn(*args)` y devuelve el Future; PoolSaturado si no hay cupo."""
+        if not self._cupos.acquire(blocking=False):
+            with self._lock:
+                self._stats['rechazados'] += 1
+            raise PoolSaturado()
+        try:
+            futuro = self._executor.submit(fn, *args)
+        except BaseException:
+            self._cupos.release()
+            raise
+        futuro.add_done_callback(self._liberar)
+        return futuro
+
+    def _liberar(self, _futuro) -> None:
+        self._cupos.release()
+        with self._lock:
+            self._stats['ejecutados'] += 1
+
+    def ejecutar(self, fn: Callable[..., Any], *args) -> Any:
+        """Ejecuta `fn(*args)` en el pool y espera el resultado."""
+        futuro = self.enviar(fn, *args)
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FuturesTimeout:
+            # Sigue corriendo y libera su cupo al terminar
+            with self._lock:
+                self._stats['vencidos'] += 1
+            raise PoolSaturado('Tiempo agotado verificando credenciales')
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+        data.update(workers=self.workers, max_en_curso=self.max_en_curso)
+        return data
+
+
+_pool: Optional[PasswordPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_password_pool() -> PasswordPool:
+    """Pool del proceso. Se vuelve a crear si el proceso es un fork (workers de
+    gunicorn): los hilos del executor no sobreviven al fork."""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = PasswordPool()
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def set_password_pool(pool: PasswordPool) -> None:
+    """Reemplaza el pool del proceso (p. ej. para benchmarks con otros tamaños)."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        _pool = pool
+        _pool_pid = os.getpid()
@@ -0,0 +1,139 @@
+"""
+Refresh tokens rotativos (migración 008).
+
+El login devuelve, además del JWT de acceso (JWT_EXP_HOURS), un refresh token
+opaco que dura REFRESH_TOKEN_DAYS días. `/api/auth/refresh` lo cambia por un
+JWT nuevo y un refresh token nuevo sin volver a pedir la contraseña: una
+búsqueda por PK (SHA-256 del token), un UPDATE, un INSERT y la firma HMAC del
+JWT; nada de bcrypt.
+
+- Rotación: cada refresh token sirve una sola vez.
+- Reutilización: si llega un token ya usado (alguien lo copió), se revoca toda
+  su familia y las dos partes tienen que volver a iniciar sesión.
+- Revocación: logout revoca la familia; cambiar la contraseña o borrar el
+  participante revoca todas las familias del correo, y un token cuyo login ya
+  no existe se rechaza (y revoca su familia).
+
+El token en claro no se guarda: como es aleatorio de 256 bits, alcanza con un
+SHA-256 (no hace falta un hash lento).
+"""
+import hashlib
+import os
+import secrets
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from src.config.database import run_in_transaction
+
+REFRESH_TOKEN_DAYS = int(os.getenv('REFRESH_TOKEN_DAYS', '14'))
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def emitir(cur, correo: str, user_type: str, user_id: Any, familia: Optional[str] = None) -> str:
+    """Crea un refresh token (nueva familia si no se indica) con el cursor dado y lo devuelve en claro."""
+    token = secrets.token_urlsafe(32)
+    cur.execute(
+        "INSERT INTO refresh_token (token_hash, familia, correo, user_type, user_id, expira) "
+        "VALUES (%s, %s, %s, %s, %s, DATE_ADD(NOW(), INTERVAL %s DAY))",
+        (_hash(token), familia or uuid.uuid4().hex, correo, user_type, user_id, REFRESH_TOKEN_DAYS)
+    )
+    return token
+
+
+def _revocar_familia(cur, familia: str) -> int:
+    return cur.execute(
+        "UPDATE refresh_token SET revocado = NOW() WHERE familia = %s AND revocado IS NULL",
+        (familia,)
+    )
+
+
+def rotar(token: str) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Cambia `token` por uno nuevo de la misma familia.
+
+    Devuelve (True, {'refresh_token', 'correo', 'user_type', 'user_id'}) o
+    (False, {'mensaje', 'reutilizado'}). Corre en su propia transacción, así la
+    revocación por reutilización queda confirmada aunque la respuesta sea 401.
+    """
+    def _rotar(conn):
+        with conn.cursor() as cur:
+            # La tabla no tiene FK a login: si el login se borró, la familia no sirve más
+            cur.execute(
+                "SELECT rt.familia, rt.correo, rt.user_type, rt.user_id, rt.usado, rt.revocado, "
+                "rt.expira > NOW() AS vigente, l.correo IS NOT NULL AS con_login "
+                "FROM refresh_token rt LEFT JOIN login l ON l.correo = rt.correo "
+                "WHERE rt.token_hash = %s FOR UPDATE OF rt",
+                (_hash(token),)
+            )
+            fila = cur.fetchone()
+            if not fila or fila['revocado'] is not None:
+                return False, {'mensaje': 'Refresh token inválido', 'reutilizado': False}
+            if not fila['con_login']:
+                _revocar_familia(cur, fila['familia'])
+                return False, {'mensaje': 'Refresh token inválido', 'reutilizado': False}
+            if fila['usado'] is not None:
+                _revocar_familia(cur, fila['familia'])
+                return False, {'mensaje': 'Refresh token reutilizado: sesión revocada', 'reutilizado': True}
+            if not fila['vigente']:
+                return False, {'mensaje': 'Refresh token vencido', 'reutilizado': False}
+
+            cur.execute("UPDATE refresh_token SET usado = NOW() WHERE token_hash = %s", (_hash(token),))
+            nuevo = emitir(cur, fila['correo'], fila['user_type'], fila['user_id'], fila['familia'])
+            return True, {
+                'refresh_token': nuevo,
+                'correo': fila['correo'],
+                'user_type': fila['user_type'],
+                'user_id': fila['user_id'],
+            }
+
+    if not token:
+        return False, {'mensaje': 'refresh_token requerido', 'reutilizado': False}
+    return run_in_transaction(_rotar, role='user')
+
+
+def revocar(token: str) -> bool:
+    """Revoca la familia de `token` (logout). Devuelve False si el token no existe."""
+    def _revocar(conn):
+        with conn.cursor() as cur:
+            cur.execute("SELECT familia FROM refresh_token WHERE token_hash = %s", (_hash(token),))
+            fila = cur.fetchone()
+            if not fila:
+                return False
+            _revocar_familia(cur, fila['familia'])
+            return True
+
+    if not token:
+        return False
+    return run_in_transaction(_revocar, role='user')
+
+
+def revocar_correo(cur, correo: str) -> int:
+    """Revoca todos los refresh tokens de `correo` (p. ej. al cambiar la contraseña)."""
+    return cur.execute(
+        "UPDATE refresh_token SET revocado = NOW() WHERE correo = %s AND revocado IS NULL",
+        (correo,)
+    )
+
+
+def purgar_vencidos(dias: int = 7, lote: int = 5000) -> int:
+    """Borra (rol admin) los tokens vencidos o revocados hace más de `dias` días, por lotes.
+
+    Los usados pero vigentes se conservan: hacen falta para detectar reutilización.
+    """
+    def _purgar(conn):
+        with conn.cursor() as cur:
+            return cur.execute(
+                "DELETE FROM refresh_token "
+                "WHERE expira < NOW() - INTERVAL %s DAY OR revocado < NOW() - INTERVAL %s DAY LIMIT %s",
+                (dias, dias, lote)
+            )
+
+    total = 0
+    while True:
+        borrados = run_in_transaction(_purgar, role='admin')
+        total += borrados
+        if borrados < lote:
+            return total
@@ -1,10 +1,19 @@
+import logging
 import os
+import random
+import time
+import threading
+from collections import deque
 import pymysql
+from pymysql.constants import SERVER_STATUS
 from dotenv import load_dotenv
-from typing import Any, Dict, List, Tuple, Optional
+from flask import g, has_request_context, current_app, jsonify
+from typing import Any, Callable, Dict, List, Tuple, Optional
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 def _env_or_raise(key: str) -> str:
     val = os.getenv(key)
     if val is None or val == "":
@@ -31,46 +40,638 @@ DB_USERS = {
     }
 }
 
+# Errores de MySQL que justifican reintentar la transacción completa
+ER_LOCK_DEADLOCK = 1213
+ER_LOCK_WAIT_TIMEOUT = 1205
+TX_RETRIES = int(os.getenv('DB_TX_RETRIES', '3'))
+
+# Parámetros del pool de conexiones (uno por rol)
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+POOL_PING = os.getenv('DB_POOL_PING', 'true').lower() in ('1', 'true', 'yes')
+
+# Réplicas de lectura para el rol 'readonly': "host[:puerto],host[:puerto]".
+# Vacío = todo va al primario (DB_HOST). Las escrituras siempre van al primario.
+DB_READONLY_HOSTS = os.getenv('DB_READONLY_HOSTS', '')
+# Segundos que una réplica que no respondió queda fuera de la rotación
+DB_REPLICA_RETRY = float(os.getenv('DB_REPLICA_RETRY', '30'))
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '5'))
+
+
+def _timeouts(prefijo: str, max_execution_ms: str, read_timeout: str) -> Dict[str, float]:
+    return {
+        'max_execution_ms': int(os.getenv(f'{prefijo}_MAX_EXECUTION_MS', max_execution_ms)),
+        'read_timeout': float(os.getenv(f'{prefijo}_READ_TIMEOUT', read_timeout)),
+    }
+
+
+# Topes por rol (0 = sin tope):
+# - max_execution_ms: MAX_EXECUTION_TIME de la sesión; MySQL corta los SELECT que lo superan
+# - read_timeout: segundos esperando respuesta del servidor antes de abandonar la conexión
+# Así un reporte desbocado (readonly) no retiene conexiones ni CPU que necesitan las reservas.
+ROLE_TIMEOUTS = {
+    'readonly': _timeouts('DB_READONLY', '30000', '60'),
+    'user': _timeouts('DB_APP', '0', '0'),
+    'admin': _timeouts('DB_ADMIN', '0', '0'),
+    'root': _timeouts('DB_ROOT', '0', '0'),
+}
+
 def get_db_config(role: str = 'user') -> Dict[str, Any]:
     """
     Obtiene la configuración de base de datos según el rol.
-    
+
     Args:
         role: 'readonly', 'user', 'admin', o 'root'
     """
     if role not in DB_USERS:
         raise ValueError(f"Rol de BD inválido: {role}. Usar: readonly, user, admin, root")
-    
+
     user_config = DB_USERS[role]
-    
-    return {
+    timeouts = ROLE_TIMEOUTS[role]
+
+    config = {
         'host': _env_or_raise('DB_HOST'),
-        'port': int(os.getenv('DB_PORT', '3306')), 
+        'port': int(os.getenv('DB_PORT', '3306')),
         'user': user_config['user'],
-        'password': user_config['password'],    
+        'password': user_config['password'],
         'database': _env_or_raise('DB_NAME'),
         'charset': 'utf8mb4',
         'cursorclass': pymysql.cursors.DictCursor,
+        'connect_timeout': DB_CONNECT_TIMEOUT,
     }
+    if timeouts['max_execution_ms'] > 0:
+        config['init_command'] = f"SET SESSION MAX_EXECUTION_TIME = {int(timeouts['max_execution_ms'])}"
+    if timeouts['read_timeout'] > 0:
+        config['read_timeout'] = timeouts['read_timeout']
+    return config
+
+
+def _parse_hosts(valor: str, puerto_default: int) -> List[Tuple[str, int]]:
+    """'h1:3307,h2' -> [('h1', 3307), ('h2', puerto_default)]."""
+    hosts = []
+    for item in valor.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, puerto = item.rpartition(':') if ':' in item else (item, '', '')
+        hosts.append((host, int(puerto) if puerto else puerto_default))
+    return hosts
+
+
+def get_replica_hosts(role: str) -> List[Tuple[str, int]]:
+    """Réplicas configuradas para el rol (solo 'readonly'); [] si va al primario."""
+    if role != 'readonly':
+        return []
+    return _parse_hosts(DB_READONLY_HOSTS, int(os.getenv('DB_PORT', '3306')))
+
+
+class HostRouter:
+    """Elige el servidor para cada conexión nueva de un pool.
+
+    - Rota entre las réplicas (round-robin).
+    - Una réplica que falla al conectar queda fuera `retry` segundos y se prueba la siguiente.
+    - Si no hay ninguna réplica disponible, conecta al primario.
+
+    `connect` es la función que abre la conexión (pymysql.connect); se puede
+    reemplazar por un driver falso para probar el ruteo sin servidores.
+    """
+
+    def __init__(self, config: Dict[str, Any], replicas: List[Tuple[str, int]],
+                 connect: Callable[..., Any] = None, retry: float = DB_REPLICA_RETRY):
+        self.config = config
+        self.primario = (config['host'], config['port'])
+        self.replicas = list(replicas)
+        self.retry = retry
+        self._connect = connect or pymysql.connect
+        self._lock = threading.Lock()
+        self._siguiente = 0
+        self._caida_hasta: Dict[Tuple[str, int], float] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _candidatas(self) -> List[Tuple[str, int]]:
+        """Réplicas disponibles, empezando por la que toca en la rotación."""
+        ahora = time.monotonic()
+        with self._lock:
+            inicio = self._siguiente
+            self._siguiente = (self._siguiente + 1) % max(1, len(self.replicas))
+            orden = self.replicas[inicio:] + self.replicas[:inicio]
+            return [h for h in orden if self._caida_hasta.get(h, 0) <= ahora]
+
+    def _contar(self, host: Tuple[str, int], evento: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(f"{host[0]}:{host[1]}", {'conexiones': 0, 'fallas': 0})
+            stats[evento] += 1
+
+    def connect(self):
+        for host in self._candidatas():
+            try:
+                raw = self._connect(**dict(self.config, host=host[0], port=host[1]))
+            except pymysql.err.OperationalError as e:
+                with self._lock:
+                    self._caida_hasta[host] = time.monotonic() + self.retry
+                self._contar(host, 'fallas')
+                logger.warning("Réplica %s:%s no disponible (%s); fuera de rotación %gs",
+                               host[0], host[1], e, self.retry)
+                continue
+            self._contar(host, 'conexiones')
+            return raw
+        raw = self._connect(**self.config)
+        self._contar(self.primario, 'conexiones')
+        return raw
+
+    def stats(self) -> Dict[str, Any]:
+        ahora = time.monotonic()
+        with self._lock:
+            data = {h: dict(v) for h, v in self._stats.items()}
+            for host in self.replicas:
+                clave = f"{host[0]}:{host[1]}"
+                data.setdefault(clave, {'conexiones': 0, 'fallas': 0})
+                data[clave]['fuera_de_rotacion'] = self._caida_hasta.get(host, 0) > ahora
+        return data
+
+
+class PoolTimeoutError(RuntimeError):
+    """Se agotó el tiempo de espera para obtener una conexión del pool."""
+
+
+class PooledConnection:
+    """Envoltorio de una conexión PyMySQL que vuelve al pool al cerrarse.
+
+    Delegamos todo en la conexión real, así el código existente que hace
+    `conn.cursor()`, `conn.commit()` y `conn.close()` sigue funcionando igual.
+    """
+
+    def __init__(self, pool: 'ConnectionPool', raw, created_at: float):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise pymysql.err.InterfaceError("La conexión ya fue devuelta al pool")
+        return getattr(raw, name)
+
+    def close(self):
+        """Devuelve la conexión al pool (no cierra el socket)."""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._checkin(raw, self._created_at)
+
+    def invalidate(self):
+        """Descarta la conexión: se cierra el socket y se libera su lugar en el pool."""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._discard(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # Red de seguridad: si alguien olvida cerrar la conexión, no perder el lugar en el pool.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones PyMySQL para un rol.
+
+    - checkout/checkin con tamaño máximo `max_size`
+    - ping de vida al hacer checkout (reconecta si la conexión murió)
+    - reciclado de conexiones más viejas que `recycle` segundos
+    - espera hasta `timeout` segundos cuando el pool está agotado y luego
+      lanza PoolTimeoutError
+    """
+
+    def __init__(self, role: str, factory: Callable[[], Any], max_size: int = POOL_SIZE,
+                 timeout: float = POOL_TIMEOUT, recycle: int = POOL_RECYCLE, ping: bool = POOL_PING):
+        self.role = role
+        self._factory = factory
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping = ping
+        self.router = None  # HostRouter si el rol usa réplicas
+        self._idle = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'creations': 0,
+            'recycled': 0,
+            'ping_failures': 0,
+            'timeouts': 0,
+        }
+
+    def _create(self):
+        try:
+            raw = self._factory()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['creations'] += 1
+        return raw, time.monotonic()
+
+    def _is_usable(self, raw, created_at: float) -> bool:
+        if self.recycle and (time.monotonic() - created_at) > self.recycle:
+            with self._cond:
+                self._stats['recycled'] += 1
+            return False
+        if self.ping:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                with self._cond:
+                    self._stats['ping_failures'] += 1
+                return False
+        return True
+
+    def connection(self) -> PooledConnection:
+        """Saca una conexión del pool (checkout)."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            raw = None
+            with self._cond:
+                waited = False
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"Pool de conexiones '{self.role}' agotado: {self.max_size} conexiones en uso "
+                            f"y ninguna liberada en {self.timeout:g}s"
+                        )
+                    if not waited:
+                        self._stats['waits'] += 1
+                        waited = True
+                    self._cond.wait(remaining)
+                if self._idle:
+                    raw, created_at = self._idle.pop()
+                else:
+                    self._size += 1
+
+            if raw is None:
+                raw, created_at = self._create()
+            elif not self._is_usable(raw, created_at):
+                self._discard(raw)
+                continue
+
+            with self._cond:
+                self._stats['checkouts'] += 1
+            return PooledConnection(self, raw, created_at)
+
+    def _checkin(self, raw, created_at: float):
+        try:
+            # No devolver conexiones con una transacción abierta: el próximo
+            # usuario vería un snapshot viejo o heredaría cambios sin confirmar.
+            if raw.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+        with self._cond:
+            self._idle.append((raw, created_at))
+            self._cond.notify()
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def dispose(self):
+        """Cierra todas las conexiones ociosas (p. ej. después de un fork)."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for raw, _ in idle:
+            try:
+                raw.close()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            data = dict(self._stats)
+            data['size'] = self._size
+            data['idle'] = len(self._idle)
+            data['in_use'] = self._size - len(self._idle)
+            data['max_size'] = self.max_size
+        return data
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(role: str = 'user') -> ConnectionPool:
+    """Devuelve (creándolo si hace falta) el pool del rol indicado."""
+    pool = _pools.get(role)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(role)
+        if pool is None:
+            cfg = get_db_config(role)
+            replicas = get_replica_hosts(role)
+            if replicas:
+                router = HostRouter(cfg, replicas)
+                pool = ConnectionPool(role, router.connect)
+                pool.router = router
+            else:
+                pool = ConnectionPool(role, lambda: pymysql.connect(**cfg))
+            _pools[role] = pool
+    return pool
+
 
+def reset_pools_after_fork() -> None:
+    """Olvida los pools heredados del proceso padre (llamar en el hijo después de un fork).
 
-def get_connection(role: str = 'user'):
+    No cierra las conexiones: el socket es compartido con el padre y un
+    COM_QUIT desde el hijo se la cortaría. Los locks también se recrean, por si
+    algún hilo del padre los tenía tomados al momento del fork.
     """
-    Crea una conexión con el usuario MySQL apropiado.
-    
+    global _pools, _pools_lock
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+
+def warmup_pools(roles: List[str], per_role: int = 1) -> Dict[str, int]:
+    """Abre `per_role` conexiones (hasta el tamaño del pool) de cada rol y las deja ociosas.
+
+    Así el primer request de un worker no paga el connect/handshake. Un rol que
+    no conecta se registra y se saltea. Devuelve cuántas quedaron abiertas por rol.
+    """
+    abiertas = {}
+    for role in roles:
+        pool = get_pool(role)
+        conns = []
+        try:
+            for _ in range(min(per_role, pool.max_size)):
+                conns.append(pool.connection())
+        except Exception as e:
+            logger.warning("No se pudo precalentar el pool '%s': %s", role, e)
+        finally:
+            for conn in conns:
+                conn.close()
+        abiertas[role] = len(conns)
+    return abiertas
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """Contadores de todos los pools creados (checkouts, waits, creations, ...)
+    y, si el rol usa réplicas, las conexiones y fallas por servidor."""
+    stats = {}
+    for role, pool in list(_pools.items()):
+        stats[role] = pool.stats()
+        if pool.router is not None:
+            stats[role]['hosts'] = pool.router.stats()
+    return stats
+
+
+# Roles con los que se escribe: dentro de un request comparten una sola conexión
+ROLES_ESCRITURA = ('user', 'admin')
+
+
+class RequestConnection:
+    """Conexión compartida por todo un request (unidad de trabajo).
+
+    - `commit()` no confirma todavía: la confirmación es una sola, al final del request.
+    - `rollback()` deshace y marca el request para que no se confirme nada.
+    - `close()` no hace nada: la conexión vuelve al pool al terminar el request.
+    """
+
+    def __init__(self, conn: PooledConnection, uow: Dict[str, Any], role: str):
+        self._conn = conn
+        self._uow = uow
+        self.role = role
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._uow['rollback_only'] = True
+        self._conn.rollback()
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+def _unit_of_work() -> Optional[Dict[str, Any]]:
+    """Devuelve la unidad de trabajo del request actual (o None fuera de un request)."""
+    if not has_request_context() or not current_app.extensions.get('db_unit_of_work'):
+        return None
+    uow = g.get('_db_uow')
+    if uow is None:
+        uow = {'conns': {}, 'rollback_only': False, 'on_commit': []}
+        g._db_uow = uow
+    return uow
+
+
+def on_commit(callback: Callable[[], Any]) -> None:
+    """
+    Ejecuta `callback` cuando se confirme la transacción del request actual
+    (y lo descarta si el request termina en rollback). Fuera de un request, o si
+    el request todavía no abrió ninguna conexión, se ejecuta en el momento.
+    """
+    uow = _unit_of_work()
+    if uow is None or not uow['conns']:
+        callback()
+        return
+    uow['on_commit'].append(callback)
+
+
+def _rol_de_escritura(uow: Dict[str, Any], role: str) -> str:
+    """Rol de la conexión de escritura del request: admin si lo pide el código,
+    si se fijó con `usar_rol_escritura` o si quien llama es administrador."""
+    if role == 'admin' or uow.get('rol_escritura') == 'admin' or g.get('user_type') == 'admin':
+        return 'admin'
+    return 'user'
+
+
+def usar_rol_escritura(role: str) -> None:
+    """
+    Fija el rol de la conexión de escritura del request actual. Llamarlo antes
+    de la primera escritura en requests que, con un usuario no administrador,
+    escriben con 'user' y después necesitan 'admin' (p. ej. un DELETE).
+    """
+    uow = _unit_of_work()
+    if uow is None:
+        return
+    conn = uow['conns'].get('escritura')
+    if conn is not None and role == 'admin' and conn.role != 'admin':
+        raise RuntimeError("La conexión de escritura del request ya se abrió con el rol 'user'")
+    uow['rol_escritura'] = role
+
+
+def get_connection(role: str = 'user', request_scoped: bool = True):
+    """
+    Obtiene una conexión del pool con el usuario MySQL apropiado.
+    Llamar a `close()` la devuelve al pool.
+
+    Dentro de un request de Flask (con `init_app` registrado) todas las
+    escrituras ('user' y 'admin') comparten una única conexión, así que el
+    request es una sola transacción que se confirma o deshace entera al final.
+    Esa conexión usa el rol admin si quien llama es administrador (o si el
+    código pide 'admin' antes de escribir con 'user'); si no, user. Pedir
+    'admin' cuando ya se escribió con 'user' es un error: ver
+    `usar_rol_escritura`. 'readonly' usa su propia conexión (no ve lo escrito
+    en el request hasta el commit).
+
+    `request_scoped=False` fuerza una conexión propia con su propia transacción
+    (jobs por lotes, reintentos por deadlock, streaming).
+
     Args:
-        role: 'readonly' (solo SELECT), 'user' (SELECT/INSERT/UPDATE), 
+        role: 'readonly' (solo SELECT), 'user' (SELECT/INSERT/UPDATE),
               'admin' (todo incluyendo DELETE)
+        request_scoped: reutilizar la conexión del request si existe
+    """
+    if request_scoped:
+        uow = _unit_of_work()
+        if uow is not None:
+            clave = 'escritura' if role in ROLES_ESCRITURA else role
+            conn = uow['conns'].get(clave)
+            if conn is None:
+                rol_real = _rol_de_escritura(uow, role) if clave == 'escritura' else role
+                conn = RequestConnection(get_pool(rol_real).connection(), uow, rol_real)
+                uow['conns'][clave] = conn
+            elif clave == 'escritura' and role == 'admin' and conn.role != 'admin':
+                raise RuntimeError(
+                    "Se pidió el rol 'admin' después de escribir con 'user' en el mismo request: "
+                    "serían dos transacciones. Llamar a usar_rol_escritura('admin') al comienzo."
+                )
+            return conn
+    return get_pool(role).connection()
+
+
+def _finish_unit_of_work(commit: bool) -> None:
+    """Confirma (o deshace) y libera las conexiones del request actual.
+
+    Todas las escrituras están en la conexión 'escritura', así que hay un solo
+    commit que importa; la de readonly solo cierra su snapshot.
+    """
+    uow = g.pop('_db_uow', None)
+    if not uow:
+        return
+    conns = list(uow['conns'].values())
+    commit = commit and not uow['rollback_only']
+    error = None
+    for req_conn in conns:
+        conn = req_conn._conn
+        try:
+            if commit and error is None:
+                conn.commit()
+            else:
+                conn.rollback()
+        except Exception as e:
+            if error is None:
+                error = e
+            conn.invalidate()
+            continue
+        conn.close()
+    if error is not None:
+        raise error
+    if commit:
+        for callback in uow['on_commit']:
+            try:
+                callback()
+            except Exception as e:
+                current_app.logger.exception(e)
+
+
+def init_app(app) -> None:
+    """Registra la unidad de trabajo por request en la app Flask.
+
+    El commit se hace en `after_request` para poder responder 500 si falla;
+    las respuestas con status >= 400 se deshacen. `teardown_request` libera
+    lo que haya quedado abierto (por ejemplo si hubo una excepción no manejada).
     """
-    cfg = get_db_config(role)
-    conn = pymysql.connect(**cfg)
-    return conn
+    app.extensions['db_unit_of_work'] = True
+
+    @app.after_request
+    def _db_commit_request(response):
+        try:
+            _finish_unit_of_work(commit=response.status_code < 400)
+        except Exception as e:
+            app.logger.exception(e)
+            response = jsonify({'error': 'Error interno', 'detalle': 'No se pudo confirmar la transacción'})
+            response.status_code = 500
+        return response
+
+    @app.teardown_request
+    def _db_release_request(exc):
+        try:
+            _finish_unit_of_work(commit=False)
+        except Exception as e:
+            app.logger.exception(e)
+
+
+def run_in_transaction(fn: Callable[[Any], Any], role: str = 'user', retries: int = TX_RETRIES,
+                       backoff: float = 0.05) -> Any:
+    """
+    Ejecuta `fn(conn)` en una transacción propia (fuera de la unidad de trabajo
+    del request) y la confirma. Si MySQL aborta por deadlock o por timeout de
+    lock, deshace y vuelve a ejecutar `fn` desde cero, hasta `retries` veces
+    con espera exponencial. Cualquier otra excepción deshace y se propaga.
+
+    `fn` tiene que poder repetirse: todo lo que lea o escriba debe hacerlo
+    con la conexión que recibe.
+    """
+    intento = 0
+    while True:
+        conn = get_connection(role, request_scoped=False)
+        try:
+            result = fn(conn)
+            conn.commit()
+            return result
+        except pymysql.err.OperationalError as e:
+            _rollback_quietly(conn)
+            codigo = e.args[0] if e.args else None
+            if codigo not in (ER_LOCK_DEADLOCK, ER_LOCK_WAIT_TIMEOUT) or intento >= retries:
+                raise
+            intento += 1
+            time.sleep(backoff * (2 ** (intento - 1)) * (1 + random.random()))
+        except BaseException:
+            _rollback_quietly(conn)
+            raise
+        finally:
+            conn.close()
+
+
+def _rollback_quietly(conn) -> None:
+    try:
+        conn.rollback()
+    except Exception:
+        conn.invalidate()
 
 
 def execute_query(query: str, params: Optional[Tuple] = None, role: str = 'readonly') -> List[Dict[str, Any]]:
     """
     Ejecuta una query de lectura y devuelve filas como dicts.
-    
+
     Args:
         query: SQL query
         params: Parámetros para la query
@@ -89,7 +690,7 @@ def execute_query(query: str, params: Optional[Tuple] = None, role: str = 'reado
 def execute_non_query(query: str, params: Optional[Tuple] = None, role: str = 'user') -> int:
     """
     Ejecuta INSERT/UPDATE/DELETE y devuelve el número de filas afectadas.
-    
+
     Args:
         query: SQL query
         params: Parámetros para la query
@@ -103,5 +704,3 @@ def execute_non_query(query: str, params: Optional[Tuple] = None, role: str = 'u
         return affected
     finally:
         conn.close()
-
-
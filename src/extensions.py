@@ -1,5 +1,75 @@
+import os
+
+from flask import request
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+# Registra el esquema sqlite:// en `limits`
+import src.utils.ratelimit_storage  # noqa: F401
+
+# Dónde se cuentan los pedidos:
+# - memory:// (default): por proceso; con varios workers cada uno cuenta por separado
+# - redis://host:6379/1: compartido entre procesos y máquinas
+# - sqlite:///tmp/ratelimit.db: compartido entre los procesos de una máquina (o para pruebas)
+RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI', 'memory://')
+RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Límite por defecto de cada blueprint (por IP); los reportes tienen uno propio
+RATELIMIT_DEFAULT = os.getenv('RATELIMIT_DEFAULT', '300/minute')
+RATELIMIT_REPORTS = os.getenv('RATELIMIT_REPORTS', '60/minute')
+
+# Presupuesto de trabajo de BD/CPU por IP, compartido por todos los endpoints.
+# Un pedido común cuesta 1 unidad, un reporte RATELIMIT_REPORT_COST y un login
+# (bcrypt) RATELIMIT_BCRYPT_COST: se duplica con cada punto de costo de bcrypt.
+RATELIMIT_DB_BUDGET = os.getenv('RATELIMIT_DB_BUDGET', '600/minute')
+RATELIMIT_REPORT_COST = int(os.getenv('RATELIMIT_REPORT_COST', '10'))
+RATELIMIT_BCRYPT_COST = int(os.getenv(
+    'RATELIMIT_BCRYPT_COST', str(2 ** max(0, int(os.getenv('BCRYPT_ROUNDS', '12')) - 8))
+))
+ALCANCE_BD = 'bd'
+
+# Marca de los requests sintéticos (jobs y dashboard de reportes): el pedido
+# original ya pagó su costo, así que no vuelven a contar
+PEDIDO_INTERNO = 'app.pedido_interno'
+
 # Limiter instance: init_app(app) in app.create_app()
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATELIMIT_STORAGE_URI,
+    strategy='fixed-window',
+    headers_enabled=True,
+    swallow_errors=True,
+    in_memory_fallback_enabled=True,
+    enabled=RATELIMIT_ENABLED,
+)
+
+
+@limiter.request_filter
+def _exento() -> bool:
+    # Preflight CORS y requests internos no cuentan
+    return request.method == 'OPTIONS' or bool(request.environ.get(PEDIDO_INTERNO))
+
+
+def presupuesto_bd(cost=1):
+    """Descuenta `cost` unidades (int o callable) del presupuesto de BD del cliente."""
+    return limiter.shared_limit(RATELIMIT_DB_BUDGET, scope=ALCANCE_BD, cost=cost)
+
+
+_blueprints_limitados = set()
+
+
+def limitar_blueprints(app) -> None:
+    """Límites por defecto de cada blueprint registrado (más el presupuesto de BD).
+
+    Las rutas con límites propios (login, register, dashboard, ...) los reemplazan.
+    """
+    for nombre, bp in app.blueprints.items():
+        if nombre in _blueprints_limitados:
+            continue
+        _blueprints_limitados.add(nombre)
+        if nombre == 'reports_bp':
+            limiter.limit(RATELIMIT_REPORTS)(bp)
+            presupuesto_bd(RATELIMIT_REPORT_COST)(bp)
+        else:
+            limiter.limit(RATELIMIT_DEFAULT)(bp)
+            presupuesto_bd(1)(bp)
@@ -0,0 +1,39 @@
+"""
+Checkpoints de procesos por lotes (tabla proceso_checkpoint, migración 004).
+
+Cada proceso guarda, por fecha, hasta qué id confirmó y si la fecha quedó
+completa. Las funciones que reciben `cursor` escriben dentro de la
+transacción del lote, así el checkpoint avanza junto con los datos.
+"""
+from src.config.database import execute_query
+
+
+def obtener_checkpoint(cursor, proceso: str, fecha):
+    """Checkpoint de (proceso, fecha) o None si esa fecha nunca se procesó."""
+    cursor.execute("""
+        SELECT ultimo_id, completado, procesadas
+        FROM proceso_checkpoint
+        WHERE proceso = %s AND fecha = %s
+    """, (proceso, fecha))
+    return cursor.fetchone()
+
+
+def guardar_checkpoint(cursor, proceso: str, fecha, ultimo_id: int, procesadas: int, completado: bool = False):
+    """Avanza el checkpoint de (proceso, fecha); `procesadas` se acumula."""
+    cursor.execute("""
+        INSERT INTO proceso_checkpoint (proceso, fecha, ultimo_id, completado, procesadas)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            ultimo_id = VALUES(ultimo_id),
+            completado = VALUES(completado),
+            procesadas = procesadas + VALUES(procesadas)
+    """, (proceso, fecha, ultimo_id, completado, procesadas))
+
+
+def ultima_fecha_completada(proceso: str):
+    """Marca de agua alta: la fecha más reciente que el proceso terminó (o None)."""
+    filas = execute_query("""
+        SELECT MAX(fecha) AS fecha FROM proceso_checkpoint
+        WHERE proceso = %s AND completado = true
+    """, (proceso,), role='readonly')
+    return filas[0]['fecha'] if filas else None
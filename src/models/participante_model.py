@@ -1,5 +1,10 @@
 from typing import Any, Dict, List, Optional
-from src.config.database import execute_query, execute_non_query, get_connection
+from src.config.database import execute_query, execute_non_query, get_connection, on_commit
+from src.auth.refresh_tokens import revocar_correo
+from src.models.rol_efectivo_model import invalidar_roles, recalcular_roles
+from src.models.sql_utils import placeholders
+from src.models.uso_diario_model import refrescar_reservas
+from src.utils.report_cache import invalidar_reportes
 import pymysql
 import re
 
@@ -75,7 +80,7 @@ def create_participante(ci: int, nombre: str, apellido: str, email: str,
             else:
                 raise ValueError("tipo_participante inválido: debe ser 'alumno', 'postgrado' o 'docente' (ej. 'Estudiante'/'Postgrado'/'Docente').")
 
-            # add_program_to_participante usa execute_non_query internamente
+            # add_program_to_participante recalcula el rol efectivo
             # y validará que el programa exista.
             add_program_to_participante(ci, programa_academico, tipo_db)
 
@@ -89,15 +94,20 @@ def create_participante(ci: int, nombre: str, apellido: str, email: str,
         raise
 
 
-def get_participante_by_ci(ci: int) -> Optional[Dict[str, Any]]:
-    """Obtiene un participante por CI, incluyendo TODOS sus programas y roles."""
+def get_participante_by_ci(ci: int, role: str = 'readonly') -> Optional[Dict[str, Any]]:
+    """Obtiene un participante por CI, incluyendo TODOS sus programas y roles.
+
+    Para releer lo que se acaba de escribir en el mismo request usar role='user':
+    la escritura todavía no se confirmó y solo la ve esa conexión (readonly
+    puede ser otra conexión o una réplica).
+    """
     # Primero obtener datos básicos del participante
     query_participante = """
         SELECT ci, nombre, apellido, email
         FROM participante
         WHERE ci = %s
     """
-    rows = execute_query(query_participante, (ci,), role='readonly')
+    rows = execute_query(query_participante, (ci,), role=role)
     if not rows:
         return None
     
@@ -110,7 +120,7 @@ def get_participante_by_ci(ci: int) -> Optional[Dict[str, Any]]:
         WHERE ci_participante = %s
         ORDER BY nombre_programa, rol
     """
-    programas_rows = execute_query(query_programas, (ci,), role='readonly')
+    programas_rows = execute_query(query_programas, (ci,), role=role)
     
     # Construir array de programas con roles normalizados
     programas = []
@@ -208,8 +218,12 @@ def get_participante_by_email(email: str) -> Optional[Dict[str, Any]]:
     return result
 
 
-def list_participantes(limit: Optional[int] = None, offset: Optional[int] = None) -> List[Dict[str, Any]]:
-    """Lista todos los participantes con paginación opcional, incluyendo TODOS sus programas y roles."""
+def list_participantes(limit: Optional[int] = None, offset: Optional[int] = None,
+                       after_ci: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Lista todos los participantes con paginación opcional, incluyendo TODOS sus programas y roles.
+
+    Ordenados por CI; `after_ci` pagina por cursor (solo CI mayores), sin OFFSET.
+    """
     # Primero obtener todos los participantes
     query_participantes = """
         SELECT ci, nombre, apellido, email
@@ -217,6 +231,11 @@ def list_participantes(limit: Optional[int] = None, offset: Optional[int] = None
     """
     params = []
     
+    if after_ci is not None:
+        query_participantes += " WHERE ci > %s"
+        params.append(after_ci)
+    query_participantes += " ORDER BY ci"
+    
     if limit is not None:
         query_participantes += " LIMIT %s"
         params.append(limit)
@@ -231,11 +250,10 @@ def list_participantes(limit: Optional[int] = None, offset: Optional[int] = None
     
     # Obtener todos los programas de una vez
     cis = [row['ci'] for row in rows]
-    placeholders = ','.join(['%s'] * len(cis))
     query_programas = f"""
         SELECT ci_participante, nombre_programa, rol
         FROM participante_programa_academico
-        WHERE ci_participante IN ({placeholders})
+        WHERE ci_participante IN ({placeholders(cis)})
         ORDER BY ci_participante, nombre_programa, rol
     """
     programas_rows = execute_query(query_programas, tuple(cis), role='readonly')
@@ -375,7 +393,15 @@ def update_participante(ci: int, nombre: Optional[str] = None,
                     raise ValueError(f"Programa académico no encontrado: {new_program}")
 
                 query_up = "UPDATE participante_programa_academico SET nombre_programa = %s, rol = %s WHERE ci_participante = %s"
-                program_ops = execute_non_query(query_up, (new_program, new_role, ci), role='user')
+                conn = get_connection('user')
+                try:
+                    with conn.cursor() as cur:
+                        program_ops = cur.execute(query_up, (new_program, new_role, ci))
+                        if program_ops:
+                            recalcular_roles(cur, [ci])
+                        conn.commit()
+                finally:
+                    conn.close()
             else:
                 if not programa_academico or not role_db:
                     raise ValueError("Para asociar un programa se requieren 'programa_academico' y 'tipo_participante'.")
@@ -402,6 +428,7 @@ def delete_participante(ci: int, force: bool = False) -> int:
 
     Si force == True, realiza un borrado en cascada a nivel de aplicación:
     - elimina filas en reserva_participante, sancion_participante, participante_programa_academico
+      (y recalcula uso_diario de las reservas afectadas)
     - elimina login asociado (por correo)
     - elimina el participante
 
@@ -453,8 +480,13 @@ def delete_participante(ci: int, force: bool = False) -> int:
                     return 0
                 email = row.get('email')
 
+                # Reservas afectadas: cambian sus participantes/asistentes en uso_diario
+                cur.execute("SELECT DISTINCT id_reserva FROM reserva_participante WHERE ci_participante = %s", (ci,))
+                ids_reserva = [f['id_reserva'] for f in cur.fetchall()]
+
                 # Borrar reservas asociadas (si existen)
                 cur.execute("DELETE rp FROM reserva_participante rp WHERE rp.ci_participante = %s", (ci,))
+                refrescar_reservas(cur, ids_reserva)
 
                 # Borrar sanciones del participante
                 cur.execute("DELETE FROM sancion_participante WHERE ci_participante = %s", (ci,))
@@ -465,10 +497,14 @@ def delete_participante(ci: int, force: bool = False) -> int:
                 # Borrar login asociado (por correo) si existe
                 if email:
                     cur.execute("DELETE FROM login WHERE correo = %s", (email,))
+                    # Sus refresh tokens no deben seguir emitiendo JWT
+                    revocar_correo(cur, email)
 
                 # Finalmente, borrar participante
                 affected = cur.execute("DELETE FROM participante WHERE ci=%s", (ci,))
                 conn.commit()
+                on_commit(lambda: invalidar_roles([ci]))
+                invalidar_reportes('reservas', 'sanciones')
                 return affected
     finally:
         conn.close()
@@ -552,6 +588,7 @@ def add_program_to_participante(ci: int, nombre_programa: str, rol: str) -> int:
     - Valida que `rol` sea 'alumno', 'docente' o 'postgrado'.
     - La nueva PK es (ci_participante, nombre_programa, rol), permitiendo múltiples combinaciones.
     - Si la combinación ya existe, NO hace nada (INSERT IGNORE).
+    - Recalcula `participante.rol_efectivo` en la misma transacción.
     """
     if not nombre_programa or not nombre_programa.strip():
         raise ValueError("nombre_programa es requerido para asociar un programa")
@@ -574,4 +611,13 @@ def add_program_to_participante(ci: int, nombre_programa: str, rol: str) -> int:
         "INSERT IGNORE INTO participante_programa_academico (ci_participante, nombre_programa, rol) "
         "VALUES (%s, %s, %s)"
     )
-    return execute_non_query(query, (ci, nombre_programa, rol_norm), role='user')
+    conn = get_connection('user')
+    try:
+        with conn.cursor() as cur:
+            affected = cur.execute(query, (ci, nombre_programa, rol_norm))
+            if affected:
+                recalcular_roles(cur, [ci])
+            conn.commit()
+        return affected
+    finally:
+        conn.close()
@@ -0,0 +1,140 @@
+"""
+Carga en lote de los datos que necesitan las reglas de negocio de reservas.
+
+En lugar de consultar sanciones, roles, horas diarias y reservas semanales
+participante por participante (y fecha por fecha), se traen para todos los CI
+y fechas de la solicitud con unas pocas consultas `IN (...)` / `GROUP BY`, y las
+reglas se evalúan en memoria con `ContextoReglas`.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.models.rol_efectivo_model import roles_efectivos
+from src.models.sql_utils import clave_ci, placeholders
+
+LIMITE_HORAS_DIARIAS = 2
+LIMITE_RESERVAS_SEMANALES = 3
+
+# Consultas de `cargar_contexto` ({cis}/{fechas}: placeholders de los IN); las
+# importa scripts/explain_hot_queries.py para revisar sus planes
+_SELECT_SANCIONADOS = """
+    SELECT DISTINCT ci_participante
+    FROM sancion_participante
+    WHERE ci_participante IN ({cis})
+      AND fecha_inicio <= CURDATE()
+      AND fecha_fin >= CURDATE()
+"""
+
+# Horas ya reservadas por participante y fecha (solo salas libres; tipo_sala es un
+# enum NOT NULL, así que se compara directo y puede usar idx_sala_tipo)
+_SELECT_HORAS_DIARIAS = """
+    SELECT rp.ci_participante, r.fecha,
+           COALESCE(SUM(TIMESTAMPDIFF(HOUR, t.hora_inicio, t.hora_fin)),0) AS horas_reservadas
+    FROM reserva_participante rp
+    JOIN reserva r ON rp.id_reserva = r.id_reserva
+    JOIN turno t ON r.id_turno = t.id_turno
+    JOIN sala s ON r.nombre_sala = s.nombre_sala AND r.edificio = s.edificio
+    WHERE rp.ci_participante IN ({cis})
+      AND r.fecha IN ({fechas})
+      AND r.estado = 'activa'
+      AND s.tipo_sala = 'libre'
+    GROUP BY rp.ci_participante, r.fecha
+"""
+
+# Reservas activas por participante y semana (lunes a domingo, solo salas libres)
+_SELECT_RESERVAS_SEMANALES = """
+    SELECT rp.ci_participante,
+           DATE_SUB(r.fecha, INTERVAL WEEKDAY(r.fecha) DAY) AS semana,
+           COUNT(DISTINCT r.id_reserva) AS cantidad
+    FROM reserva_participante rp
+    JOIN reserva r ON rp.id_reserva = r.id_reserva
+    JOIN sala s ON r.nombre_sala = s.nombre_sala AND r.edificio = s.edificio
+    WHERE rp.ci_participante IN ({cis})
+      AND r.fecha BETWEEN %s AND %s
+      AND r.estado = 'activa'
+      AND s.tipo_sala = 'libre'
+    GROUP BY rp.ci_participante, semana
+"""
+
+
+def inicio_semana(fecha) -> str:
+    """Lunes de la semana de `fecha` ('YYYY-MM-DD' o date) como 'YYYY-MM-DD'."""
+    if isinstance(fecha, str):
+        fecha = datetime.strptime(fecha, '%Y-%m-%d').date()
+    return (fecha - timedelta(days=fecha.weekday())).strftime('%Y-%m-%d')
+
+
+def es_exento(rol: Optional[str], tipo_sala: str) -> bool:
+    """Docentes en salas docentes y posgrados en salas de posgrado no tienen límites."""
+    return (rol == 'docente' and tipo_sala == 'docente') or (rol == 'postgrado' and tipo_sala == 'posgrado')
+
+
+class ContextoReglas:
+    """Datos precargados para evaluar las reglas de un grupo de participantes."""
+
+    def __init__(self):
+        self.sancionados: Set[Any] = set()
+        self.roles: Dict[Any, str] = {}
+        self.horas: Dict[Tuple[Any, str], int] = {}
+        self.semanales: Dict[Tuple[Any, str], int] = {}
+
+    def tiene_sancion(self, ci) -> bool:
+        return clave_ci(ci) in self.sancionados
+
+    def rol(self, ci) -> Optional[str]:
+        """Rol efectivo o None si el participante no tiene programa académico asignado."""
+        return self.roles.get(clave_ci(ci))
+
+    def horas_reservadas(self, ci, fecha: str) -> int:
+        return self.horas.get((clave_ci(ci), fecha), 0)
+
+    def reservas_semana(self, ci, semana: str) -> int:
+        return self.semanales.get((clave_ci(ci), semana), 0)
+
+    def registrar(self, ci, fecha: str, cantidad: int) -> None:
+        """Suma turnos aceptados (aún sin insertar) para validar el resto de un lote."""
+        self.horas[(clave_ci(ci), fecha)] = self.horas_reservadas(ci, fecha) + cantidad
+        semana = inicio_semana(fecha)
+        self.semanales[(clave_ci(ci), semana)] = self.reservas_semana(ci, semana) + cantidad
+
+
+def cargar_contexto(cursor, participantes: List[Any], fechas: Iterable[str],
+                    con_sanciones: bool = True) -> ContextoReglas:
+    """Carga sanciones vigentes, roles, horas diarias y reservas semanales de todos
+    los participantes para todas las fechas pedidas (a lo sumo 5 consultas; los
+    roles suelen salir del cache de `rol_efectivo_model`).
+
+    Los CI se normalizan a int para que coincidan con lo que devuelve la BD.
+    """
+    ctx = ContextoReglas()
+    cis = list(dict.fromkeys(clave_ci(ci) for ci in participantes))
+    if not cis:
+        return ctx
+    fechas = sorted(set(fechas))
+    ph = placeholders(cis)
+
+    if con_sanciones:
+        cursor.execute(_SELECT_SANCIONADOS.format(cis=ph), tuple(cis))
+        ctx.sancionados = {clave_ci(f['ci_participante']) for f in cursor.fetchall()}
+
+    # Rol efectivo materializado (migración 007), desde el cache por CI
+    ctx.roles = {ci: rol for ci, rol in roles_efectivos(cursor, cis).items() if rol is not None}
+
+    if not fechas:
+        return ctx
+
+    cursor.execute(_SELECT_HORAS_DIARIAS.format(cis=ph, fechas=placeholders(fechas)),
+                   tuple(cis) + tuple(fechas))
+    for f in cursor.fetchall():
+        ctx.horas[(clave_ci(f['ci_participante']), f['fecha'].strftime('%Y-%m-%d'))] = int(f['horas_reservadas'] or 0)
+
+    semanas = sorted({inicio_semana(f) for f in fechas})
+    desde = semanas[0]
+    hasta = (datetime.strptime(semanas[-1], '%Y-%m-%d').date() + timedelta(days=6)).strftime('%Y-%m-%d')
+    cursor.execute(_SELECT_RESERVAS_SEMANALES.format(cis=ph), tuple(cis) + (desde, hasta))
+    for f in cursor.fetchall():
+        semana = f['semana']
+        semana = semana.strftime('%Y-%m-%d') if hasattr(semana, 'strftime') else str(semana)
+        ctx.semanales[(clave_ci(f['ci_participante']), semana)] = int(f['cantidad'] or 0)
+
+    return ctx
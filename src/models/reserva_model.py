@@ -1,32 +1,34 @@
+from collections import defaultdict
 from datetime import datetime, timedelta
-from src.config.database import get_connection
+import pymysql
+from pymysql.constants.ER import DUP_ENTRY as ER_DUP_ENTRY
+from src.config.database import get_connection, run_in_transaction
+from src.models.reglas_reserva import (
+    LIMITE_HORAS_DIARIAS,
+    LIMITE_RESERVAS_SEMANALES,
+    cargar_contexto,
+    es_exento,
+    inicio_semana,
+)
+from src.models.sql_utils import placeholders
+from src.models.turno_cache import obtener_turno
+from src.models.uso_diario_model import refrescar_reservas, refrescar_turnos, turnos_de_reservas
+from src.utils.export import iterar_consulta
+from src.utils.pagination import pagina
+from src.utils.report_cache import invalidar_reportes
 
 
 def validar_reglas_negocio(datos):
     """
     Verifica las reglas de negocio antes de crear una reserva.
-    """
-    nombre_sala = datos['nombre_sala']
-    edificio = datos['edificio']
-    participantes = datos['participantes'] 
-    fecha = datos['fecha']
-    id_turno = datos['id_turno']
-
-    conexion = get_connection(role='readonly')
-    cursor = conexion.cursor()
-
-    cursor.execute("SELECT capacidad, tipo_sala FROM sala WHERE nombre_sala=%s AND edificio=%s", (nombre_sala, edificio))
-    sala = cursor.fetchone()
-    if not sala:
-        return False, "La sala no existe."
-
-    if len(participantes) > sala['capacidad']:
-        return False, f"La sala solo permite {sala['capacidad']} participantes."
 
-    tipo_sala = sala['tipo_sala']
-    # Normalizar tipo_sala por seguridad
+    Sanciones, roles, horas diarias y reservas semanales se cargan para todos los
+    participantes y fechas de una vez (ver `reglas_reserva.cargar_contexto`) y las
+    reglas se evalúan en memoria, en el mismo orden que antes.
+    """
+    conexion = None
+    cursor = None
     try:
-        tipo_sala = (tipo_sala or '').strip().lower()
         nombre_sala = datos['nombre_sala']
         edificio = datos['edificio']
         participantes = datos['participantes']
@@ -60,7 +62,6 @@ def validar_reglas_negocio(datos):
                 # ignore invalid dates - validation of date format should be handled earlier
                 pass
 
-        # open readonly connection
         conexion = get_connection(role='readonly')
         cursor = conexion.cursor()
 
@@ -68,164 +69,69 @@ def validar_reglas_negocio(datos):
         cursor.execute("SELECT capacidad, tipo_sala FROM sala WHERE nombre_sala=%s AND edificio=%s", (nombre_sala, edificio))
         sala = cursor.fetchone()
         if not sala:
-            cursor.close(); conexion.close()
             return False, "La sala no existe."
 
         if len(participantes) > sala.get('capacidad', 0):
-            cursor.close(); conexion.close()
             return False, f"La sala solo permite {sala.get('capacidad')} participantes."
 
         tipo_sala = (sala.get('tipo_sala') or '').strip().lower()
 
         # Check turno existence if a single id_turno provided (retrocompat)
-        if 'id_turno' in datos:
-            try:
-                cursor.execute("SELECT 1 FROM turno WHERE id_turno = %s LIMIT 1", (datos.get('id_turno'),))
-                if not cursor.fetchone():
-                    cursor.close(); conexion.close()
-                    return False, "Turno inválido."
-            except Exception:
-                # ignore and proceed; deeper validation elsewhere
-                pass
+        if 'id_turno' in datos and obtener_turno(datos.get('id_turno')) is None:
+            return False, "Turno inválido."
+
+        ctx = cargar_contexto(cursor, participantes, parsed_dates)
 
         # Sanctions check
         for ci in participantes:
-            cursor.execute("""
-                SELECT COUNT(*) AS cantidad
-                FROM sancion_participante
-                WHERE ci_participante = %s
-                  AND fecha_inicio <= CURDATE()
-                  AND fecha_fin >= CURDATE()
-            """, (ci,))
-            sanciones = cursor.fetchone()['cantidad']
-            if sanciones and sanciones > 0:
-                cursor.close(); conexion.close()
+            if ctx.tiene_sancion(ci):
                 return False, f"El participante {ci} tiene sanciones vigentes y no puede reservar."
 
-        # Gather roles per participant
-        roles_por_ci = {}
+        # Roles and exclusivity
         for ci in participantes:
-            cursor.execute("""
-                SELECT pa.tipo as tipo_programa, ppa.rol as rol
-                FROM participante_programa_academico ppa
-                JOIN programa_academico pa ON ppa.nombre_programa = pa.nombre_programa
-                WHERE ci_participante = %s
-            """, (ci,))
-            filas = cursor.fetchall()
-            if not filas:
-                cursor.close(); conexion.close()
+            effective_role = ctx.rol(ci)
+            if effective_role is None:
                 return False, f"El participante {ci} no tiene programa académico asignado."
-
-            roles = set()
-            tipos_prog = set()
-            for f in filas:
-                try:
-                    roles.add((f.get('rol') or '').strip().lower())
-                except Exception:
-                    pass
-                try:
-                    tipos_prog.add((f.get('tipo_programa') or '').strip().lower())
-                except Exception:
-                    pass
-
-            effective_role = 'alumno'
-            if 'docente' in roles:
-                effective_role = 'docente'
-            elif 'postgrado' in roles or 'posgrado' in roles:
-                effective_role = 'postgrado'
-            elif 'alumno' in roles:
-                effective_role = 'alumno'
-            else:
-                if 'postgrado' in tipos_prog or 'posgrado' in tipos_prog:
-                    effective_role = 'postgrado'
-
-            roles_por_ci[ci] = effective_role
-
-            # exclusivity checks
             if tipo_sala == 'docente' and effective_role != 'docente':
-                cursor.close(); conexion.close()
                 return False, f"La sala {nombre_sala} es exclusiva de docentes."
             if tipo_sala == 'posgrado' and effective_role != 'postgrado':
-                cursor.close(); conexion.close()
                 return False, f"La sala {nombre_sala} es exclusiva de posgrado."
 
-        # Build requested counts per week and per date
-        # week key: YYYY-MM-DD (start of week Monday)
-        from collections import defaultdict
-
-        def week_start_for_date(dt_date):
-            d = datetime.strptime(dt_date, '%Y-%m-%d').date()
-            start = d - timedelta(days=d.weekday())
-            return start.strftime('%Y-%m-%d')
-
         # requested per-week and per-date (same for all participants in this request)
         requested_per_week = defaultdict(int)
         requested_per_date = defaultdict(int)
         for d in parsed_dates:
-            wk = week_start_for_date(d)
-            requested_per_week[wk] += 1
+            requested_per_week[inicio_semana(d)] += 1
             requested_per_date[d] += 1
 
         # For each participant, apply daily and weekly checks (unless exempt)
         for ci in participantes:
-            eff = roles_por_ci.get(ci)
-            is_exempt = (eff == 'docente' and tipo_sala == 'docente') or (eff == 'postgrado' and tipo_sala == 'posgrado')
-            if is_exempt:
+            if es_exento(ctx.rol(ci), tipo_sala):
                 continue
 
-            # Daily (2 hours) check: for each date in requested_per_date, count existing hours + requested on that date
             for date_str, req_cnt_on_date in requested_per_date.items():
-                # Contar sólo horas en salas libres (excluir 'docente' y 'posgrado/postgrado')
-                cursor.execute("""
-                    SELECT COALESCE(SUM(TIMESTAMPDIFF(HOUR, t.hora_inicio, t.hora_fin)),0) AS horas_reservadas
-                    FROM reserva_participante rp
-                    JOIN reserva r ON rp.id_reserva = r.id_reserva
-                    JOIN turno t ON r.id_turno = t.id_turno
-                    JOIN sala s ON r.nombre_sala = s.nombre_sala AND r.edificio = s.edificio
-                    WHERE rp.ci_participante = %s
-                      AND r.fecha = %s
-                      AND r.estado = 'activa'
-                      AND TRIM(LOWER(COALESCE(s.tipo_sala, ''))) NOT IN ('docente','posgrado','postgrado')
-                """, (ci, date_str))
-                horas_reservadas = cursor.fetchone()['horas_reservadas'] or 0
+                horas_reservadas = ctx.horas_reservadas(ci, date_str)
                 # requested hours on that date = req_cnt_on_date * 1 (each turno 1h)
-                if (horas_reservadas + req_cnt_on_date) > 2:
-                    cursor.close(); conexion.close()
+                if (horas_reservadas + req_cnt_on_date) > LIMITE_HORAS_DIARIAS:
                     return False, f"El participante {ci} excede el límite diario en {date_str} ({horas_reservadas} existentes + {req_cnt_on_date} solicitadas). Máximo permitido: 2 horas."
 
             for wk_start, req_cnt in requested_per_week.items():
-                wk_start_date = datetime.strptime(wk_start, '%Y-%m-%d').date()
-                wk_end_date = wk_start_date + timedelta(days=6)
-
-                # Contar sólo reservas en salas libres: excluir salas con tipo 'docente' o 'posgrado/postgrado'
-                cursor.execute("""
-                    SELECT COUNT(DISTINCT r.id_reserva) AS cantidad
-                    FROM reserva_participante rp
-                    JOIN reserva r ON rp.id_reserva = r.id_reserva
-                    JOIN sala s ON r.nombre_sala = s.nombre_sala AND r.edificio = s.edificio
-                    WHERE rp.ci_participante = %s
-                      AND r.fecha BETWEEN %s AND %s
-                      AND r.estado = 'activa'
-                      AND TRIM(LOWER(COALESCE(s.tipo_sala, ''))) NOT IN ('docente','posgrado','postgrado')
-                """, (ci, wk_start_date, wk_end_date))
-                existentes = cursor.fetchone()['cantidad'] or 0
-
+                existentes = ctx.reservas_semana(ci, wk_start)
                 total = existentes + req_cnt
-                if total > 3:
-                    cursor.close(); conexion.close()
+                if total > LIMITE_RESERVAS_SEMANALES:
                     return False, f"El participante {ci} excede el límite semanal en la semana {wk_start} ({existentes} existentes + {req_cnt} solicitadas = {total}). Máximo permitido: 3."
 
-        cursor.close()
-        conexion.close()
         return True, "OK"
     except Exception:
-        # Catch-all para asegurar que el try exterior no deje la función sin un bloque except/finally.
+        return False, "Error interno en validar_reglas_negocio"
+    finally:
         try:
-            cursor.close()
-            conexion.close()
+            if cursor is not None:
+                cursor.close()
+            if conexion is not None:
+                conexion.close()
         except Exception:
             pass
-        return False, "Error interno en validar_reglas_negocio"
 
 def crear_reserva(nombre_sala, edificio, fecha, id_turno, participantes):
     conexion = get_connection(role='user')
@@ -242,9 +148,11 @@ def crear_reserva(nombre_sala, edificio, fecha, id_turno, participantes):
             VALUES (%s, %s, NOW(), NULL)
         """, (ci, id_reserva))
 
+    refrescar_turnos(cursor, [(nombre_sala, edificio, fecha, id_turno)])
     conexion.commit()
     cursor.close()
     conexion.close()
+    invalidar_reportes('reservas')
     return id_reserva
 
 
@@ -253,178 +161,333 @@ def crear_reservas_batch(nombre_sala, edificio, fecha, turnos, participantes):
 
     Valida atómicamente el límite semanal por participante contando turnos existentes
     en la semana y sumando los turnos solicitados en este batch.
+
+    Concurrencia: la transacción toma los locks siempre en el mismo orden
+    (fila de la sala, después los participantes ordenados por CI) antes de
+    leer ocupación y límites, así dos requests que compiten por la misma sala
+    o el mismo participante se serializan en lugar de validar los dos contra
+    el mismo estado. El índice único de turno activo (migración 003) es la
+    garantía final. Ante deadlock se reintenta la transacción completa.
     """
     if not isinstance(turnos, list) or len(turnos) == 0:
         raise ValueError("turnos debe ser una lista no vacía")
+    fecha = datetime.strptime(str(fecha), '%Y-%m-%d').strftime('%Y-%m-%d')
+
+    def _reservar(conn):
+        cur = conn.cursor()
+        try:
+            return _reservar_con_locks(cur, nombre_sala, edificio, fecha, turnos, participantes)
+        finally:
+            cur.close()
+
+    try:
+        creadas = run_in_transaction(_reservar, role='user')
+    except pymysql.err.IntegrityError as e:
+        if e.args and e.args[0] == ER_DUP_ENTRY:
+            raise ValueError(f"La sala {nombre_sala} ya está reservada en alguno de los turnos solicitados.")
+        raise
+    invalidar_reportes('reservas', al_confirmar=False)
+    return creadas
 
-    conn = get_connection(role='user')
-    cur = conn.cursor()
 
-    # Obtener tipo de sala y capacidad
-    cur.execute("SELECT capacidad, tipo_sala FROM sala WHERE nombre_sala=%s AND edificio=%s", (nombre_sala, edificio))
-    sala = cur.fetchone()
+def crear_reservas_bulk(items, todo_o_nada=False):
+    """Crear muchas reservas (sala, fecha, turnos, participantes) en una sola transacción.
+
+    Cada item es un dict con nombre_sala, edificio, fecha ('YYYY-MM-DD'), turnos
+    (lista de id_turno) y participantes. Los items se validan como conjunto: los
+    aceptados cuentan para los límites y la ocupación de los siguientes. La
+    escritura son dos sentencias (INSERT multi-fila de reservas y executemany de
+    participantes) sin importar la cantidad de items.
+
+    Devuelve un resultado por item, en el mismo orden:
+        {'ok': True, 'reservas': [{'id_reserva', 'id_turno'}, ...]}
+        {'ok': False, 'error': '...'}
+    Con `todo_o_nada=True`, si algún item falla no se crea ninguno.
+    """
+    if not items:
+        return []
+
+    def _reservar(conn):
+        cur = conn.cursor()
+        try:
+            return _reservar_lote(cur, items, todo_o_nada)
+        finally:
+            cur.close()
+
+    try:
+        resultados = run_in_transaction(_reservar, role='user')
+    except pymysql.err.IntegrityError as e:
+        if e.args and e.args[0] == ER_DUP_ENTRY:
+            raise ValueError("Alguno de los turnos solicitados fue reservado por otra operación; reintente.")
+        raise
+    if any(r.get('reservas') for r in resultados):
+        invalidar_reportes('reservas', al_confirmar=False)
+    return resultados
+
+
+def _clave_sala(nombre_sala, edificio):
+    """Clave de sala insensible a mayúsculas, como la compara la colación de la BD."""
+    return (str(nombre_sala).strip().lower(), str(edificio).strip().lower())
+
+
+def _bloquear_salas(cur, salas):
+    """SELECT ... FOR UPDATE sobre las salas, en orden de PK. Devuelve {_clave_sala(...): sala}."""
+    salas = sorted(set(salas))
+    cur.execute(f"""
+        SELECT nombre_sala, edificio, capacidad, tipo_sala FROM sala
+        WHERE (nombre_sala, edificio) IN ({placeholders(salas, '(%s,%s)')})
+        ORDER BY nombre_sala, edificio
+        FOR UPDATE
+    """, tuple(v for sala in salas for v in sala))
+    return {_clave_sala(f['nombre_sala'], f['edificio']): f for f in cur.fetchall()}
+
+
+def _bloquear_participantes(cur, participantes):
+    """SELECT ... FOR UPDATE sobre los participantes, en orden de CI (evita deadlocks entre requests)."""
+    cis = set()
+    for ci in participantes:
+        try:
+            cis.add(int(ci))
+        except (TypeError, ValueError):
+            pass  # el CI inválido lo reporta la validación de roles
+    if not cis:
+        return
+    cis = sorted(cis)
+    cur.execute(
+        f"SELECT ci FROM participante WHERE ci IN ({placeholders(cis)}) ORDER BY ci FOR UPDATE",
+        tuple(cis)
+    )
+    cur.fetchall()
+
+
+_SELECT_TURNOS_OCUPADOS = """
+    SELECT nombre_sala, edificio, fecha, id_turno FROM reserva
+    WHERE slot_activo = 1
+      AND (nombre_sala, edificio, fecha, id_turno) IN ({slots})
+"""
+
+
+def _turnos_ocupados(cur, slots):
+    """Turnos con reserva activa entre `slots` (nombre_sala, edificio, 'YYYY-MM-DD', id_turno).
+
+    Filtra por slot_activo (= estado 'activa') para resolverse entero con
+    ux_reserva_slot_activo. Devuelve claves `_clave_sala(...) + (fecha, id_turno)`.
+    """
+    slots = list(set(slots))
+    if not slots:
+        return set()
+    cur.execute(_SELECT_TURNOS_OCUPADOS.format(slots=placeholders(slots, '(%s,%s,%s,%s)')),
+                tuple(v for slot in slots for v in slot))
+    return {
+        _clave_sala(f['nombre_sala'], f['edificio']) + (f['fecha'].strftime('%Y-%m-%d'), f['id_turno'])
+        for f in cur.fetchall()
+    }
+
+
+def _validar_reserva(ctx, sala, nombre_sala, edificio, fecha, turnos, participantes, ocupados):
+    """Reglas de negocio de una reserva contra datos ya cargados; lanza ValueError si no se cumple."""
     if not sala:
-        conn.close()
         raise ValueError("La sala no existe.")
     tipo_sala = (sala.get('tipo_sala') or '').strip().lower()
     if len(participantes) > sala.get('capacidad', 0):
-        conn.close()
         raise ValueError(f"La sala solo permite {sala.get('capacidad')} participantes.")
 
-    # Calcular semana de la fecha
-    fecha_base = datetime.strptime(fecha, '%Y-%m-%d').date()
-    inicio_semana = fecha_base - timedelta(days=fecha_base.weekday())
-    fin_semana = inicio_semana + timedelta(days=6)
+    for id_turno in sorted(turnos):
+        if _clave_sala(nombre_sala, edificio) + (fecha, id_turno) in ocupados:
+            raise ValueError(f"La sala {nombre_sala} ya está reservada en el turno {id_turno} para {fecha}.")
+    if len(set(turnos)) != len(turnos):
+        raise ValueError("turnos no puede tener elementos repetidos")
 
-    # Recolectar roles y validar exclusividad inmediata
-    roles_por_ci = {}
+    # Sanciones vigentes (solo si el contexto las cargó)
     for ci in participantes:
-        cur.execute("""
-            SELECT pa.tipo as tipo_programa, ppa.rol as rol
-            FROM participante_programa_academico ppa
-            JOIN programa_academico pa ON ppa.nombre_programa = pa.nombre_programa
-            WHERE ci_participante = %s
-        """, (ci,))
-        filas = cur.fetchall()
-        if not filas:
-            conn.close()
-            raise ValueError(f"El participante {ci} no tiene programa académico asignado.")
+        if ctx.tiene_sancion(ci):
+            raise ValueError(f"El participante {ci} tiene sanciones vigentes y no puede reservar.")
 
-        roles = set()
-        tipos_prog = set()
-        for f in filas:
-            try:
-                roles.add((f.get('rol') or '').strip().lower())
-            except Exception:
-                pass
-            try:
-                tipos_prog.add((f.get('tipo_programa') or '').strip().lower())
-            except Exception:
-                pass
-
-        effective_role = 'alumno'
-        if 'docente' in roles:
-            effective_role = 'docente'
-        elif 'postgrado' in roles or 'posgrado' in roles:
-            effective_role = 'postgrado'
-        elif 'alumno' in roles:
-            effective_role = 'alumno'
-        else:
-            if 'postgrado' in tipos_prog or 'posgrado' in tipos_prog:
-                effective_role = 'postgrado'
-
-        roles_por_ci[ci] = effective_role
-
-        # Exclusividad de sala
+    # Roles y exclusividad de sala
+    for ci in participantes:
+        effective_role = ctx.rol(ci)
+        if effective_role is None:
+            raise ValueError(f"El participante {ci} no tiene programa académico asignado.")
         if tipo_sala == 'docente' and effective_role != 'docente':
-            conn.close()
             raise ValueError(f"La sala {nombre_sala} es exclusiva de docentes.")
         if tipo_sala == 'posgrado' and effective_role != 'postgrado':
-            conn.close()
             raise ValueError(f"La sala {nombre_sala} es exclusiva de posgrado.")
 
-    # Validar límite semanal por participante (turnos existentes + turnos solicitados en este batch)
+    # Límites diario y semanal por participante (existentes + turnos solicitados)
+    semana = inicio_semana(fecha)
     turnos_solicitados = len(turnos)
     for ci in participantes:
-        eff = roles_por_ci.get(ci)
-        is_exempt = (eff == 'docente' and tipo_sala == 'docente') or (eff == 'postgrado' and tipo_sala == 'posgrado')
-        if is_exempt:
+        if es_exento(ctx.rol(ci), tipo_sala):
             continue
-        try:
-            cur.execute("""
-                SELECT COALESCE(SUM(TIMESTAMPDIFF(HOUR, t.hora_inicio, t.hora_fin)),0) AS horas_reservadas
-                FROM reserva_participante rp
-                JOIN reserva r ON rp.id_reserva = r.id_reserva
-                JOIN turno t ON r.id_turno = t.id_turno
-                JOIN sala s ON r.nombre_sala = s.nombre_sala AND r.edificio = s.edificio
-                WHERE rp.ci_participante = %s
-                  AND r.fecha = %s
-                  AND r.estado = 'activa'
-                  AND TRIM(LOWER(COALESCE(s.tipo_sala, ''))) NOT IN ('docente','posgrado','postgrado')
-            """, (ci, fecha))
-            horas_existentes = cur.fetchone().get('horas_reservadas') or 0
-        except Exception:
-            horas_existentes = 0
-        if (horas_existentes + turnos_solicitados) > 2:
-            conn.close()
+        horas_existentes = ctx.horas_reservadas(ci, fecha)
+        if (horas_existentes + turnos_solicitados) > LIMITE_HORAS_DIARIAS:
             raise ValueError(f"El participante {ci} excede el límite diario en {fecha} ({horas_existentes} existentes + {turnos_solicitados} solicitadas). Máximo permitido: 2 horas.")
 
-        cur.execute("""
-            SELECT COUNT(DISTINCT r.id_reserva) AS cantidad
-            FROM reserva_participante rp
-            JOIN reserva r ON rp.id_reserva = r.id_reserva
-            WHERE rp.ci_participante = %s
-            AND r.fecha BETWEEN %s AND %s
-            AND r.estado = 'activa'
-        """, (ci, inicio_semana, fin_semana))
-        # Contar sólo reservas en salas libres (excluir 'docente' y 'posgrado/postgrado')
-        cur.execute("""
-            SELECT COUNT(DISTINCT r.id_reserva) AS cantidad
-            FROM reserva_participante rp
-            JOIN reserva r ON rp.id_reserva = r.id_reserva
-            JOIN sala s ON r.nombre_sala = s.nombre_sala AND r.edificio = s.edificio
-            WHERE rp.ci_participante = %s
-            AND r.fecha BETWEEN %s AND %s
-            AND r.estado = 'activa'
-            AND TRIM(LOWER(COALESCE(s.tipo_sala, ''))) NOT IN ('docente','posgrado','postgrado')
-        """, (ci, inicio_semana, fin_semana))
-        existentes = cur.fetchone()['cantidad']
-        try:
-            print(f"[BATCH_SEMANA] ci={ci} existentes={existentes} inicio={inicio_semana} fin={fin_semana} turnos_solicitados={turnos_solicitados}")
-        except Exception:
-            pass
-        total = (existentes or 0) + turnos_solicitados
-        try:
-            print(f"[BATCH_SEMANA_TOTAL] ci={ci} existentes={existentes} total={total}")
-        except Exception:
-            pass
-        if total > 3:
-            conn.close()
+        if ctx.reservas_semana(ci, semana) + turnos_solicitados > LIMITE_RESERVAS_SEMANALES:
             raise ValueError(f"El participante {ci} ya tiene reservas activas esta semana (máximo 3).")
+    return tipo_sala
+
+
+def _insertar_reservas(cur, slots):
+    """Inserta las reservas y sus participantes en dos sentencias.
+
+    `slots` es una lista de (nombre_sala, edificio, fecha, id_turno, participantes).
+    Los id_reserva se leen de vuelta por turno (único entre reservas activas),
+    así no dependemos de que el autoincremental sea consecutivo.
+    Devuelve los id_reserva en el mismo orden que `slots`.
+    """
+    claves = [slot[:4] for slot in slots]
+    cur.execute(f"""
+        INSERT INTO reserva (nombre_sala, edificio, fecha, id_turno, estado)
+        VALUES {placeholders(claves, "(%s, %s, %s, %s, 'activa')")}
+    """, tuple(v for clave in claves for v in clave))
+
+    cur.execute(f"""
+        SELECT id_reserva, nombre_sala, edificio, fecha, id_turno FROM reserva
+        WHERE slot_activo = 1
+          AND (nombre_sala, edificio, fecha, id_turno) IN ({placeholders(claves, '(%s,%s,%s,%s)')})
+    """, tuple(v for clave in claves for v in clave))
+    ids = {
+        _clave_sala(f['nombre_sala'], f['edificio']) + (f['fecha'].strftime('%Y-%m-%d'), f['id_turno']): f['id_reserva']
+        for f in cur.fetchall()
+    }
+    ids_reserva = [ids[_clave_sala(c[0], c[1]) + (c[2], c[3])] for c in claves]
+
+    cur.executemany("""
+        INSERT INTO reserva_participante (ci_participante, id_reserva, fecha_solicitud_reserva, asistencia)
+        VALUES (%s, %s, NOW(), NULL)
+    """, [(ci, id_res) for id_res, slot in zip(ids_reserva, slots) for ci in slot[4]])
+    refrescar_turnos(cur, claves)
+    return ids_reserva
+
+
+def _reservar_con_locks(cur, nombre_sala, edificio, fecha, turnos, participantes):
+    # Bloquear la sala y los participantes hasta el commit; después leer estado
+    sala = _bloquear_salas(cur, [(nombre_sala, edificio)]).get(_clave_sala(nombre_sala, edificio))
+    if not sala:
+        raise ValueError("La sala no existe.")
+    _bloquear_participantes(cur, participantes)
+    ocupados = _turnos_ocupados(cur, [(nombre_sala, edificio, fecha, t) for t in turnos])
+    ctx = cargar_contexto(cur, participantes, [fecha], con_sanciones=False)
+
+    _validar_reserva(ctx, sala, nombre_sala, edificio, fecha, turnos, participantes, ocupados)
 
     # Si pasaron las validaciones, crear todas las reservas e insertar participantes
-    creadas = []
-    try:
-        for id_turno in turnos:
-            cur.execute("""
-                INSERT INTO reserva (nombre_sala, edificio, fecha, id_turno, estado)
-                VALUES (%s, %s, %s, %s, 'activa')
-            """, (nombre_sala, edificio, fecha, id_turno))
-            id_res = cur.lastrowid
-            for ci in participantes:
-                cur.execute("""
-                    INSERT INTO reserva_participante (ci_participante, id_reserva, fecha_solicitud_reserva, asistencia)
-                    VALUES (%s, %s, NOW(), NULL)
-                """, (ci, id_res))
-            creadas.append({'id_reserva': id_res, 'id_turno': id_turno})
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        conn.close()
-        raise
+    ids = _insertar_reservas(cur, [(sala['nombre_sala'], sala['edificio'], fecha, t, participantes) for t in turnos])
+    return [{'id_reserva': id_res, 'id_turno': id_turno} for id_res, id_turno in zip(ids, turnos)]
+
+
+def _reservar_lote(cur, items, todo_o_nada):
+    salas = _bloquear_salas(cur, [(it['nombre_sala'], it['edificio']) for it in items])
+    _bloquear_participantes(cur, [ci for it in items for ci in it['participantes']])
+    ocupados = _turnos_ocupados(cur, [
+        (it['nombre_sala'], it['edificio'], it['fecha'], t) for it in items for t in it['turnos']
+    ])
+    ctx = cargar_contexto(
+        cur,
+        [ci for it in items for ci in it['participantes']],
+        [it['fecha'] for it in items],
+        con_sanciones=True  # /reservas/bulk no pasa por validar_reglas_negocio
+    )
 
-    conn.close()
-    return creadas
+    resultados = []
+    aceptados = []
+    for i, it in enumerate(items):
+        nombre_sala, edificio, fecha = it['nombre_sala'], it['edificio'], it['fecha']
+        try:
+            tipo_sala = _validar_reserva(ctx, salas.get(_clave_sala(nombre_sala, edificio)), nombre_sala, edificio,
+                                         fecha, it['turnos'], it['participantes'], ocupados)
+        except ValueError as e:
+            resultados.append({'ok': False, 'error': str(e)})
+            continue
+        # Lo aceptado ocupa el turno y suma a los límites de los items siguientes
+        for id_turno in it['turnos']:
+            ocupados.add(_clave_sala(nombre_sala, edificio) + (fecha, id_turno))
+        if tipo_sala not in ('docente', 'posgrado', 'postgrado'):
+            for ci in it['participantes']:
+                ctx.registrar(ci, fecha, len(it['turnos']))
+        resultados.append({'ok': True, 'reservas': []})
+        aceptados.append(i)
+
+    if not aceptados:
+        return resultados
+    if todo_o_nada and len(aceptados) != len(items):
+        for i in aceptados:
+            resultados[i] = {'ok': False, 'error': 'No se creó: otro elemento del lote no es válido (todo_o_nada).'}
+        return resultados
+
+    slots = []
+    for i in aceptados:
+        sala = salas[_clave_sala(items[i]['nombre_sala'], items[i]['edificio'])]
+        for id_turno in items[i]['turnos']:
+            slots.append((sala['nombre_sala'], sala['edificio'], items[i]['fecha'], id_turno, items[i]['participantes']))
+    ids = iter(_insertar_reservas(cur, slots))
+    for i in aceptados:
+        resultados[i]['reservas'] = [
+            {'id_reserva': next(ids), 'id_turno': id_turno} for id_turno in items[i]['turnos']
+        ]
+    return resultados
+
+
+def _hora_str(valor):
+    """Normaliza un TIME/DATETIME de la BD a 'HH:MM:SS' (o None)."""
+    return str(valor).split(' ')[-1] if valor else None
+
+
+def _fila_a_reserva(fila):
+    """Arma el dict de reserva que devuelve la API a partir de una fila con turno y asistentes."""
+    # Crear objeto turno singular
+    turno = None
+    if fila['hora_inicio'] and fila['hora_fin']:
+        turno = {
+            'hora_inicio': _hora_str(fila['hora_inicio']),
+            'hora_fin': _hora_str(fila['hora_fin'])
+        }
 
+    return {
+        'id_reserva': fila['id_reserva'],
+        'nombre_sala': fila['nombre_sala'],
+        'edificio': fila['edificio'],
+        'fecha': fila['fecha'].strftime('%Y-%m-%d') if fila['fecha'] else None,
+        'estado': fila['estado'],
+        'id_turno': fila['id_turno'],
+        'hora_fin': _hora_str(fila['hora_fin']),
+        'asistentes': int(fila['asistentes'] or 0),
+        'turno': turno  # Objeto singular en lugar de array
+    }
 
-def listar_reservas(ci_participante=None, nombre_sala=None):
-    conexion = get_connection(role='readonly')
-    cursor = conexion.cursor()
-    
-    # Consulta base con JOIN a turno para obtener horarios
-    consulta = """
-        SELECT 
-            r.id_reserva,
-            r.nombre_sala,
-            r.edificio,
-            r.fecha,
-            r.estado,
-            t.hora_inicio,
-            t.hora_fin
-        FROM reserva r
-        LEFT JOIN turno t ON r.id_turno = t.id_turno
-    """
-    
+
+# Reserva + horario del turno + cantidad de asistentes, todo en una sola consulta
+# (LEFT JOIN agrupado sobre reserva_participante) para poder calcular el estado
+# actual en memoria sin una consulta extra por reserva.
+_SELECT_RESERVA = """
+    SELECT
+        r.id_reserva,
+        r.nombre_sala,
+        r.edificio,
+        r.fecha,
+        r.estado,
+        r.id_turno,
+        t.hora_inicio,
+        t.hora_fin,
+        COALESCE(TIME_TO_SEC(TIME(t.hora_inicio)), -1) AS orden_hora,
+        COALESCE(SUM(CASE WHEN rp.asistencia = 1 THEN 1 ELSE 0 END), 0) AS asistentes
+    FROM reserva r
+    LEFT JOIN turno t ON r.id_turno = t.id_turno
+    LEFT JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+"""
+
+_GROUP_BY_RESERVA = " GROUP BY r.id_reserva, t.hora_inicio, t.hora_fin"
+
+# Orden de los listados: (fecha DESC, hora_inicio, id_reserva); también es la clave del cursor
+_ORDEN_RESERVA = " ORDER BY r.fecha DESC, orden_hora ASC, r.id_reserva ASC"
+_DESPUES_DE_RESERVA = """(r.fecha < %s OR (r.fecha = %s AND (
+    COALESCE(TIME_TO_SEC(TIME(t.hora_inicio)), -1) > %s
+    OR (COALESCE(TIME_TO_SEC(TIME(t.hora_inicio)), -1) = %s AND r.id_reserva > %s))))"""
+
+
+def _consulta_reservas(ci_participante=None, nombre_sala=None, desde=None, hasta=None, after=None, limit=None):
+    consulta = _SELECT_RESERVA
     parametros = []
     filtros = []
 
@@ -434,85 +497,121 @@ def listar_reservas(ci_participante=None, nombre_sala=None):
     if nombre_sala:
         filtros.append("r.nombre_sala = %s")
         parametros.append(nombre_sala)
+    if desde:
+        filtros.append("r.fecha >= %s")
+        parametros.append(desde)
+    if hasta:
+        filtros.append("r.fecha <= %s")
+        parametros.append(hasta)
+    if after:
+        fecha, orden_hora, id_reserva = after
+        filtros.append(_DESPUES_DE_RESERVA)
+        parametros.extend([fecha, fecha, orden_hora, orden_hora, id_reserva])
     if filtros:
         consulta += " WHERE " + " AND ".join(filtros)
-    
-    consulta += " ORDER BY r.fecha DESC, t.hora_inicio ASC"
 
+    consulta += _GROUP_BY_RESERVA
+    consulta += _ORDEN_RESERVA
+    if limit:
+        consulta += " LIMIT %s"
+        parametros.append(limit)
+    return consulta, parametros
+
+
+def listar_reservas(ci_participante=None, nombre_sala=None, desde=None, hasta=None):
+    conexion = get_connection(role='readonly')
+    cursor = conexion.cursor()
+
+    consulta, parametros = _consulta_reservas(ci_participante, nombre_sala, desde, hasta)
     cursor.execute(consulta, parametros)
     filas = cursor.fetchall()
     cursor.close()
     conexion.close()
-    
-    # Agrupar por id_reserva para combinar múltiples turnos
-    reservas_dict = {}
-    for fila in filas:
-        id_reserva = fila['id_reserva']
-        if id_reserva not in reservas_dict:
-            # Crear objeto turno singular con el primer turno encontrado
-            turno = None
-            if fila['hora_inicio'] and fila['hora_fin']:
-                turno = {
-                    'hora_inicio': str(fila['hora_inicio']).split(' ')[-1] if fila['hora_inicio'] else None,
-                    'hora_fin': str(fila['hora_fin']).split(' ')[-1] if fila['hora_fin'] else None
-                }
-            
-            reservas_dict[id_reserva] = {
-                'id_reserva': id_reserva,
-                'nombre_sala': fila['nombre_sala'],
-                'edificio': fila['edificio'],
-                'fecha': fila['fecha'].strftime('%Y-%m-%d') if fila['fecha'] else None,
-                'estado': fila['estado'],
-                'turno': turno  # Objeto singular en lugar de array
-            }
-    
-    return list(reservas_dict.values())
-
-
-def obtener_reserva(id_reserva):
+
+    return [_fila_a_reserva(fila) for fila in filas]
+
+
+def listar_reservas_pagina(limit, after=None, ci_participante=None, nombre_sala=None, desde=None, hasta=None):
+    """Una página de `listar_reservas` por cursor: devuelve (reservas, next_cursor).
+
+    `after` son los valores (fecha, orden_hora, id_reserva) de la última fila de la página anterior.
+    """
+    consulta, parametros = _consulta_reservas(ci_participante, nombre_sala, desde, hasta,
+                                              after=after, limit=limit + 1)
     conexion = get_connection(role='readonly')
     cursor = conexion.cursor()
-    
-    # Obtener datos de la reserva con información del turno
-    cursor.execute("""
-        SELECT 
-            r.id_reserva,
-            r.nombre_sala,
-            r.edificio,
-            r.fecha,
-            r.estado,
-            t.hora_inicio,
-            t.hora_fin
-        FROM reserva r
-        LEFT JOIN turno t ON r.id_turno = t.id_turno
-        WHERE r.id_reserva = %s
-    """, (id_reserva,))
+    try:
+        cursor.execute(consulta, parametros)
+        filas = cursor.fetchall()
+    finally:
+        cursor.close()
+        conexion.close()
+    filas, siguiente = pagina(filas, limit, lambda f: (f['fecha'], f['orden_hora'], f['id_reserva']))
+    return [_fila_a_reserva(fila) for fila in filas], siguiente
+
+
+def iterar_reservas(ci_participante=None, nombre_sala=None, desde=None, hasta=None):
+    """Igual que `listar_reservas` pero fila a fila con un cursor sin buffer (para exportar).
+
+    La consulta se ejecuta al llamar; las filas se convierten a medida que se envían.
+    """
+    consulta, parametros = _consulta_reservas(ci_participante, nombre_sala, desde, hasta)
+    return map(_fila_a_reserva, iterar_consulta(consulta, tuple(parametros)))
+
+
+def iterar_asistencias(ci_participante=None, desde=None, hasta=None):
+    """Una fila por participante de cada reserva, con su asistencia (para exportar)."""
+    consulta = """
+        SELECT r.id_reserva, r.fecha, r.nombre_sala, r.edificio, r.id_turno,
+               t.hora_inicio, t.hora_fin, r.estado,
+               rp.ci_participante, p.nombre, p.apellido, rp.asistencia, rp.fecha_solicitud_reserva
+        FROM reserva_participante rp
+        JOIN reserva r ON r.id_reserva = rp.id_reserva
+        JOIN participante p ON p.ci = rp.ci_participante
+        LEFT JOIN turno t ON t.id_turno = r.id_turno
+    """
+    parametros = []
+    filtros = []
+    if ci_participante:
+        filtros.append("rp.ci_participante = %s")
+        parametros.append(ci_participante)
+    if desde:
+        filtros.append("r.fecha >= %s")
+        parametros.append(desde)
+    if hasta:
+        filtros.append("r.fecha <= %s")
+        parametros.append(hasta)
+    if filtros:
+        consulta += " WHERE " + " AND ".join(filtros)
+    consulta += " ORDER BY r.fecha, r.id_reserva, rp.ci_participante"
+
+    return map(_fila_asistencia, iterar_consulta(consulta, tuple(parametros)))
+
+
+def _fila_asistencia(fila):
+    fila['hora_inicio'] = _hora_str(fila['hora_inicio'])
+    fila['hora_fin'] = _hora_str(fila['hora_fin'])
+    if fila['asistencia'] is not None:
+        fila['asistencia'] = bool(fila['asistencia'])
+    return fila
+
+
+def obtener_reserva(id_reserva, role='readonly'):
+    """Reserva con turno y asistentes. Para releer en el mismo request lo que se
+    acaba de escribir usar role='user' (la conexión de escritura)."""
+    conexion = get_connection(role=role)
+    cursor = conexion.cursor()
+
+    # Obtener datos de la reserva con información del turno y asistentes
+    cursor.execute(_SELECT_RESERVA + " WHERE r.id_reserva = %s" + _GROUP_BY_RESERVA, (id_reserva,))
     fila = cursor.fetchone()
     cursor.close()
     conexion.close()
-    
+
     if not fila:
         return None
-    
-    # Crear objeto turno singular
-    turno = None
-    if fila['hora_inicio'] and fila['hora_fin']:
-        turno = {
-            'hora_inicio': str(fila['hora_inicio']).split(' ')[-1] if fila['hora_inicio'] else None,
-            'hora_fin': str(fila['hora_fin']).split(' ')[-1] if fila['hora_fin'] else None
-        }
-    
-    # Formatear la respuesta con turno singular
-    reserva = {
-        'id_reserva': fila['id_reserva'],
-        'nombre_sala': fila['nombre_sala'],
-        'edificio': fila['edificio'],
-        'fecha': fila['fecha'].strftime('%Y-%m-%d') if fila['fecha'] else None,
-        'estado': fila['estado'],
-        'turno': turno  # Objeto singular en lugar de array
-    }
-    
-    return reserva
+
+    return _fila_a_reserva(fila)
 
 
 
@@ -551,8 +650,12 @@ def actualizar_reserva(id_reserva, datos):
     valores.append(id_reserva)
     sql = f"UPDATE reserva SET {', '.join(campos)} WHERE id_reserva=%s"
     cursor.execute(sql, valores)
-    conexion.commit()
     filas_afectadas = cursor.rowcount
+    # Recalcular el turno anterior y el nuevo (si cambió sala, fecha o turno)
+    refrescar_turnos(cursor, [(reserva_actual['nombre_sala'], reserva_actual['edificio'],
+                               reserva_actual['fecha'], reserva_actual['id_turno'])])
+    refrescar_reservas(cursor, [id_reserva])
+    conexion.commit()
 
     # Si se marcó como 'sin asistencia', crear sanciones automáticas para participantes sin asistencia
     if 'estado' in datos and datos.get('estado') == 'sin asistencia':
@@ -580,18 +683,22 @@ def actualizar_reserva(id_reserva, datos):
 
     cursor.close()
     conexion.close()
+    invalidar_reportes('reservas', 'sanciones')
     return filas_afectadas
 
 
 def eliminar_reserva(id_reserva):
     conexion = get_connection(role='admin')
     cursor = conexion.cursor()
+    turnos = turnos_de_reservas(cursor, [id_reserva])
     cursor.execute("DELETE FROM reserva_participante WHERE id_reserva=%s", (id_reserva,))
     cursor.execute("DELETE FROM reserva WHERE id_reserva=%s", (id_reserva,))
-    conexion.commit()
     filas_afectadas = cursor.rowcount
+    refrescar_turnos(cursor, turnos)
+    conexion.commit()
     cursor.close()
     conexion.close()
+    invalidar_reportes('reservas')
     return filas_afectadas
 
 
@@ -603,8 +710,75 @@ def marcar_asistencia(id_reserva, ci_participante, asistencia: bool):
         "UPDATE reserva_participante SET asistencia=%s WHERE id_reserva=%s AND ci_participante=%s",
         (1 if asistencia else 0, id_reserva, ci_participante)
     )
+    filas_afectadas = cursor.rowcount
+    if filas_afectadas:
+        refrescar_reservas(cursor, [id_reserva])
     conexion.commit()
+    cursor.close()
+    conexion.close()
+    invalidar_reportes('reservas')
+    return filas_afectadas
+
+
+def marcar_asistencia_todos(id_reserva):
+    """Marcar asistencia de todos los participantes de una reserva."""
+    conexion = get_connection(role='user')
+    cursor = conexion.cursor()
+    cursor.execute("UPDATE reserva_participante SET asistencia = 1 WHERE id_reserva = %s", (id_reserva,))
     filas_afectadas = cursor.rowcount
+    refrescar_reservas(cursor, [id_reserva])
+    conexion.commit()
     cursor.close()
     conexion.close()
+    invalidar_reportes('reservas')
     return filas_afectadas
+
+_SELECT_TURNOS_OCUPADOS_SALA = """
+    SELECT id_turno
+    FROM reserva
+    WHERE nombre_sala = %s AND edificio = %s AND fecha = %s AND slot_activo = 1
+"""
+
+_SELECT_OCUPACION_EDIFICIO = """
+    SELECT nombre_sala, fecha, id_turno
+    FROM reserva
+    WHERE edificio = %s AND fecha BETWEEN %s AND %s AND slot_activo = 1
+"""
+
+
+def listar_turnos_ocupados(nombre_sala, edificio, fecha):
+    """Devuelve el set de id_turno con reserva activa para una sala y fecha (una sola consulta)."""
+    conexion = get_connection(role='readonly')
+    cursor = conexion.cursor()
+    cursor.execute(_SELECT_TURNOS_OCUPADOS_SALA, (nombre_sala, edificio, fecha))
+    filas = cursor.fetchall()
+    cursor.close()
+    conexion.close()
+    return {fila['id_turno'] for fila in filas}
+
+
+def mapa_ocupacion(edificio, desde, hasta):
+    """Ocupación de todas las salas de un edificio en un rango de fechas.
+
+    Retorna (salas, ocupados) donde `salas` es la lista de salas del edificio y
+    `ocupados` es un set de tuplas (nombre_sala, 'YYYY-MM-DD', id_turno) con reserva activa.
+    Igual que `listar_turnos_ocupados`, filtra por slot_activo: hay a lo sumo una
+    reserva activa por turno, así que no hace falta agrupar.
+    """
+    conexion = get_connection(role='readonly')
+    cursor = conexion.cursor()
+    cursor.execute("""
+        SELECT nombre_sala, capacidad, tipo_sala
+        FROM sala
+        WHERE edificio = %s
+        ORDER BY nombre_sala
+    """, (edificio,))
+    salas = cursor.fetchall()
+    cursor.execute(_SELECT_OCUPACION_EDIFICIO, (edificio, desde, hasta))
+    ocupados = {
+        (fila['nombre_sala'], fila['fecha'].strftime('%Y-%m-%d'), fila['id_turno'])
+        for fila in cursor.fetchall()
+    }
+    cursor.close()
+    conexion.close()
+    return salas, ocupados
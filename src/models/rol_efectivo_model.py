@@ -0,0 +1,136 @@
+"""
+Rol efectivo materializado por participante (migración 007).
+
+`participante.rol_efectivo` guarda el resultado de `rol_efectivo` (docente >
+postgrado > alumno, con el tipo de programa como respaldo), o NULL si el
+participante no tiene programa. Cada camino que cambia programas (alta,
+registro, actualización) llama a `recalcular_roles` con el cursor de su
+transacción.
+
+El camino de reservas lee con `roles_efectivos`, que sirve desde un cache en
+memoria por CI (`ROL_CACHE_TTL` segundos) y va a la BD solo por los que faltan
+(búsqueda por PK). Las entradas se descartan cuando confirma la transacción que
+cambió los programas; en otros procesos el TTL acota el desfase.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.config.database import on_commit
+from src.models.sql_utils import clave_ci, placeholders
+
+ROL_CACHE_TTL = int(os.getenv('ROL_CACHE_TTL', '300'))
+ROL_CACHE_MAX = int(os.getenv('ROL_CACHE_MAX', '10000'))
+
+_lock = threading.Lock()
+_cache: Dict[Any, Tuple[Optional[str], float]] = {}
+# Se incrementa en cada invalidación: una lectura que empezó antes no guarda su resultado
+_generacion = 0
+
+_SELECT_PROGRAMAS = """
+    SELECT ppa.ci_participante, ppa.rol, pa.tipo AS tipo_programa
+    FROM participante_programa_academico ppa
+    JOIN programa_academico pa ON ppa.nombre_programa = pa.nombre_programa
+    WHERE ppa.ci_participante IN ({ph})
+"""
+
+_SELECT_ROLES = "SELECT ci, rol_efectivo FROM participante WHERE ci IN ({ph})"
+
+
+def rol_efectivo(roles: Iterable[str], tipos_programa: Iterable[str]) -> str:
+    """Rol efectivo de un participante: docente > postgrado > alumno.
+
+    Si no tiene ninguno de esos roles, se usa el tipo de programa como respaldo.
+    """
+    roles = {(r or '').strip().lower() for r in roles}
+    tipos_programa = {(t or '').strip().lower() for t in tipos_programa}
+    if 'docente' in roles:
+        return 'docente'
+    if 'postgrado' in roles or 'posgrado' in roles:
+        return 'postgrado'
+    if 'alumno' in roles:
+        return 'alumno'
+    if 'postgrado' in tipos_programa or 'posgrado' in tipos_programa:
+        return 'postgrado'
+    return 'alumno'
+
+
+def calcular_roles(cursor, cis: List[Any]) -> Dict[Any, str]:
+    """Rol efectivo a partir de los programas (solo los CI que tienen alguno)."""
+    if not cis:
+        return {}
+    cursor.execute(_SELECT_PROGRAMAS.format(ph=placeholders(cis)), tuple(cis))
+    roles: Dict[Any, set] = {}
+    tipos: Dict[Any, set] = {}
+    for f in cursor.fetchall():
+        ci = clave_ci(f['ci_participante'])
+        roles.setdefault(ci, set()).add(f.get('rol') or '')
+        tipos.setdefault(ci, set()).add(f.get('tipo_programa') or '')
+    return {ci: rol_efectivo(roles[ci], tipos.get(ci, ())) for ci in roles}
+
+
+def recalcular_roles(cursor, cis: Iterable[Any]) -> None:
+    """Recalcula y guarda `participante.rol_efectivo` de `cis` con el cursor de la
+    transacción que cambió sus programas; el cache se invalida al confirmar."""
+    cis = list(dict.fromkeys(clave_ci(ci) for ci in cis if ci is not None))
+    if not cis:
+        return
+    roles = calcular_roles(cursor, cis)
+    cursor.executemany(
+        "UPDATE participante SET rol_efectivo = %s WHERE ci = %s",
+        [(roles.get(ci), ci) for ci in cis]
+    )
+    on_commit(lambda: invalidar_roles(cis))
+
+
+def invalidar_roles(cis: Optional[Iterable[Any]] = None) -> None:
+    """Descarta del cache los `cis` indicados (o todo el cache si es None)."""
+    global _generacion
+    with _lock:
+        _generacion += 1
+        if cis is None:
+            _cache.clear()
+            return
+        for ci in cis:
+            _cache.pop(clave_ci(ci), None)
+
+
+def roles_efectivos(cursor, cis: Iterable[Any]) -> Dict[Any, Optional[str]]:
+    """
+    Rol efectivo de cada CI existente (None si no tiene programa).
+
+    Sirve desde el cache; los que faltan se leen de `participante.rol_efectivo`.
+    Un NULL ahí puede ser un participante sin programa o programas cargados por
+    fuera de la app, así que esos pocos se calculan desde los programas.
+    """
+    cis = list(dict.fromkeys(clave_ci(ci) for ci in cis))
+    ahora = time.monotonic()
+    resultado: Dict[Any, Optional[str]] = {}
+    faltan = []
+    with _lock:
+        generacion = _generacion
+        for ci in cis:
+            entrada = _cache.get(ci)
+            if entrada is not None and entrada[1] > ahora:
+                resultado[ci] = entrada[0]
+            else:
+                faltan.append(ci)
+    if not faltan:
+        return resultado
+
+    cursor.execute(_SELECT_ROLES.format(ph=placeholders(faltan)), tuple(faltan))
+    leidos = {clave_ci(f['ci']): f['rol_efectivo'] for f in cursor.fetchall()}
+    sin_rol = [ci for ci, rol in leidos.items() if rol is None]
+    if sin_rol:
+        leidos.update(calcular_roles(cursor, sin_rol))
+    resultado.update(leidos)
+
+    with _lock:
+        if generacion == _generacion:
+            if len(_cache) + len(leidos) > ROL_CACHE_MAX:
+                _cache.clear()
+            vence = ahora + ROL_CACHE_TTL
+            for ci, rol in leidos.items():
+                _cache[ci] = (rol, vence)
+    return resultado
@@ -1,12 +1,21 @@
 # src/models/sancion_model.py
 from datetime import datetime, timedelta
-from src.config.database import get_connection
+from src.config.database import get_connection, run_in_transaction
+from src.models.sql_utils import placeholders
+from src.models.uso_diario_model import refrescar_turnos
+from src.utils.report_cache import invalidar_reportes
+
+# Reservas vencidas por transacción en el barrido de procesar_reservas_vencidas
+SWEEP_CHUNK_SIZE = 500
 
 def _to_date(val):
     if isinstance(val, str):
         return datetime.strptime(val, "%Y-%m-%d").date()
     return val
 
+def _turno_de(fila):
+    return (fila['nombre_sala'], fila['edificio'], fila['fecha'], fila['id_turno'])
+
 def crear_sancion(ci_participante: int, fecha_inicio, fecha_fin):
     """
     Crea una sanción. Usa INSERT IGNORE para no duplicar si existe una restricción única.
@@ -25,34 +34,38 @@ def crear_sancion(ci_participante: int, fecha_inicio, fecha_fin):
     filas = cursor.rowcount
     cursor.close()
     conexion.close()
+    if filas:
+        invalidar_reportes('sanciones')
     return filas
 
-def listar_sanciones(ci_participante: int | None = None, solo_activas: bool = False):
+def listar_sanciones(ci_participante: int | None = None, solo_activas: bool = False,
+                     limit: int | None = None, after_id: int | None = None):
     """
-    Lista sanciones. Si solo_activas=True filtra por fecha_fin >= CURDATE().
+    Lista sanciones (ordenadas por id_sancion). Si solo_activas=True filtra por fecha_fin >= CURDATE().
+    `limit` / `after_id` paginan por cursor (solo id_sancion mayores a after_id).
     """
     conexion = get_connection(role='readonly')
     cursor = conexion.cursor()
-    where = []
-    params = []
-
-    if ci_participante is not None:
-        where.append("ci_participante = %s")
-        params.append(ci_participante)
-    if solo_activas:
-        where.append("fecha_fin >= CURDATE()")
+    where, params = _filtro_sanciones(ci_participante, solo_activas)
+    if after_id is not None:
+        where.append("id_sancion > %s")
+        params.append(after_id)
 
     # Devolvemos también campos calculados para que el frontend muestre valores consistentes:
     # - duracion_dias: número entero de días entre fecha_inicio y fecha_fin
     # - dias_restantes: número entero de días desde hoy hasta fecha_fin (puede ser negativo si ya venció)
     sql = (
-        "SELECT ci_participante, fecha_inicio, fecha_fin, "
+        "SELECT id_sancion, ci_participante, fecha_inicio, fecha_fin, "
         "DATEDIFF(fecha_fin, fecha_inicio) AS duracion_dias, "
         "DATEDIFF(fecha_fin, CURDATE()) AS dias_restantes "
         "FROM sancion_participante"
     )
     if where:
         sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id_sancion"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
 
     cursor.execute(sql, params)
     filas = cursor.fetchall()
@@ -60,6 +73,38 @@ def listar_sanciones(ci_participante: int | None = None, solo_activas: bool = Fa
     conexion.close()
     return filas
 
+def resumen_sanciones(ci_participante: int | None = None, solo_activas: bool = False):
+    """
+    Totales de las sanciones que filtra `listar_sanciones` (sin traer las filas):
+    total_sanciones, total_dias_sancionados y la fecha_fin vigente más lejana.
+    """
+    where, params = _filtro_sanciones(ci_participante, solo_activas)
+    sql = (
+        "SELECT COUNT(*) AS total_sanciones, "
+        "COALESCE(SUM(DATEDIFF(fecha_fin, fecha_inicio)), 0) AS total_dias_sancionados, "
+        "MAX(CASE WHEN fecha_fin >= CURDATE() THEN fecha_fin END) AS fecha_fin_max "
+        "FROM sancion_participante"
+    )
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    conexion = get_connection(role='readonly')
+    cursor = conexion.cursor()
+    cursor.execute(sql, params)
+    fila = cursor.fetchone()
+    cursor.close()
+    conexion.close()
+    return fila
+
+def _filtro_sanciones(ci_participante, solo_activas):
+    where = []
+    params = []
+    if ci_participante is not None:
+        where.append("ci_participante = %s")
+        params.append(ci_participante)
+    if solo_activas:
+        where.append("fecha_fin >= CURDATE()")
+    return where, params
+
 def eliminar_sancion(ci_participante: int, fecha_inicio, fecha_fin):
     """
     Elimina una sanción identificada por su clave natural (ci + rango de fechas).
@@ -78,6 +123,8 @@ def eliminar_sancion(ci_participante: int, fecha_inicio, fecha_fin):
     filas = cursor.rowcount
     cursor.close()
     conexion.close()
+    if filas:
+        invalidar_reportes('sanciones')
     return filas
 
 def aplicar_sanciones_por_reserva(id_reserva: int, sancion_dias: int = 60):
@@ -141,6 +188,8 @@ def aplicar_sanciones_por_reserva(id_reserva: int, sancion_dias: int = 60):
     conexion.commit()
     cursor.close()
     conexion.close()
+    if insertadas:
+        invalidar_reportes('sanciones')
 
     return {
         "sancionados": participantes,
@@ -151,22 +200,18 @@ def aplicar_sanciones_por_reserva(id_reserva: int, sancion_dias: int = 60):
     }
 
 
-def procesar_reservas_vencidas(sancion_dias: int = 60):
+def procesar_reservas_vencidas(sancion_dias: int = 60, chunk_size: int = SWEEP_CHUNK_SIZE):
     """
     Busca reservas con fecha anterior a la actual y estado 'activa'.
     Para cada reserva:
       - si hubo al menos 1 asistencia -> marca 'finalizada'
       - si nadie asistió -> crea sanciones para todos y marca 'sin asistencia'
 
+    Se procesa por conjuntos, en lotes de `chunk_size` reservas con una
+    transacción por lote (ver `procesar_lote_vencidas`).
+
     Retorna un resumen con listas de procesadas, finalizadas y sancionadas.
     """
-    conexion = get_connection(role='user')
-    cursor = conexion.cursor()
-
-    # obtener reservas vencidas y aún activas
-    cursor.execute("SELECT id_reserva, fecha FROM reserva WHERE fecha < CURDATE() AND estado = 'activa'")
-    filas = cursor.fetchall()
-
     resumen = {
         'procesadas': 0,
         'finalizadas': [],
@@ -174,32 +219,155 @@ def procesar_reservas_vencidas(sancion_dias: int = 60):
         'insertadas_total': 0
     }
 
-    for fila in filas:
-        id_reserva = fila['id_reserva']
-        fecha_reserva = _to_date(fila['fecha'])
+    despues_de = 0
+    while True:
+        lote = run_in_transaction(
+            lambda conn: procesar_lote_vencidas(conn, despues_de, chunk_size, sancion_dias),
+            role='user'
+        )
+        if lote['procesadas'] == 0:
+            break
+        resumen['procesadas'] += lote['procesadas']
+        resumen['finalizadas'].extend(lote['finalizadas'])
+        resumen['sancionadas'].extend(lote['sancionadas'])
+        resumen['insertadas_total'] += lote['insertadas_total']
+        despues_de = lote['ultimo_id']
+        invalidar_reportes('reservas', 'sanciones', al_confirmar=False)
+        if lote['procesadas'] < chunk_size:
+            break
+
+    return resumen
+
 
-        # contar asistentes
-        cursor.execute("SELECT COUNT(*) AS asistieron FROM reserva_participante WHERE id_reserva = %s AND asistencia = 1", (id_reserva,))
-        asistieron = cursor.fetchone().get('asistieron', 0) or 0
+def _consulta_vencidas(despues_de: int, limite: int, desde=None, hasta=None):
+    """(sql, params) del lote de reservas vencidas de `procesar_lote_vencidas`,
+    con la cantidad de asistentes de cada una."""
+    filtro_fecha = "r.fecha < CURDATE()"
+    params = []
+    if desde is not None:
+        filtro_fecha += " AND r.fecha >= %s"
+        params.append(_to_date(desde))
+    if hasta is not None:
+        filtro_fecha += " AND r.fecha <= %s"
+        params.append(_to_date(hasta))
+    consulta = f"""
+        SELECT r.id_reserva, r.fecha, r.nombre_sala, r.edificio, r.id_turno,
+               COALESCE(SUM(CASE WHEN rp.asistencia = 1 THEN 1 ELSE 0 END), 0) AS asistieron
+        FROM reserva r
+        LEFT JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+        WHERE {filtro_fecha} AND r.estado = 'activa' AND r.id_reserva > %s
+        GROUP BY r.id_reserva, r.fecha, r.nombre_sala, r.edificio, r.id_turno
+        ORDER BY r.id_reserva
+        LIMIT %s
+    """
+    return consulta, tuple(params) + (despues_de, limite)
 
-        if asistieron > 0:
-            # marcar como finalizada
-            cursor.execute("UPDATE reserva SET estado = 'finalizada' WHERE id_reserva = %s", (id_reserva,))
-            resumen['finalizadas'].append(id_reserva)
-        else:
-            # aplicar sanciones (usa la función existente que inserta sanciones)
-            resultado = aplicar_sanciones_por_reserva(id_reserva, sancion_dias=sancion_dias)
-            # marcar como sin asistencia
-            cursor.execute("UPDATE reserva SET estado = 'sin asistencia' WHERE id_reserva = %s", (id_reserva,))
-            resumen['sancionadas'].append({'id_reserva': id_reserva, 'detalle': resultado})
-            resumen['insertadas_total'] += resultado.get('insertadas', 0)
 
-        resumen['procesadas'] += 1
+def procesar_lote_vencidas(conexion, despues_de: int, limite: int, sancion_dias: int,
+                           desde=None, hasta=None, dry_run: bool = False):
+    """
+    Procesa hasta `limite` reservas vencidas con id_reserva > `despues_de`
+    (y fecha entre `desde` y `hasta` inclusive si se indican; si no, fecha < hoy):
+      1) una consulta agrupada clasifica las reservas (asistieron o no)
+      2) dos UPDATE masivos cambian el estado ('finalizada' / 'sin asistencia')
+      3) un INSERT IGNORE ... SELECT crea las sanciones de las reservas sin asistencia
 
-    conexion.commit()
-    cursor.close()
-    conexion.close()
-    return resumen
+    El detalle por reserva ('sancionados', 'insertadas') se arma en memoria con los
+    participantes y las sanciones ya existentes, igual que si se procesaran de a una
+    en orden de id. No confirma: eso lo hace quien abre la transacción.
+
+    Con `dry_run=True` solo clasifica y arma el resumen, sin UPDATE ni INSERT.
+    """
+    cursor = conexion.cursor()
+    try:
+        cursor.execute(*_consulta_vencidas(despues_de, limite, desde, hasta))
+        filas = cursor.fetchall()
+
+        lote = {
+            'procesadas': len(filas),
+            'finalizadas': [],
+            'sancionadas': [],
+            'insertadas_total': 0,
+            'ultimo_id': filas[-1]['id_reserva'] if filas else despues_de
+        }
+        if not filas:
+            return lote
+
+        finalizadas = [f['id_reserva'] for f in filas if f['asistieron'] > 0]
+        sin_asistencia = [f for f in filas if not f['asistieron']]
+        lote['finalizadas'] = finalizadas
+
+        if finalizadas and not dry_run:
+            cursor.execute(
+                f"UPDATE reserva SET estado = 'finalizada' WHERE estado = 'activa' AND id_reserva IN ({placeholders(finalizadas)})",
+                tuple(finalizadas)
+            )
+            refrescar_turnos(cursor, [_turno_de(f) for f in filas if f['asistieron'] > 0])
+        if not sin_asistencia:
+            return lote
+
+        ids = [f['id_reserva'] for f in sin_asistencia]
+        cursor.execute(
+            f"SELECT id_reserva, ci_participante FROM reserva_participante WHERE id_reserva IN ({placeholders(ids)})",
+            tuple(ids)
+        )
+        participantes = {}
+        for f in cursor.fetchall():
+            participantes.setdefault(f['id_reserva'], []).append(f['ci_participante'])
+
+        # Sanciones que ya existen con la misma clave (INSERT IGNORE no las vuelve a contar)
+        existentes = set()
+        cis = sorted({ci for lista in participantes.values() for ci in lista})
+        if cis:
+            fechas = sorted({_to_date(f['fecha']) for f in sin_asistencia})
+            cursor.execute(f"""
+                SELECT ci_participante, fecha_inicio, fecha_fin FROM sancion_participante
+                WHERE ci_participante IN ({placeholders(cis)}) AND fecha_inicio IN ({placeholders(fechas)})
+            """, tuple(cis) + tuple(fechas))
+            existentes = {(f['ci_participante'], _to_date(f['fecha_inicio']), _to_date(f['fecha_fin']))
+                          for f in cursor.fetchall()}
+
+        if not dry_run:
+            cursor.execute(
+                f"UPDATE reserva SET estado = 'sin asistencia' WHERE estado = 'activa' AND id_reserva IN ({placeholders(ids)})",
+                tuple(ids)
+            )
+            refrescar_turnos(cursor, [_turno_de(f) for f in sin_asistencia])
+            cursor.execute(f"""
+                INSERT IGNORE INTO sancion_participante (ci_participante, fecha_inicio, fecha_fin)
+                SELECT rp.ci_participante, r.fecha, DATE_ADD(r.fecha, INTERVAL %s DAY)
+                FROM reserva r
+                JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+                WHERE r.id_reserva IN ({placeholders(ids)})
+                ORDER BY r.id_reserva
+            """, (sancion_dias,) + tuple(ids))
+            lote['insertadas_total'] = cursor.rowcount
+
+        for f in sin_asistencia:
+            fecha_reserva = _to_date(f['fecha'])
+            fecha_fin = fecha_reserva + timedelta(days=sancion_dias)
+            sancionados = participantes.get(f['id_reserva'], [])
+            insertadas = 0
+            for ci in sancionados:
+                clave = (ci, fecha_reserva, fecha_fin)
+                if clave not in existentes:
+                    existentes.add(clave)
+                    insertadas += 1
+            lote['sancionadas'].append({
+                'id_reserva': f['id_reserva'],
+                'detalle': {
+                    "sancionados": sancionados,
+                    "insertadas": insertadas,
+                    "fecha_inicio": fecha_reserva,
+                    "fecha_fin": fecha_fin,
+                    "motivo": "Nadie asistió a la reserva."
+                }
+            })
+        if dry_run:
+            lote['insertadas_total'] = sum(r['detalle']['insertadas'] for r in lote['sancionadas'])
+        return lote
+    finally:
+        cursor.close()
 
 
 def extender_sanciones_existentes(min_dias: int = 60):
@@ -224,5 +392,7 @@ def extender_sanciones_existentes(min_dias: int = 60):
     conexion.commit()
     cursor.close()
     conexion.close()
+    if filas_actualizadas:
+        invalidar_reportes('sanciones')
 
     return {"filas_actualizadas": filas_actualizadas, "min_dias": min_dias}
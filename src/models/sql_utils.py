@@ -0,0 +1,17 @@
+"""
+Helpers compartidos por los modelos para armar consultas `IN (...)`.
+"""
+from typing import Any, Sized
+
+
+def placeholders(valores: Sized, grupo: str = '%s') -> str:
+    """'%s,%s,...' (o `grupo` repetido, p. ej. '(%s,%s)') con un elemento por valor."""
+    return ','.join([grupo] * len(valores))
+
+
+def clave_ci(ci: Any):
+    """CI como lo devuelve la BD (int); el request puede traerlo como string."""
+    try:
+        return int(ci)
+    except (TypeError, ValueError):
+        return ci
@@ -0,0 +1,110 @@
+"""
+Cache en memoria del catálogo de turnos.
+
+La tabla `turno` es chica y prácticamente estática, así que se carga entera la
+primera vez que se necesita y se sirve desde memoria hasta que vence el TTL
+(`TURNO_CACHE_TTL`, en segundos) o alguien llama a `invalidar_turnos()`.
+"""
+import os
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from src.config.database import execute_query
+
+TURNO_CACHE_TTL = int(os.getenv('TURNO_CACHE_TTL', '300'))
+
+_lock = threading.Lock()
+_por_id: Dict[int, Dict[str, Any]] = {}
+_por_horario: Dict[Tuple[str, str], int] = {}
+_por_inicio: Dict[str, int] = {}
+_cargado_en: Optional[float] = None
+
+
+def normalizar_hora(valor) -> Optional[str]:
+    """Convierte TIME/DATETIME/timedelta/'H:MM[:SS]' a 'HH:MM:SS'."""
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, timedelta):
+        total = int(valor.total_seconds())
+        return f"{total // 3600:02d}:{(total % 3600) // 60:02d}:{total % 60:02d}"
+    if isinstance(valor, (datetime, dt_time)):
+        return valor.strftime('%H:%M:%S')
+    partes = str(valor).strip().split(' ')[-1].split(':')
+    try:
+        h = int(partes[0])
+        m = int(partes[1]) if len(partes) > 1 else 0
+        s = int(float(partes[2])) if len(partes) > 2 else 0
+    except ValueError:
+        return None
+    return f"{h:02d}:{m:02d}:{s:02d}"
+
+
+def _cargar() -> None:
+    global _por_id, _por_horario, _por_inicio, _cargado_en
+    rows = execute_query(
+        "SELECT id_turno, TIME(hora_inicio) AS hora_inicio, TIME(hora_fin) AS hora_fin FROM turno ORDER BY id_turno",
+        (),
+        role='readonly'
+    ) or []
+
+    por_id = {}
+    por_horario = {}
+    por_inicio = {}
+    for r in rows:
+        id_turno = r['id_turno']
+        por_id[id_turno] = {
+            'id_turno': id_turno,
+            'hora_inicio': str(r['hora_inicio']),
+            'hora_fin': str(r['hora_fin']),
+        }
+        inicio = normalizar_hora(r['hora_inicio'])
+        fin = normalizar_hora(r['hora_fin'])
+        por_horario.setdefault((inicio, fin), id_turno)
+        por_inicio.setdefault(inicio, id_turno)
+
+    _por_id, _por_horario, _por_inicio = por_id, por_horario, por_inicio
+    _cargado_en = time.monotonic()
+
+
+def _asegurar_cargado() -> None:
+    if _cargado_en is not None and (time.monotonic() - _cargado_en) < TURNO_CACHE_TTL:
+        return
+    with _lock:
+        # Otro hilo pudo haberlo cargado mientras esperábamos el lock
+        if _cargado_en is None or (time.monotonic() - _cargado_en) >= TURNO_CACHE_TTL:
+            _cargar()
+
+
+def invalidar_turnos() -> None:
+    """Descarta el cache; la próxima lectura vuelve a cargar la tabla `turno`."""
+    global _cargado_en
+    with _lock:
+        _cargado_en = None
+
+
+def listar_turnos() -> List[Dict[str, Any]]:
+    """Todos los turnos ordenados por id: [{'id_turno', 'hora_inicio', 'hora_fin'}, ...]."""
+    _asegurar_cargado()
+    return [dict(t) for t in _por_id.values()]
+
+
+def obtener_turno(id_turno) -> Optional[Dict[str, Any]]:
+    """Turno por id (o None si no existe)."""
+    _asegurar_cargado()
+    try:
+        turno = _por_id.get(int(id_turno))
+    except (TypeError, ValueError):
+        return None
+    return dict(turno) if turno else None
+
+
+def buscar_id_turno(hora_inicio, hora_fin=None) -> Optional[int]:
+    """Busca el id_turno por horario (índice inverso hora_inicio[, hora_fin] -> id)."""
+    inicio = normalizar_hora(hora_inicio)
+    if not inicio:
+        return None
+    _asegurar_cargado()
+    if hora_fin:
+        return _por_horario.get((inicio, normalizar_hora(hora_fin)))
+    return _por_inicio.get(inicio)
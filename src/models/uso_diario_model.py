@@ -0,0 +1,236 @@
+"""
+Tabla resumen `uso_diario` (migración 005): por (fecha, edificio, nombre_sala,
+id_turno, estado) guarda cuántas reservas, participantes inscriptos y asistentes hay.
+
+Se mantiene en forma incremental: cada camino que escribe reservas o asistencia
+llama a `refrescar_turnos`/`refrescar_reservas` con el mismo cursor de su
+transacción, y se recalculan solo los turnos afectados. Como app_user no tiene
+DELETE, un turno se recalcula poniendo sus filas en cero y volviendo a sumar con
+INSERT ... SELECT ... ON DUPLICATE KEY UPDATE (las filas en cero no cambian los totales).
+
+Los reportes de salas, turnos, edificios, tipos de sala y usadas/canceladas leen de acá.
+"""
+from datetime import date, timedelta
+from typing import Iterable, Optional, Tuple
+
+from src.config.database import execute_query, run_in_transaction
+from src.models.sql_utils import placeholders
+
+# id_turno NULL en reserva se guarda como 0 (la PK no admite NULL)
+_SELECT_USO = """
+    SELECT r.fecha, r.edificio, r.nombre_sala, COALESCE(r.id_turno, 0), r.estado,
+           COUNT(DISTINCT r.id_reserva),
+           COUNT(rp.ci_participante),
+           COALESCE(SUM(CASE WHEN rp.asistencia = 1 THEN 1 ELSE 0 END), 0)
+    FROM reserva r
+    LEFT JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+"""
+_GROUP_BY_USO = " GROUP BY r.fecha, r.edificio, r.nombre_sala, COALESCE(r.id_turno, 0), r.estado"
+_UPSERT_USO = """
+    INSERT INTO uso_diario (fecha, edificio, nombre_sala, id_turno, estado, reservas, participantes, asistentes)
+    {select}
+    ON DUPLICATE KEY UPDATE
+        reservas = VALUES(reservas),
+        participantes = VALUES(participantes),
+        asistentes = VALUES(asistentes)
+"""
+
+
+def refrescar_turnos(cursor, turnos: Iterable[Tuple]) -> None:
+    """Recalcula las filas de `uso_diario` de los turnos (nombre_sala, edificio, fecha, id_turno)."""
+    turnos = list({(t[0], t[1], t[2], t[3] or 0) for t in turnos})
+    if not turnos:
+        return
+    params = tuple(v for t in turnos for v in t)
+    cursor.execute(f"""
+        UPDATE uso_diario SET reservas = 0, participantes = 0, asistentes = 0
+        WHERE (nombre_sala, edificio, fecha, id_turno) IN ({placeholders(turnos, '(%s,%s,%s,%s)')})
+    """, params)
+    select = (
+        _SELECT_USO
+        + f" WHERE (r.nombre_sala, r.edificio, r.fecha, COALESCE(r.id_turno, 0)) IN ({placeholders(turnos, '(%s,%s,%s,%s)')})"
+        + _GROUP_BY_USO
+    )
+    cursor.execute(_UPSERT_USO.format(select=select), params)
+
+
+def turnos_de_reservas(cursor, ids_reserva: Iterable[int]):
+    """Turnos (nombre_sala, edificio, fecha, id_turno) de las reservas indicadas."""
+    ids = list(set(ids_reserva))
+    if not ids:
+        return []
+    cursor.execute(
+        f"SELECT nombre_sala, edificio, fecha, id_turno FROM reserva WHERE id_reserva IN ({placeholders(ids)})",
+        tuple(ids)
+    )
+    return [(f['nombre_sala'], f['edificio'], f['fecha'], f['id_turno']) for f in cursor.fetchall()]
+
+
+def refrescar_reservas(cursor, ids_reserva: Iterable[int]) -> None:
+    """Recalcula los turnos de las reservas indicadas (asistencia, cambio de estado, etc.)."""
+    refrescar_turnos(cursor, turnos_de_reservas(cursor, ids_reserva))
+
+
+def reconstruir_uso_diario(desde: Optional[date] = None, hasta: Optional[date] = None, dias_por_lote: int = 31):
+    """
+    Reconstruye `uso_diario` desde `reserva` para el rango [desde, hasta]
+    (por defecto todo el rango con reservas), en transacciones de `dias_por_lote` días.
+    Devuelve [(desde, hasta, filas), ...] por lote.
+    """
+    if desde is None or hasta is None:
+        rango = execute_query("SELECT MIN(fecha) AS desde, MAX(fecha) AS hasta FROM reserva", role='readonly')
+        if not rango or rango[0]['desde'] is None:
+            return []
+        desde = desde or rango[0]['desde']
+        hasta = hasta or rango[0]['hasta']
+
+    lotes = []
+    inicio = desde
+    while inicio <= hasta:
+        fin = min(hasta, inicio + timedelta(days=dias_por_lote - 1))
+
+        def _lote(conn, inicio=inicio, fin=fin):
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    "UPDATE uso_diario SET reservas = 0, participantes = 0, asistentes = 0 WHERE fecha BETWEEN %s AND %s",
+                    (inicio, fin)
+                )
+                select = _SELECT_USO + " WHERE r.fecha BETWEEN %s AND %s" + _GROUP_BY_USO
+                cur.execute(_UPSERT_USO.format(select=select), (inicio, fin))
+                return cur.rowcount
+            finally:
+                cur.close()
+
+        lotes.append((inicio, fin, run_in_transaction(_lote, role='user')))
+        inicio = fin + timedelta(days=1)
+    return lotes
+
+
+# ---------------------------------------------------------------------------
+# Consultas de reportes sobre uso_diario
+# ---------------------------------------------------------------------------
+
+def _filtro_fechas(start_date, end_date, alias: str = 'u'):
+    filtros, params = [], []
+    if start_date:
+        filtros.append(f"{alias}.fecha >= %s")
+        params.append(start_date)
+    if end_date:
+        filtros.append(f"{alias}.fecha <= %s")
+        params.append(end_date)
+    return filtros, params
+
+
+def salas_mas_reservadas(start_date=None, end_date=None, limit: int = 10):
+    """Reservas por sala (todas las salas si no hay filtro de fechas; si hay, solo las usadas en el rango)."""
+    filtros, params = _filtro_fechas(start_date, end_date)
+    if filtros:
+        filtros.append("u.reservas > 0")
+    query = """
+        SELECT s.nombre_sala, s.edificio, s.tipo_sala, s.capacidad,
+               CAST(COALESCE(SUM(u.reservas), 0) AS SIGNED) AS total_reservas
+        FROM sala s
+        LEFT JOIN uso_diario u ON u.nombre_sala = s.nombre_sala AND u.edificio = s.edificio
+    """
+    if filtros:
+        query += " WHERE " + " AND ".join(filtros)
+    query += """
+        GROUP BY s.nombre_sala, s.edificio, s.tipo_sala, s.capacidad
+        ORDER BY total_reservas DESC, s.nombre_sala, s.edificio
+        LIMIT %s
+    """
+    return execute_query(query, tuple(params) + (limit,), role='readonly')
+
+
+def turnos_mas_demandados(start_date=None, end_date=None):
+    """Reservas por turno (mismo criterio de filtro que `salas_mas_reservadas`)."""
+    filtros, params = _filtro_fechas(start_date, end_date)
+    if filtros:
+        filtros.append("u.reservas > 0")
+    query = """
+        SELECT t.id_turno, t.hora_inicio, t.hora_fin,
+               CAST(COALESCE(SUM(u.reservas), 0) AS SIGNED) AS total_reservas
+        FROM turno t
+        LEFT JOIN uso_diario u ON u.id_turno = t.id_turno
+    """
+    if filtros:
+        query += " WHERE " + " AND ".join(filtros)
+    query += """
+        GROUP BY t.id_turno, t.hora_inicio, t.hora_fin
+        ORDER BY total_reservas DESC, t.id_turno
+    """
+    return execute_query(query, tuple(params), role='readonly')
+
+
+def ocupacion_por_edificio(start_date=None, end_date=None):
+    """Salas, capacidad, reservas y participantes por edificio.
+
+    total_salas y capacidad_total salen de `sala` (sin multiplicarse por las
+    reservas); con filtro de fechas solo aparecen edificios con reservas en el rango.
+    """
+    filtros, params = _filtro_fechas(start_date, end_date)
+    query = f"""
+        SELECT e.nombre_edificio AS edificio, e.direccion, e.departamento,
+               sc.total_salas, sc.capacidad_total,
+               CAST(COALESCE(u.total_reservas, 0) AS SIGNED) AS total_reservas,
+               CAST(COALESCE(u.total_participantes, 0) AS SIGNED) AS total_participantes
+        FROM edificio e
+        JOIN (
+            SELECT edificio, COUNT(*) AS total_salas, SUM(capacidad) AS capacidad_total
+            FROM sala GROUP BY edificio
+        ) sc ON sc.edificio = e.nombre_edificio
+        LEFT JOIN (
+            SELECT u.edificio, SUM(u.reservas) AS total_reservas, SUM(u.participantes) AS total_participantes
+            FROM uso_diario u
+            {"WHERE " + " AND ".join(filtros) if filtros else ""}
+            GROUP BY u.edificio
+        ) u ON u.edificio = e.nombre_edificio
+    """
+    if filtros:
+        query += " WHERE u.total_reservas > 0"
+    query += " ORDER BY total_participantes DESC, e.nombre_edificio"
+    return execute_query(query, tuple(params), role='readonly')
+
+
+def reservas_por_tipo_sala(start_date=None, end_date=None):
+    """Por tipo de sala: reservas, días con reservas, salas usadas y el total de salas y capacidad."""
+    filtros, params = _filtro_fechas(start_date, end_date)
+    if filtros:
+        filtros.append("u.reservas > 0")
+    query = """
+        SELECT s.tipo_sala, c.total_salas, c.capacidad_total,
+               CAST(COALESCE(SUM(u.reservas), 0) AS SIGNED) AS total_reservas,
+               COUNT(DISTINCT CASE WHEN u.reservas > 0 THEN u.fecha END) AS dias_con_reservas,
+               COUNT(DISTINCT CASE WHEN u.reservas > 0 THEN CONCAT(u.nombre_sala, '-', u.edificio) END) AS salas_usadas
+        FROM sala s
+        JOIN (
+            SELECT tipo_sala, COUNT(*) AS total_salas, SUM(capacidad) AS capacidad_total
+            FROM sala GROUP BY tipo_sala
+        ) c ON c.tipo_sala <=> s.tipo_sala
+        LEFT JOIN uso_diario u ON u.nombre_sala = s.nombre_sala AND u.edificio = s.edificio
+    """
+    if filtros:
+        query += " WHERE " + " AND ".join(filtros)
+    query += " GROUP BY s.tipo_sala, c.total_salas, c.capacidad_total"
+    return execute_query(query, tuple(params), role='readonly')
+
+
+def _consulta_usadas_vs_canceladas(start_date=None, end_date=None):
+    filtros, params = _filtro_fechas(start_date, end_date)
+    query = """
+        SELECT CAST(COALESCE(SUM(u.reservas), 0) AS SIGNED) AS total_reservas,
+               CAST(COALESCE(SUM(CASE WHEN u.estado = 'finalizada' THEN u.reservas ELSE 0 END), 0) AS SIGNED) AS used,
+               CAST(COALESCE(SUM(CASE WHEN u.estado IN ('cancelada', 'sin asistencia') THEN u.reservas ELSE 0 END), 0) AS SIGNED)
+                   AS cancelled_or_no_show
+        FROM uso_diario u
+    """
+    if filtros:
+        query += " WHERE " + " AND ".join(filtros)
+    return query, tuple(params)
+
+
+def usadas_vs_canceladas(start_date=None, end_date=None):
+    """Totales de reservas, finalizadas y canceladas/sin asistencia (una fila)."""
+    filas = execute_query(*_consulta_usadas_vs_canceladas(start_date, end_date), role='readonly')
+    return filas[0] if filas else {'total_reservas': 0, 'used': 0, 'cancelled_or_no_show': 0}
@@ -1,9 +1,12 @@
 from flask import Blueprint, request, jsonify, current_app
 import pymysql
-from src.auth.login import hash_password, authenticate_user
-from src.config.database import get_connection
+from src.auth.login import hash_password, authenticate_user, olvidar_desconocido
+from src.auth.password_pool import PoolSaturado
+from src.auth.refresh_tokens import REFRESH_TOKEN_DAYS, emitir, revocar, revocar_correo, rotar
+from src.config.database import get_connection, on_commit
 from src.auth.jwt_utils import create_token, jwt_required
-from src.extensions import limiter
+from src.models.rol_efectivo_model import recalcular_roles
+from src.extensions import RATELIMIT_BCRYPT_COST, limiter, presupuesto_bd
 from src.utils.validators import is_valid_email, is_strong_password, validate_participante
 from src.middleware.permissions import require_admin
 
@@ -12,10 +15,18 @@ auth_bp = Blueprint('auth', __name__)
 # Validaciones centralizadas en `src/utils/validators.py`
 
 
+def _ocupado(e: PoolSaturado):
+    """503 rápido cuando el pool de bcrypt está lleno (ver src/auth/password_pool.py)."""
+    respuesta = jsonify({"ok": False, "mensaje": str(e)})
+    respuesta.headers['Retry-After'] = str(e.retry_after)
+    return respuesta, 503
+
+
 @auth_bp.route('/register', methods=['POST'])
 @jwt_required
 @require_admin
 @limiter.limit("2/minute")
+@presupuesto_bd(RATELIMIT_BCRYPT_COST)
 def register():
     data = request.get_json() or {}
     correo = data.get('correo')
@@ -92,14 +103,18 @@ def register():
                     "INSERT INTO participante_programa_academico (ci_participante, nombre_programa, rol) VALUES (%s, %s, %s)",
                     (ci, programa, tipo_db)
                 )
+                recalcular_roles(cur, [ci])
 
         # Ahora insertar/actualizar login
         hashed = hash_password(plain)
         cur.execute("SELECT correo FROM login WHERE correo = %s", (correo,))
         if cur.fetchone():
             cur.execute("UPDATE login SET `contrasena` = %s WHERE correo = %s", (hashed, correo))
+            # Contraseña nueva: las sesiones abiertas no pueden renovarse
+            revocar_correo(cur, correo)
         else:
             cur.execute("INSERT INTO login (correo, `contrasena`) VALUES (%s, %s)", (correo, hashed))
+            on_commit(lambda: olvidar_desconocido(correo))
 
         conn.commit()
     except pymysql.err.IntegrityError as e:
@@ -109,6 +124,9 @@ def register():
         conn.close()
         current_app.logger.warning(f"IntegrityError en register: {e}")
         return jsonify({"ok": False, "mensaje": "Conflicto en la base de datos: dato duplicado"}), 409
+    except PoolSaturado as e:
+        conn.rollback()
+        return _ocupado(e)
     except Exception as e:
         conn.rollback()
         cur.close()
@@ -128,6 +146,7 @@ def register():
 
 @auth_bp.route('/login', methods=['POST'])
 @limiter.limit("5/minute")
+@presupuesto_bd(RATELIMIT_BCRYPT_COST)
 def login():
     data = request.get_json() or {}
     correo = data.get('correo')
@@ -143,7 +162,10 @@ def login():
         # no revelar detalles en producción; aquí es para desarrollo
         return jsonify({"ok": False, "mensaje": "Contraseña inválida"}), 400
 
-    ok, payload = authenticate_user(correo, plain)
+    try:
+        ok, payload = authenticate_user(correo, plain)
+    except PoolSaturado as e:
+        return _ocupado(e)
     if not ok:
         return jsonify({"ok": False, "mensaje": payload}), 401
 
@@ -151,11 +173,69 @@ def login():
     user_type = payload.get('user_type', 'participante')
     user_id = payload.get('user_id')
     token = create_token(correo, user_type=user_type, user_id=user_id)
+
+    try:
+        conn = get_connection('user')
+        with conn.cursor() as cur:
+            refresh_token = emitir(cur, correo, user_type, user_id)
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        current_app.logger.exception(e)
+        return jsonify({'error': 'Error interno', 'detalle': str(e)}), 500
     
     return jsonify({
         "ok": True, 
         "data": payload, 
         "token": token,
+        "refresh_token": refresh_token,
+        "refresh_expires_in": REFRESH_TOKEN_DAYS * 86400,
         "user_type": user_type,
         "user_id": user_id
     }), 200
+
+
+@auth_bp.route('/refresh', methods=['POST'])
+@limiter.limit("30/minute")
+@presupuesto_bd(1)
+def refresh():
+    """
+    Cambia un refresh token por un JWT nuevo y otro refresh token (rotación).
+
+    Body JSON: {"refresh_token": "..."}. Un token ya usado revoca la sesión entera.
+    """
+    data = request.get_json() or {}
+    try:
+        ok, resultado = rotar(data.get('refresh_token'))
+    except Exception as e:
+        current_app.logger.exception(e)
+        return jsonify({'error': 'Error interno', 'detalle': str(e)}), 500
+    if not ok:
+        if resultado['reutilizado']:
+            current_app.logger.warning("Refresh token reutilizado; sesión revocada")
+        return jsonify({"ok": False, "mensaje": resultado['mensaje']}), 401
+
+    token = create_token(resultado['correo'], user_type=resultado['user_type'], user_id=resultado['user_id'])
+    return jsonify({
+        "ok": True,
+        "token": token,
+        "refresh_token": resultado['refresh_token'],
+        "refresh_expires_in": REFRESH_TOKEN_DAYS * 86400,
+        "user_type": resultado['user_type'],
+        "user_id": resultado['user_id']
+    }), 200
+
+
+@auth_bp.route('/logout', methods=['POST'])
+def logout():
+    """Revoca el refresh token (y todos los que salieron del mismo login).
+
+    Body JSON: {"refresh_token": "..."}. Responde 200 aunque el token no exista.
+    """
+    data = request.get_json() or {}
+    try:
+        revocar(data.get('refresh_token'))
+    except Exception as e:
+        current_app.logger.exception(e)
+        return jsonify({'error': 'Error interno', 'detalle': str(e)}), 500
+    return jsonify({"ok": True, "mensaje": "Sesión cerrada"}), 200
@@ -12,6 +12,7 @@ from src.models.participante_model import (
     add_program_to_participante,
 )
 from src.utils.response import with_auth_link
+from src.utils.pagination import leer_paginacion, pagina
 from src.auth.jwt_utils import jwt_required
 
 from src.middleware.permissions import require_admin, can_modify_resource
@@ -82,11 +83,12 @@ def create_participante_route():
 @participante_bp.route('/', methods=['GET'])
 @jwt_required
 def list_participantes_route():
-    """Lista todos los participantes.
+    """Lista todos los participantes (ordenados por CI).
 
     Query params opcionales:
-    - limit: número máximo de resultados
-    - offset: desplazamiento para paginación
+    - limit: número máximo de resultados (paginado por cursor; la respuesta trae next_cursor)
+    - after: cursor devuelto en next_cursor por la página anterior
+    - offset: desplazamiento (compatibilidad; preferir after)
     - email: filtrar por email exacto
     """
     email = request.args.get('email')
@@ -100,18 +102,28 @@ def list_participantes_route():
         except Exception as e:
             return jsonify({'error': 'internal error', 'detail': str(e)}), 500
 
-    limit = request.args.get('limit')
     offset = request.args.get('offset')
 
     try:
-        limit_int = int(limit) if limit is not None else None
+        limit_int, after = leer_paginacion(request.args, 1)
         offset_int = int(offset) if offset is not None else None
-    except ValueError:
-        return jsonify({'error': 'limit and offset must be integers'}), 400
+        after_ci = int(after[0]) if after else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'limit, offset and after must be valid'}), 400
 
     try:
-        participantes = list_participantes(limit=limit_int, offset=offset_int)
-        return jsonify(with_auth_link({'participantes': participantes, 'count': len(participantes)})), 200
+        if limit_int is None or offset_int is not None:
+            participantes = list_participantes(limit=limit_int, offset=offset_int)
+            return jsonify(with_auth_link({'participantes': participantes, 'count': len(participantes)})), 200
+
+        filas = list_participantes(limit=limit_int + 1, after_ci=after_ci)
+        participantes, next_cursor = pagina(filas, limit_int, lambda p: (p['ci'],))
+        return jsonify(with_auth_link({
+            'participantes': participantes,
+            'count': len(participantes),
+            'limit': limit_int,
+            'next_cursor': next_cursor
+        })), 200
     except Exception as e:
         return jsonify({'error': 'internal error', 'detail': str(e)}), 500
 
@@ -230,7 +242,8 @@ def update_participante_route(ci: int):
         if affected == 0:
             return jsonify({'message': 'no changes made', 'updated': 0}), 200
 
-        updated = get_participante_by_ci(ci)
+        # Misma conexión que la escritura: el commit recién se hace al terminar el request
+        updated = get_participante_by_ci(ci, role='user')
         return jsonify({'updated': affected, 'participante': updated}), 200
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
@@ -313,8 +326,8 @@ def add_programa_to_participante_route(ci: int):
         # Agregar el programa
         affected = add_program_to_participante(ci, programa, tipo_db)
         
-        # Obtener participante actualizado con todos sus programas
-        updated = get_participante_by_ci(ci)
+        # Obtener participante actualizado con todos sus programas (misma conexión que la escritura)
+        updated = get_participante_by_ci(ci, role='user')
         
         return jsonify({'ok': True, 'participante': updated, 'added': affected}), 201
     except ValueError as e:
@@ -1,6 +1,19 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g, url_for
+from werkzeug.exceptions import HTTPException
 from src.config.database import execute_query
 from src.auth.jwt_utils import jwt_required
+from src.extensions import RATELIMIT_DEFAULT, RATELIMIT_REPORT_COST, RATELIMIT_REPORTS, limiter, presupuesto_bd
+from src.utils.report_cache import cached_report
+from src.utils.export import exportable
+from src.utils.report_dashboard import DASHBOARD_TIMEOUT, ejecutar_dashboard
+from src.utils.report_jobs import EN_CURSO, ColaLlena, get_report_jobs
+from src.models.uso_diario_model import (
+    ocupacion_por_edificio,
+    reservas_por_tipo_sala,
+    salas_mas_reservadas,
+    turnos_mas_demandados,
+    usadas_vs_canceladas,
+)
 
 reports_bp = Blueprint('reports_bp', __name__)
 """
@@ -9,6 +22,8 @@ reports_bp = Blueprint('reports_bp', __name__)
 
 @reports_bp.route('/most-reserved-rooms', methods=['GET'])
 @jwt_required
+@exportable('salas_mas_reservadas')
+@cached_report('reservas')
 def most_reserved_rooms():
     """
     Consulta: Salas más reservadas
@@ -27,36 +42,8 @@ def most_reserved_rooms():
     except ValueError:
         return jsonify({'error': 'limit must be an integer'}), 400
     
-    query = """
-        SELECT 
-            s.nombre_sala, s.edificio, s.tipo_sala, s.capacidad, COUNT(r.id_reserva) as total_reservas
-        FROM sala s
-        LEFT JOIN reserva r ON s.nombre_sala = r.nombre_sala AND s.edificio = r.edificio
-    """
-    
-    filters = []
-    params = []
-    
-    if start_date:
-        filters.append("r.fecha >= %s")
-        params.append(start_date)
-    
-    if end_date:
-        filters.append("r.fecha <= %s")
-        params.append(end_date)
-    
-    if filters:
-        query += " WHERE " + " AND ".join(filters)
-    
-    query += """
-        GROUP BY s.nombre_sala, s.edificio, s.tipo_sala, s.capacidad
-        ORDER BY total_reservas DESC
-        LIMIT %s
-    """
-    params.append(limit)
-    
     try:
-        results = execute_query(query, tuple(params), role='readonly')
+        results = salas_mas_reservadas(start_date, end_date, limit)
         from src.utils.response import with_auth_link
         return jsonify(with_auth_link({
             'salas_mas_reservadas': results,
@@ -72,6 +59,8 @@ def most_reserved_rooms():
 
 @reports_bp.route('/most-demanded-turns', methods=['GET'])
 @jwt_required
+@exportable('turnos_mas_demandados')
+@cached_report('reservas')
 def most_demanded_turns():
     """
     Consulta: Turnos más demandados
@@ -83,34 +72,8 @@ def most_demanded_turns():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = """
-        SELECT 
-            t.id_turno,t.hora_inicio, t.hora_fin, COUNT(r.id_reserva) as total_reservas
-        FROM turno t
-        LEFT JOIN reserva r ON t.id_turno = r.id_turno
-    """
-    
-    filters = []
-    params = []
-    
-    if start_date:
-        filters.append("r.fecha >= %s")
-        params.append(start_date)
-    
-    if end_date:
-        filters.append("r.fecha <= %s")
-        params.append(end_date)
-    
-    if filters:
-        query += " WHERE " + " AND ".join(filters)
-    
-    query += """
-        GROUP BY t.id_turno, t.hora_inicio, t.hora_fin
-        ORDER BY total_reservas DESC
-    """
-    
     try:
-        results = execute_query(query, tuple(params) if params else None, role='readonly')
+        results = turnos_mas_demandados(start_date, end_date)
         from src.utils.response import with_auth_link
         return jsonify(with_auth_link({
             'turnos_mas_demandados': results,
@@ -122,6 +85,8 @@ def most_demanded_turns():
 
 @reports_bp.route('/avg-participants-by-room', methods=['GET'])
 @jwt_required
+@exportable('promedio_participantes_por_sala')
+@cached_report('reservas')
 def avg_participants_by_room():
     """
     Consulta: Promedio de participantes por sala
@@ -175,7 +140,7 @@ def avg_participants_by_room():
     """
     
     try:
-        results = execute_query(query, tuple(params), role='readonly' if params else None)
+        results = execute_query(query, tuple(params), role='readonly')
         
         # Calcular promedios y porcentajes en Python
         for row in results:
@@ -197,6 +162,8 @@ def avg_participants_by_room():
 
 @reports_bp.route('/reservations-by-program', methods=['GET'])
 @jwt_required
+@exportable('reservas_por_programa')
+@cached_report('reservas')
 def reservations_by_program():
     """
     Consulta: Cantidad de reservas por carrera y facultad
@@ -245,7 +212,7 @@ def reservations_by_program():
     """
     
     try:
-        results = execute_query(query, tuple(params), role='readonly' if params else None)
+        results = execute_query(query, tuple(params), role='readonly')
         from src.utils.response import with_auth_link
         return jsonify(with_auth_link({
             'reservas_por_programa': results,
@@ -257,6 +224,8 @@ def reservations_by_program():
 
 @reports_bp.route('/occupancy-by-building', methods=['GET'])
 @jwt_required
+@exportable('ocupacion_por_edificio')
+@cached_report('reservas')
 def occupancy_by_building():
     """
     Consulta: Porcentaje de ocupación de salas por edificio
@@ -268,38 +237,8 @@ def occupancy_by_building():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = """
-        SELECT 
-            e.nombre_edificio as edificio, e.direccion, e.departamento, COUNT(DISTINCT s.nombre_sala) as total_salas,
-            SUM(s.capacidad) as capacidad_total, COUNT(DISTINCT r.id_reserva) as total_reservas,
-            COUNT(rp.ci_participante) as total_participantes
-        FROM edificio e
-        JOIN sala s ON e.nombre_edificio = s.edificio
-        LEFT JOIN reserva r ON s.nombre_sala = r.nombre_sala AND s.edificio = r.edificio
-        LEFT JOIN reserva_participante rp ON r.id_reserva = rp.id_reserva
-    """
-    
-    filters = []
-    params = []
-    
-    if start_date:
-        filters.append("r.fecha >= %s")
-        params.append(start_date)
-    
-    if end_date:
-        filters.append("r.fecha <= %s")
-        params.append(end_date)
-    
-    if filters:
-        query += " WHERE " + " AND ".join(filters)
-    
-    query += """
-        GROUP BY e.nombre_edificio, e.direccion, e.departamento
-        ORDER BY total_participantes DESC
-    """
-    
     try:
-        results = execute_query(query, tuple(params), role='readonly' if params else None)
+        results = ocupacion_por_edificio(start_date, end_date)
         
         # Calcular ratio y porcentaje en Python
         for row in results:
@@ -321,6 +260,8 @@ def occupancy_by_building():
 
 @reports_bp.route('/reservations-and-attendance-by-role', methods=['GET'])
 @jwt_required
+@exportable('reservas_y_asistencias_por_rol')
+@cached_report('reservas')
 def reservations_and_attendance_by_role():
     """
     Consulta: Cantidad de reservas y asistencias de profesores y alumnos (grado y posgrado)
@@ -339,7 +280,10 @@ def reservations_and_attendance_by_role():
     query = """
         SELECT 
             ppa.rol, pa.tipo as tipo_programa, COUNT(DISTINCT rp.ci_participante) as participantes_unicos,
-            COUNT(DISTINCT rp.id_reserva) as total_reservas
+            COUNT(DISTINCT rp.id_reserva) as total_reservas,
+            CAST(SUM(CASE WHEN rp.asistencia = 1 THEN 1 ELSE 0 END) AS SIGNED) as total_asistencias,
+            CAST(SUM(CASE WHEN rp.asistencia = 0 THEN 1 ELSE 0 END) AS SIGNED) as total_inasistencias,
+            CAST(SUM(CASE WHEN rp.asistencia IS NULL THEN 1 ELSE 0 END) AS SIGNED) as asistencias_sin_registrar
         FROM participante_programa_academico ppa
         JOIN programa_academico pa ON ppa.nombre_programa = pa.nombre_programa
         JOIN reserva_participante rp ON ppa.ci_participante = rp.ci_participante
@@ -374,48 +318,8 @@ def reservations_and_attendance_by_role():
     """
     
     try:
-        results = execute_query(query, tuple(params), role='readonly' if params else None)
-        
-        # Calcular asistencias en Python para cada grupo
-        for row in results:
-            rol_filter = row['rol']
-            tipo_filter = row['tipo_programa']
-            
-            # Query para contar asistencias por tipo
-            asistencia_query = """
-                SELECT COUNT(*) as total, rp.asistencia
-                FROM participante_programa_academico ppa
-                JOIN programa_academico pa ON ppa.nombre_programa = pa.nombre_programa
-                JOIN reserva_participante rp ON ppa.ci_participante = rp.ci_participante
-                JOIN reserva r ON rp.id_reserva = r.id_reserva
-                WHERE ppa.rol = %s AND pa.tipo = %s
-            """
-            
-            asistencia_params = [rol_filter, tipo_filter]
-            
-            if start_date:
-                asistencia_query += " AND r.fecha >= %s"
-                asistencia_params.append(start_date)
-            
-            if end_date:
-                asistencia_query += " AND r.fecha <= %s"
-                asistencia_params.append(end_date)
-            
-            asistencia_query += " GROUP BY rp.asistencia"
-            
-            asistencia_results = execute_query(asistencia_query, tuple(asistencia_params), role='readonly')
-            
-            row['total_asistencias'] = 0
-            row['total_inasistencias'] = 0
-            row['asistencias_sin_registrar'] = 0
-            
-            for asist_row in asistencia_results:
-                if asist_row['asistencia'] == 1 or asist_row['asistencia'] is True:
-                    row['total_asistencias'] = asist_row['total']
-                elif asist_row['asistencia'] == 0 or asist_row['asistencia'] is False:
-                    row['total_inasistencias'] = asist_row['total']
-                elif asist_row['asistencia'] is None:
-                    row['asistencias_sin_registrar'] = asist_row['total']
+        # Reservas y asistencias (sí / no / sin registrar) en una sola pasada
+        results = execute_query(query, tuple(params), role='readonly')
         from src.utils.response import with_auth_link
         return jsonify(with_auth_link({
             'reservas_y_asistencias_por_rol': results,
@@ -427,6 +331,8 @@ def reservations_and_attendance_by_role():
 
 @reports_bp.route('/sanctions-by-role', methods=['GET'])
 @jwt_required
+@exportable('sanciones_por_rol')
+@cached_report('sanciones')
 def sanctions_by_role():
     """
     Consulta: Cantidad de sanciones por rol y tipo de programa (alumno/docente x grado/posgrado)
@@ -466,7 +372,7 @@ def sanctions_by_role():
     """
 
     try:
-        results = execute_query(query, tuple(params), role='readonly' if params else None)
+        results = execute_query(query, tuple(params), role='readonly')
         return jsonify({
             'sanciones_por_rol': results,
             'total': len(results)
@@ -477,6 +383,8 @@ def sanctions_by_role():
 
 @reports_bp.route('/used-vs-cancelled', methods=['GET'])
 @jwt_required
+@exportable()
+@cached_report('reservas')
 def used_vs_cancelled():
     """
     Consulta: Porcentaje de reservas efectivamente utilizadas vs canceladas/no asistidas
@@ -488,53 +396,11 @@ def used_vs_cancelled():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
 
-    # Query para contar total de reservas
-    query_total = """
-        SELECT COUNT(*) as total_reservas
-        FROM reserva r
-    """
-    
-    # Query para contar finalizadas
-    query_used = """
-        SELECT COUNT(*) as used
-        FROM reserva r
-        WHERE r.estado = 'finalizada'
-    """
-    
-    # Query para contar canceladas o sin asistencia
-    query_cancelled = """
-        SELECT COUNT(*) as cancelled_or_no_show
-        FROM reserva r
-        WHERE r.estado IN ('cancelada', 'sin asistencia')
-    """
-
-    filters = []
-    params = []
-
-    if start_date:
-        filters.append("r.fecha >= %s")
-        params.append(start_date)
-
-    if end_date:
-        filters.append("r.fecha <= %s")
-        params.append(end_date)
-
-    # Agregar filtros a cada query
-    if filters:
-        filter_clause = " AND " + " AND ".join(filters)
-        query_used += filter_clause
-        query_cancelled += filter_clause
-        query_total += " WHERE " + " AND ".join(filters)
-
     try:
-        # Ejecutar las tres queries
-        total_result = execute_query(query_total, tuple(params), role='readonly' if params else None)
-        used_result = execute_query(query_used, tuple(params), role='readonly' if params else None)
-        cancelled_result = execute_query(query_cancelled, tuple(params), role='readonly' if params else None)
-        
-        total = int(total_result[0]['total_reservas']) if total_result else 0
-        used = int(used_result[0]['used']) if used_result else 0
-        cancelled = int(cancelled_result[0]['cancelled_or_no_show']) if cancelled_result else 0
+        totales = usadas_vs_canceladas(start_date, end_date)
+        total = int(totales['total_reservas'])
+        used = int(totales['used'])
+        cancelled = int(totales['cancelled_or_no_show'])
 
         if total > 0:
             pct_used = round((used / total) * 100, 2)
@@ -558,6 +424,8 @@ def used_vs_cancelled():
 
 @reports_bp.route('/peak-hours-by-room', methods=['GET'])
 @jwt_required
+@exportable('salas')
+@cached_report('reservas')
 def peak_hours_by_room():
     """
     Consulta adicional 1: Horas pico por sala
@@ -692,6 +560,8 @@ def peak_hours_by_room():
 
 @reports_bp.route('/occupancy-by-room-type', methods=['GET'])
 @jwt_required
+@exportable('tipos_sala')
+@cached_report('reservas')
 def occupancy_by_room_type():
     """
     Consulta Adicional 2: Porcentaje de ocupación por tipo de sala
@@ -708,74 +578,33 @@ def occupancy_by_room_type():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query_reservas = """
-        SELECT 
-            s.tipo_sala, COUNT(r.id_reserva) as total_reservas, COUNT(DISTINCT r.fecha) as dias_con_reservas,
-            COUNT(DISTINCT CONCAT(r.nombre_sala, '-', r.edificio)) as salas_usadas
-        FROM sala s
-        LEFT JOIN reserva r ON s.nombre_sala = r.nombre_sala AND s.edificio = r.edificio
-    """
-    
-    filters = []
-    params = []
-    
-    if start_date:
-        filters.append("r.fecha >= %s")
-        params.append(start_date)
-    
-    if end_date:
-        filters.append("r.fecha <= %s")
-        params.append(end_date)
-    
-    if filters:
-        query_reservas += " WHERE " + " AND ".join(filters)
-    
-    query_reservas += " GROUP BY s.tipo_sala"
-    
-    # Query para obtener capacidad total por tipo de sala
-    query_capacidad = """
-        SELECT 
-            tipo_sala,
-            COUNT(*) as total_salas,
-            SUM(capacidad) as capacidad_total
-        FROM sala
-        GROUP BY tipo_sala
-    """
-    
     try:
-        reservas_results = execute_query(query_reservas, tuple(params) if params else None, role='readonly')
-        capacidad_results = execute_query(query_capacidad, role='readonly')
-        
-        # Crear diccionario de capacidades
-        capacidades = {row['tipo_sala']: row for row in capacidad_results}
+        # Reservas y capacidad por tipo de sala en una sola consulta
+        reservas_results = reservas_por_tipo_sala(start_date, end_date)
         
         # Calcular estadísticas
         tipos_sala = []
         for row in reservas_results:
-            tipo = row['tipo_sala']
             total_reservas = row['total_reservas'] or 0
+            total_salas = row['total_salas']
+            dias = row['dias_con_reservas'] or 1
+            slots_disponibles = total_salas * dias * 5
+            
+            # Calcular porcentaje de ocupación
+            if slots_disponibles > 0:
+                porcentaje_ocupacion = round((total_reservas / slots_disponibles) * 100, 2)
+            else:
+                porcentaje_ocupacion = 0.0
             
-            if tipo in capacidades:
-                cap_info = capacidades[tipo]
-                total_salas = cap_info['total_salas']
-                dias = row['dias_con_reservas'] or 1
-                slots_disponibles = total_salas * dias * 5
-                
-                # Calcular porcentaje de ocupación
-                if slots_disponibles > 0:
-                    porcentaje_ocupacion = round((total_reservas / slots_disponibles) * 100, 2)
-                else:
-                    porcentaje_ocupacion = 0.0
-                
-                tipos_sala.append({
-                    'tipo_sala': tipo,
-                    'total_salas': total_salas,
-                    'capacidad_total': cap_info['capacidad_total'],
-                    'total_reservas': total_reservas,
-                    'dias_con_reservas': row['dias_con_reservas'],
-                    'salas_usadas': row['salas_usadas'],
-                    'porcentaje_ocupacion': porcentaje_ocupacion
-                })
+            tipos_sala.append({
+                'tipo_sala': row['tipo_sala'],
+                'total_salas': total_salas,
+                'capacidad_total': row['capacidad_total'],
+                'total_reservas': total_reservas,
+                'dias_con_reservas': row['dias_con_reservas'],
+                'salas_usadas': row['salas_usadas'],
+                'porcentaje_ocupacion': porcentaje_ocupacion
+            })
         
         return jsonify({
             'tipos_sala': tipos_sala,
@@ -788,6 +617,8 @@ def occupancy_by_room_type():
 
 @reports_bp.route('/repeat-offenders', methods=['GET'])
 @jwt_required
+@exportable('reincidentes')
+@cached_report('sanciones')
 def repeat_offenders():
     """
     Consulta Adicional 3: Participantes sancionados por reincidencia
@@ -812,7 +643,8 @@ def repeat_offenders():
     query = """
         SELECT 
             sp.ci_participante, p.nombre, p.apellido, p.email, COUNT(sp.fecha_inicio) as total_sanciones,
-            MIN(sp.fecha_inicio) as primera_sancion, MAX(sp.fecha_fin) as ultima_sancion
+            MIN(sp.fecha_inicio) as primera_sancion, MAX(sp.fecha_fin) as ultima_sancion,
+            CAST(SUM(CASE WHEN sp.fecha_fin >= CURDATE() THEN 1 ELSE 0 END) AS SIGNED) as sanciones_activas
         FROM sancion_participante sp
         JOIN participante p ON sp.ci_participante = p.ci
     """
@@ -829,18 +661,6 @@ def repeat_offenders():
     try:
         results = execute_query(query, (min_sanctions,), role='readonly')
         
-        # Query adicional para contar sanciones activas por cada participante
-        query_activas = """
-            SELECT ci_participante, COUNT(*) as activas
-            FROM sancion_participante
-            WHERE fecha_fin >= CURDATE()
-            GROUP BY ci_participante
-        """
-        activas_results = execute_query(query_activas, role='readonly')
-        
-        # Crear diccionario de sanciones activas
-        activas_dict = {row['ci_participante']: row['activas'] for row in activas_results}
-        
         # Construir respuesta
         reincidentes = []
         for row in results:
@@ -852,7 +672,7 @@ def repeat_offenders():
                 'total_sanciones': row['total_sanciones'],
                 'primera_sancion': str(row['primera_sancion']),
                 'ultima_sancion': str(row['ultima_sancion']),
-                'sanciones_activas': activas_dict.get(ci, 0)
+                'sanciones_activas': row['sanciones_activas']
             })
         
         return jsonify({
@@ -864,3 +684,200 @@ def repeat_offenders():
         
     except Exception as e:
         return jsonify({'error': 'Error interno', 'detalle': str(e)}), 500
+
+
+# ============================================
+# Dashboard: varios reportes en paralelo (ver src/utils/report_dashboard.py)
+# ============================================
+
+def _reportes_disponibles():
+    """{nombre: path} de los reportes GET del blueprint (sin dashboard ni jobs)."""
+    base = request.path.rsplit('/dashboard', 1)[0]
+    reportes = {}
+    for rule in current_app.url_map.iter_rules():
+        if not rule.endpoint.startswith(f"{reports_bp.name}.") or rule.arguments or 'GET' not in rule.methods:
+            continue
+        if not rule.rule.startswith(base + '/'):
+            continue
+        nombre = rule.rule[len(base) + 1:]
+        if nombre not in ('dashboard', 'jobs'):
+            reportes[nombre] = rule.rule
+    return reportes
+
+
+def _costo_dashboard() -> int:
+    """Un dashboard cuesta lo mismo que pedir sus reportes de a uno."""
+    pedidos = {r.strip() for r in (request.args.get('reports') or '').split(',') if r.strip()}
+    return RATELIMIT_REPORT_COST * (len(pedidos) or len(_reportes_disponibles()))
+
+
+@reports_bp.route('/dashboard', methods=['GET'])
+@limiter.limit(RATELIMIT_REPORTS)
+@presupuesto_bd(_costo_dashboard)
+@jwt_required
+def dashboard():
+    """
+    Varios reportes en una sola respuesta, ejecutados en paralelo.
+
+    Query params:
+    - reports: nombres separados por coma, como en la URL (default: todos)
+    - timeout: segundos por reporte (default: DASHBOARD_TIMEOUT, tope: el mismo valor)
+    - el resto (start_date, end_date, limit, ...) se pasa a cada reporte
+
+    Los reportes que fallan o vencen se informan en `errores` y `parcial` es true.
+    """
+    disponibles = _reportes_disponibles()
+    pedidos = [r.strip() for r in (request.args.get('reports') or '').split(',') if r.strip()]
+    pedidos = list(dict.fromkeys(pedidos)) or sorted(disponibles)
+    desconocidos = [r for r in pedidos if r not in disponibles]
+    if desconocidos:
+        return jsonify({'error': f"Reportes desconocidos: {', '.join(desconocidos)}",
+                        'disponibles': sorted(disponibles)}), 400
+
+    timeout = DASHBOARD_TIMEOUT
+    if request.args.get('timeout'):
+        try:
+            timeout = min(float(request.args['timeout']), DASHBOARD_TIMEOUT)
+        except ValueError:
+            return jsonify({'error': 'timeout debe ser un número'}), 400
+        if timeout <= 0:
+            return jsonify({'error': 'timeout debe ser positivo'}), 400
+
+    params = request.args.copy()
+    for clave in ('reports', 'timeout', 'format'):
+        params.poplist(clave)
+
+    try:
+        resultado = ejecutar_dashboard(
+            current_app._get_current_object(),
+            {nombre: disponibles[nombre] for nombre in pedidos},
+            params,
+            {'Authorization': request.headers.get('Authorization', '')},
+            request.host_url,
+            timeout=timeout
+        )
+    except Exception as e:
+        return jsonify({'error': 'Error interno', 'detalle': str(e)}), 500
+
+    # Solo es un error si no salió ningún reporte
+    status = 200 if resultado['reportes'] else 500
+    return jsonify(resultado), status
+
+
+# ============================================
+# Reportes asincrónicos (ver src/utils/report_jobs.py)
+# ============================================
+
+def _alcance_job():
+    """Mismo alcance que el cache de reportes: tipo de usuario y host."""
+    return [getattr(g, 'user_type', None), request.host_url]
+
+
+def _endpoint_de_reporte(reporte: str):
+    """Endpoint de Flask de `reporte` (p. ej. 'peak-hours-by-room'), o None si no es un reporte."""
+    # Mismo prefijo con el que está montado el blueprint (request.path es .../jobs)
+    path = f"{request.path.rsplit('/jobs', 1)[0]}/{reporte}"
+    try:
+        endpoint, _ = current_app.url_map.bind('').match(path, method='GET')
+    except HTTPException:
+        return None, path
+    nombre = endpoint.split('.')[-1]
+    if not endpoint.startswith(f"{reports_bp.name}.") or nombre == 'dashboard' or nombre.startswith('report_job'):
+        return None, path
+    return endpoint, path
+
+
+@reports_bp.route('/jobs', methods=['POST'])
+@jwt_required
+def submit_report_job():
+    """
+    Encola un reporte para ejecutarlo en segundo plano.
+
+    Body JSON:
+    - reporte: nombre del reporte, como en la URL (p. ej. 'peak-hours-by-room')
+    - params: query params del reporte (opcional)
+
+    Responde 202 con el job; si ya hay uno igual en curso devuelve ese (deduplicado: true).
+    """
+    data = request.get_json(silent=True) or {}
+    reporte = (data.get('reporte') or '').strip().strip('/')
+    params = data.get('params') or {}
+    if not reporte:
+        return jsonify({'error': 'reporte es requerido'}), 400
+    if not isinstance(params, dict):
+        return jsonify({'error': 'params debe ser un objeto'}), 400
+    # El resultado es el JSON del reporte; el export se pide sobre el endpoint directo
+    params = {k: v for k, v in params.items() if k != 'format' and v is not None}
+
+    endpoint, path = _endpoint_de_reporte(reporte)
+    if endpoint is None:
+        return jsonify({'error': f'Reporte desconocido: {reporte}'}), 404
+
+    try:
+        job, deduplicado = get_report_jobs().encolar(
+            current_app._get_current_object(), path, params,
+            {'Authorization': request.headers.get('Authorization', '')},
+            request.host_url, reporte, _alcance_job()
+        )
+    except ColaLlena as e:
+        respuesta = jsonify({'error': str(e)})
+        respuesta.headers['Retry-After'] = '30'
+        return respuesta, 503
+    except Exception as e:
+        return jsonify({'error': 'Error interno', 'detalle': str(e)}), 500
+
+    respuesta = jsonify(_job_publico(job, deduplicado=deduplicado))
+    respuesta.headers['Location'] = url_for('reports_bp.report_job_status', job_id=job['job_id'])
+    return respuesta, 202
+
+
+def _job_publico(job, **extra):
+    datos = {k: job.get(k) for k in ('job_id', 'reporte', 'params', 'estado', 'creado',
+                                     'iniciado', 'terminado', 'status_code', 'error')}
+    datos['status_url'] = url_for('reports_bp.report_job_status', job_id=job['job_id'])
+    datos['result_url'] = url_for('reports_bp.report_job_result', job_id=job['job_id'])
+    datos.update(extra)
+    return datos
+
+
+def _job_visible(job_id):
+    """Job si existe y lo pidió alguien con el mismo alcance; None si no."""
+    job = get_report_jobs().estado(job_id)
+    if job is None or job.get('alcance') != _alcance_job():
+        return None
+    return job
+
+
+@reports_bp.route('/jobs/<job_id>', methods=['GET'])
+@limiter.limit(RATELIMIT_DEFAULT)
+@presupuesto_bd(1)
+@jwt_required
+def report_job_status(job_id):
+    """Estado de un job de reporte: pendiente | ejecutando | completado | error."""
+    job = _job_visible(job_id)
+    if job is None:
+        return jsonify({'error': 'Job no encontrado'}), 404
+    return jsonify(_job_publico(job)), 200
+
+
+@reports_bp.route('/jobs/<job_id>/result', methods=['GET'])
+@limiter.limit(RATELIMIT_DEFAULT)
+@presupuesto_bd(1)
+@jwt_required
+def report_job_result(job_id):
+    """
+    Resultado de un job: el mismo JSON (y status) que devuelve el endpoint del reporte.
+    Mientras el job sigue en curso responde 202 con su estado.
+    """
+    job = _job_visible(job_id)
+    if job is None:
+        return jsonify({'error': 'Job no encontrado'}), 404
+    if job['estado'] in EN_CURSO:
+        respuesta = jsonify(_job_publico(job))
+        respuesta.headers['Retry-After'] = '2'
+        return respuesta, 202
+
+    cuerpo = get_report_jobs().resultado(job_id)
+    if cuerpo is None:
+        return jsonify({'error': 'Error interno', 'detalle': job.get('error') or 'Resultado no disponible'}), 500
+    return current_app.response_class(cuerpo, status=job.get('status_code') or 200, mimetype='application/json')
@@ -8,15 +8,44 @@ from src.models.reserva_model import (
     eliminar_reserva,
     validar_reglas_negocio,
     crear_reservas_batch,
-    marcar_asistencia
+    crear_reservas_bulk,
+    marcar_asistencia,
+    marcar_asistencia_todos,
+    iterar_reservas,
+    iterar_asistencias,
+    listar_reservas_pagina
 )
 from src.models.sancion_model import aplicar_sanciones_por_reserva, eliminar_sancion
+from src.models.turno_cache import obtener_turno, buscar_id_turno
 from src.auth.jwt_utils import jwt_required
 from src.middleware.permissions import require_admin
-from src.config.database import execute_query, execute_non_query
+from src.config.database import execute_query, usar_rol_escritura
+from src.utils.export import formato_solicitado, respuesta_stream
+from src.utils.pagination import leer_paginacion
 
 reserva_bp = Blueprint('reserva_bp', __name__)
 
+COLUMNAS_EXPORT_RESERVAS = [
+    'id_reserva', 'nombre_sala', 'edificio', 'fecha', 'id_turno', 'turno_hora_inicio', 'hora_fin',
+    'estado', 'estado_actual', 'asistentes'
+]
+
+
+def _contar_asistentes(reserva):
+    """Cantidad de participantes con asistencia registrada.
+
+    `listar_reservas`/`obtener_reserva` ya traen el conteo agregado en 'asistentes';
+    solo se consulta la BD si la reserva viene de otro lado sin ese dato.
+    """
+    if reserva.get('asistentes') is not None:
+        return reserva['asistentes']
+    resultado = execute_query(
+        "SELECT COUNT(*) as c FROM reserva_participante WHERE id_reserva=%s AND asistencia=1",
+        (reserva.get('id_reserva'),),
+        role='readonly'
+    )
+    return resultado[0]['c'] if resultado else 0
+
 
 def _compute_estado_actual(reserva):
     """Devuelve el estado actual calculado para mostrar en el frontend.
@@ -47,12 +76,7 @@ def _compute_estado_actual(reserva):
         if estado_guardado == 'finalizada':
             # Revisar asistencia para distinguir entre 'asistida' y 'sin asistencia'
             try:
-                resultado_true = execute_query(
-                    "SELECT COUNT(*) as c FROM reserva_participante WHERE id_reserva=%s AND asistencia=1",
-                    (reserva.get('id_reserva'),),
-                    role='readonly'
-                )
-                cnt_true = resultado_true[0]['c'] if resultado_true else 0
+                cnt_true = _contar_asistentes(reserva)
                 if cnt_true and cnt_true > 0:
                     return 'asistida'
                 # Si la reserva es de hoy y la hora_fin no ha pasado, debe seguir activa
@@ -145,95 +169,7 @@ def _compute_estado_actual(reserva):
                 pass  # Si falla el parseo, sigue con la lógica vieja
 
     # Fecha pasada o (hoy y ya terminó el turno o no hay info de hora_fin)
-    resultado_true = execute_query(
-        "SELECT COUNT(*) as c FROM reserva_participante WHERE id_reserva=%s AND asistencia=1",
-        (reserva.get('id_reserva'),),
-        role='readonly'
-    )
-    cnt_true = resultado_true[0]['c'] if resultado_true else 0
-    if cnt_true and cnt_true > 0:
-        return 'asistida'
-
-    # Ninguno asistió/registrado
-    return 'sin asistencia'
-    # Si ya fue marcada cancelada, respetamos el valor almacenado
-    estado_guardado = (reserva.get('estado') or '').strip().lower()
-    if estado_guardado == 'cancelada':
-        return 'cancelada'
-
-    # Si el estado guardado es distinto de 'activa', tratar casos especiales:
-    # - 'finalizada' y hay asistencia: devolver 'asistida'
-    # - 'finalizada' y NO hubo asistencia: devolver 'sin asistencia'
-    # - otros estados no-activa: devolver tal cual
-    if estado_guardado and estado_guardado != 'activa':
-        if estado_guardado == 'finalizada':
-            # revisar asistencia para distinguir entre 'asistida' y 'sin asistencia'
-            try:
-                resultado_true = execute_query(
-                    "SELECT COUNT(*) as c FROM reserva_participante WHERE id_reserva=%s AND asistencia=1",
-                    (reserva.get('id_reserva'),),
-                    role='readonly'
-                )
-                cnt_true = resultado_true[0]['c'] if resultado_true else 0
-                if cnt_true and cnt_true > 0:
-                    return 'asistida'
-                return 'sin asistencia'
-            except Exception:
-                # En caso de error consultando asistencia, devolvemos el estado guardado
-                return estado_guardado
-        return estado_guardado
-
-    # Solo calculamos para reservas que en DB están como 'activa' (o sin estado)
-    fecha_res = reserva.get('fecha')
-    try:
-        if isinstance(fecha_res, str):
-            fecha_obj = datetime.strptime(fecha_res, '%Y-%m-%d').date()
-        elif isinstance(fecha_res, date):
-            fecha_obj = fecha_res
-        else:
-            # si es otro tipo, intentar convertir directamente
-            fecha_obj = date.fromisoformat(str(fecha_res))
-    except Exception:
-        # En caso de error, retornamos el estado guardado
-        return estado_guardado or 'activa'
-
-    hoy = datetime.now().date()
-    ahora = datetime.now()
-    print(f"[DEBUG] hoy: {hoy} ahora: {ahora}")
-    if fecha_obj > hoy:
-        print("[DEBUG] Estado calculado: activa (fecha futura)")
-        return 'activa'
-
-    # Si la reserva es de hoy, verificar hora_fin del turno
-    if fecha_obj == hoy:
-        hora_fin = None
-        # Intentar obtener hora_fin del turno
-        if 'hora_fin' in reserva and reserva['hora_fin']:
-            hora_fin = reserva['hora_fin']
-        elif 'turno' in reserva and reserva['turno'] and 'hora_fin' in reserva['turno']:
-            hora_fin = reserva['turno']['hora_fin']
-        print(f"[DEBUG] hora_fin usada para comparación: {hora_fin}")
-        if hora_fin:
-            # Normalizar formato HH:MM o HH:MM:SS
-            if isinstance(hora_fin, str) and len(hora_fin.split(':')) == 2:
-                hora_fin = hora_fin + ':00'
-            try:
-                hora_fin_dt = datetime.combine(hoy, datetime.strptime(hora_fin, '%H:%M:%S').time())
-                print(f"[DEBUG] hora_fin_dt: {hora_fin_dt}")
-                if ahora < hora_fin_dt:
-                    print("[DEBUG] Estado calculado: activa (hoy, antes de hora_fin)")
-                    return 'activa'
-            except Exception as e:
-                print(f"[DEBUG] Error parseando hora_fin: {e}")
-                pass  # Si falla el parseo, sigue con la lógica vieja
-
-    # Fecha pasada o (hoy y ya terminó el turno o no hay info de hora_fin)
-    resultado_true = execute_query(
-        "SELECT COUNT(*) as c FROM reserva_participante WHERE id_reserva=%s AND asistencia=1",
-        (reserva.get('id_reserva'),),
-        role='readonly'
-    )
-    cnt_true = resultado_true[0]['c'] if resultado_true else 0
+    cnt_true = _contar_asistentes(reserva)
     if cnt_true and cnt_true > 0:
         return 'asistida'
 
@@ -308,15 +244,11 @@ def crear_reserva_ruta():
             ahora = datetime.now()
             if fecha_reserva == hoy:
                 for id_turno in turnos_a_reservar:
-                    resultado_turno = execute_query(
-                        "SELECT TIME(hora_fin) as hora_fin FROM turno WHERE id_turno = %s",
-                        (id_turno,),
-                        role='readonly'
-                    )
-                    if not resultado_turno or not resultado_turno[0].get('hora_fin'):
+                    turno = obtener_turno(id_turno)
+                    if not turno or not turno.get('hora_fin'):
                         # si no tenemos info del turno no bloqueamos aquí, dejamos validar_reglas_negocio
                         continue
-                    hf = resultado_turno[0].get('hora_fin')
+                    hf = turno.get('hora_fin')
                     # hf puede ser datetime.time o string 'HH:MM:SS'
                     hf_s = str(hf)
                     if len(hf_s.split(':')) == 2:
@@ -362,68 +294,203 @@ def crear_reserva_ruta():
         return jsonify({'error': 'Error interno', 'detalle': str(e)}), 500
 
 
+BULK_MAX_ITEMS = 500
+
+
+def _normalizar_item_bulk(item):
+    """Valida la forma de un item de /reservas/bulk y lo normaliza (fecha ISO, turnos int, CI int)."""
+    if not isinstance(item, dict):
+        raise ValueError('Cada item debe ser un objeto')
+    for campo in ('nombre_sala', 'edificio', 'fecha', 'participantes'):
+        if campo not in item:
+            raise ValueError(f'Falta el campo obligatorio: {campo}')
+    if not isinstance(item['participantes'], list) or len(item['participantes']) == 0:
+        raise ValueError('participantes debe ser una lista no vacía con los CI de los participantes')
+    try:
+        participantes = [int(ci) for ci in item['participantes']]
+    except (TypeError, ValueError):
+        raise ValueError('participantes debe contener CI numéricos')
+
+    fecha = datetime.strptime(str(item['fecha']), '%Y-%m-%d').date()
+    if fecha < datetime.now().date():
+        raise ValueError('No se puede reservar para una fecha pasada.')
+
+    turnos = item.get('turnos')
+    if turnos is None and 'id_turno' in item:
+        turnos = [item['id_turno']]
+    if not isinstance(turnos, list) or len(turnos) == 0:
+        raise ValueError('turnos debe ser una lista no vacía')
+    ids_turno = []
+    for turno_item in turnos:
+        if isinstance(turno_item, dict):
+            id_turno = _convertir_hora_a_id_turno(turno_item)
+        else:
+            id_turno = int(turno_item)
+        if not id_turno or obtener_turno(id_turno) is None:
+            raise ValueError(f'No se encontró turno para {turno_item}')
+        ids_turno.append(id_turno)
+
+    return {
+        'nombre_sala': item['nombre_sala'],
+        'edificio': item['edificio'],
+        'fecha': fecha.strftime('%Y-%m-%d'),
+        'turnos': ids_turno,
+        'participantes': participantes,
+    }
+
+
+@reserva_bp.route('/bulk', methods=['POST'])
+@jwt_required
+@require_admin
+def crear_reservas_bulk_ruta():
+    """Reserva masiva (admin): valida todos los items como conjunto y los inserta en una transacción.
+
+    Body: {"items": [{nombre_sala, edificio, fecha, turnos|id_turno, participantes}, ...],
+           "todo_o_nada": false}
+    Responde un resultado por item (en el mismo orden). Con todo_o_nada, si algún
+    item no es válido no se crea ninguno y se responde 409.
+    """
+    datos = request.get_json() or {}
+    items = datos.get('items')
+    if not isinstance(items, list) or len(items) == 0:
+        return jsonify({'error': 'items debe ser una lista no vacía'}), 400
+    if len(items) > BULK_MAX_ITEMS:
+        return jsonify({'error': f'Máximo {BULK_MAX_ITEMS} items por solicitud'}), 400
+    todo_o_nada = bool(datos.get('todo_o_nada', False))
+
+    try:
+        resultados = [None] * len(items)
+        validos = []
+        indices = []
+        for i, item in enumerate(items):
+            try:
+                validos.append(_normalizar_item_bulk(item))
+                indices.append(i)
+            except (ValueError, TypeError) as e:
+                resultados[i] = {'ok': False, 'error': str(e)}
+
+        if todo_o_nada and len(validos) != len(items):
+            validos, indices = [], []
+
+        try:
+            for i, resultado in zip(indices, crear_reservas_bulk(validos, todo_o_nada=todo_o_nada)):
+                resultados[i] = resultado
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 409
+
+        for i, resultado in enumerate(resultados):
+            if resultado is None:
+                resultado = {'ok': False, 'error': 'No se creó: otro elemento del lote no es válido (todo_o_nada).'}
+            resultado['indice'] = i
+            resultados[i] = resultado
+
+        creadas = sum(len(r.get('reservas', [])) for r in resultados)
+        fallidos = sum(1 for r in resultados if not r['ok'])
+        status = 409 if todo_o_nada and fallidos else (201 if creadas else 400)
+        return jsonify({
+            'ok': fallidos == 0,
+            'resultados': resultados,
+            'reservas_creadas': creadas,
+            'items_fallidos': fallidos
+        }), status
+    except Exception as e:
+        return jsonify({'error': 'Error interno', 'detalle': str(e)}), 500
+
+
 def _convertir_hora_a_id_turno(datos):
-    """Helper para convertir hora_inicio/hora_fin a id_turno"""
+    """Helper para convertir hora_inicio/hora_fin a id_turno (desde el cache de turnos)"""
     hora_inicio = datos.get('hora_inicio')
-    hora_fin = datos.get('hora_fin')
-    
     if not hora_inicio:
         return None
-    
-    # normalizar formato HH:MM -> HH:MM:00 para comparar con TIME() en SQL
-    if isinstance(hora_inicio, str) and len(hora_inicio.split(':')) == 2:
-        hora_inicio = hora_inicio + ':00'
-    if hora_fin and isinstance(hora_fin, str) and len(hora_fin.split(':')) == 2:
-        hora_fin = hora_fin + ':00'
-    
-    # Buscar un turno con esas horas (comparando TIME)
-    query = "SELECT id_turno FROM turno WHERE TIME(hora_inicio) = %s "
-    params = [hora_inicio]
-    if hora_fin:
-        query += "AND TIME(hora_fin) = %s"
-        params.append(hora_fin)
-    query += " LIMIT 1"
-    
-    resultado = execute_query(query, tuple(params), role='readonly')
-    if not resultado:
-        return None
-    
-    return resultado[0]['id_turno']
+    return buscar_id_turno(hora_inicio, datos.get('hora_fin'))
+
+
+def _completar_reserva(r):
+    """Asegura id_turno/hora_fin y agrega estado_actual a una reserva del listado."""
+    id_turno = r.get('id_turno')
+    if not id_turno and 'turno' in r and r['turno'] and 'id_turno' in r['turno']:
+        id_turno = r['turno']['id_turno']
+        r['id_turno'] = id_turno
+    if (not r.get('hora_fin')) and id_turno:
+        turno = obtener_turno(id_turno)
+        if turno and turno.get('hora_fin'):
+            r['hora_fin'] = turno['hora_fin']
+    try:
+        r['estado_actual'] = _compute_estado_actual(r)
+    except Exception:
+        r['estado_actual'] = r.get('estado', 'activa')
+    return r
 
 
 @reserva_bp.route('/', methods=['GET'])
 @jwt_required
 def listar_reservas_ruta():
+    """
+    Lista reservas. Query params opcionales: ci_participante, nombre_sala,
+    desde / hasta (YYYY-MM-DD), format=csv|ndjson para exportar en streaming,
+    y limit / after para paginar por cursor (la respuesta trae next_cursor).
+    """
     ci_participante = request.args.get('ci_participante')
     nombre_sala = request.args.get('nombre_sala')
+    desde = request.args.get('desde')
+    hasta = request.args.get('hasta')
+
+    try:
+        formato = formato_solicitado()
+        limit, after = leer_paginacion(request.args, 3)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if after:
+        try:
+            after = [date.fromisoformat(str(after[0])), int(after[1]), int(after[2])]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Cursor de paginación inválido'}), 400
 
     try:
         # Control de acceso: participantes solo ven sus propias reservas
         if g.user_type != 'admin':
             ci_participante = g.user_id  # Forzar filtro por CI del participante logueado
-        
-        reservas = listar_reservas(ci_participante=ci_participante, nombre_sala=nombre_sala)
-        # Asegurar que cada reserva tenga hora_fin (para el cálculo correcto del estado)
+
+        if formato:
+            filas = (_completar_reserva(r) for r in iterar_reservas(ci_participante, nombre_sala, desde, hasta))
+            return respuesta_stream(filas, formato, 'reservas', columnas=COLUMNAS_EXPORT_RESERVAS)
+
+        if limit:
+            reservas, next_cursor = listar_reservas_pagina(limit, after, ci_participante=ci_participante,
+                                                           nombre_sala=nombre_sala, desde=desde, hasta=hasta)
+        else:
+            reservas = listar_reservas(ci_participante=ci_participante, nombre_sala=nombre_sala,
+                                       desde=desde, hasta=hasta)
         for r in reservas:
-            # Asegurar que siempre haya id_turno y hora_fin
-            id_turno = r.get('id_turno')
-            if not id_turno and 'turno' in r and r['turno'] and 'id_turno' in r['turno']:
-                id_turno = r['turno']['id_turno']
-                r['id_turno'] = id_turno
-            if (not r.get('hora_fin')) and id_turno:
-                resultado_turno = execute_query(
-                    "SELECT TIME(hora_fin) as hora_fin FROM turno WHERE id_turno = %s",
-                    (id_turno,),
-                    role='readonly'
-                )
-                if resultado_turno and resultado_turno[0].get('hora_fin'):
-                    r['hora_fin'] = str(resultado_turno[0]['hora_fin'])
-            try:
-                r['estado_actual'] = _compute_estado_actual(r)
-            except Exception:
-                r['estado_actual'] = r.get('estado', 'activa')
+            _completar_reserva(r)
         from src.utils.response import with_auth_link
-        return jsonify(with_auth_link({'reservas': reservas})), 200
+        cuerpo = {'reservas': reservas}
+        if limit:
+            cuerpo.update({'limit': limit, 'next_cursor': next_cursor})
+        return jsonify(with_auth_link(cuerpo)), 200
+    except Exception as e:
+        return jsonify({'error': 'Error interno', 'detalle': str(e)}), 500
+
+
+@reserva_bp.route('/asistencias', methods=['GET'])
+@jwt_required
+def exportar_asistencias_ruta():
+    """
+    Exporta una fila por participante de cada reserva con su asistencia, en
+    streaming (format=ndjson por defecto, o csv). Query params opcionales:
+    desde / hasta (YYYY-MM-DD), ci_participante (solo admin).
+    """
+    try:
+        formato = formato_solicitado() or 'ndjson'
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    ci_participante = request.args.get('ci_participante')
+    if g.user_type != 'admin':
+        ci_participante = g.user_id
+    try:
+        filas = iterar_asistencias(ci_participante, request.args.get('desde'), request.args.get('hasta'))
+        return respuesta_stream(filas, formato, 'asistencias')
     except Exception as e:
         return jsonify({'error': 'Error interno', 'detalle': str(e)}), 500
 
@@ -450,13 +517,9 @@ def obtener_reserva_ruta(id_reserva: int):
             id_turno = reserva['turno']['id_turno']
             reserva['id_turno'] = id_turno
         if (not reserva.get('hora_fin')) and id_turno:
-            resultado_turno = execute_query(
-                "SELECT TIME(hora_fin) as hora_fin FROM turno WHERE id_turno = %s",
-                (id_turno,),
-                role='readonly'
-            )
-            if resultado_turno and resultado_turno[0].get('hora_fin'):
-                reserva['hora_fin'] = str(resultado_turno[0]['hora_fin'])
+            turno = obtener_turno(id_turno)
+            if turno and turno.get('hora_fin'):
+                reserva['hora_fin'] = turno['hora_fin']
         try:
             reserva['estado_actual'] = _compute_estado_actual(reserva)
         except Exception:
@@ -545,6 +608,12 @@ def actualizar_reserva_ruta(id_reserva: int):
                     return jsonify({'error': 'No se puede marcar sin asistencia: información de turno incompleta', 'code': 'NO_TURNO_INFO'}), 403
             elif fecha_res and fecha_res > hoy:
                 return jsonify({'error': 'No se puede marcar sin asistencia ni finalizar una reserva a futuro', 'code': 'FUTURE_RESERVA'}), 403
+        # 'asistida' borra sanciones (DELETE, rol admin) después de actualizar la reserva:
+        # todas las escrituras del request van en la misma conexión/transacción, así que
+        # esa conexión tiene que abrirse con admin desde la primera escritura
+        if estado_solicitado == 'asistida':
+            usar_rol_escritura('admin')
+
         # Actualizar la reserva en la BD
         filas_afectadas = actualizar_reserva(id_reserva, datos)
 
@@ -558,10 +627,7 @@ def actualizar_reserva_ruta(id_reserva: int):
         # para reflejar que hubo asistencia y evitar generación de sanciones.
         if estado_solicitado == 'asistida':
             try:
-                updated = execute_non_query(
-                    "UPDATE reserva_participante SET asistencia = 1 WHERE id_reserva = %s",
-                    (id_reserva,)
-                )
+                updated = marcar_asistencia_todos(id_reserva)
                 respuesta['asistencia_marcada'] = updated
             except Exception as e:
                 # No detener el proceso por este fallo; devolver un campo con el error para diagnóstico
@@ -570,7 +636,8 @@ def actualizar_reserva_ruta(id_reserva: int):
             # (posible escenario: el procesador vencido ya aplicó sanciones; si ahora se marca
             # como asistida, debemos removerlas). Usamos la misma ventana por defecto de 60 días.
             try:
-                reserva_info = obtener_reserva(id_reserva)
+                # Releer con la conexión de escritura: readonly no ve la actualización sin confirmar
+                reserva_info = obtener_reserva(id_reserva, role='user')
                 if reserva_info and reserva_info.get('fecha'):
                     # normalizar fecha a date
                     fecha_res = reserva_info.get('fecha')
@@ -582,7 +649,7 @@ def actualizar_reserva_ruta(id_reserva: int):
                     participantes = execute_query(
                         "SELECT ci_participante FROM reserva_participante WHERE id_reserva = %s",
                         (id_reserva,),
-                        role='readonly'
+                        role='user'
                     )
                     eliminadas = 0
                     eliminados_list = []
@@ -610,7 +677,7 @@ def actualizar_reserva_ruta(id_reserva: int):
         # Solo aplicar sanción si el turno ya terminó (hora_fin < ahora)
         aplicar_sancion = False
         if debe_aplicar_sancion:
-            reserva_info = obtener_reserva(id_reserva)
+            reserva_info = obtener_reserva(id_reserva, role='user')
             fecha_res = reserva_info.get('fecha')
             # Ensure fecha_res is a datetime.date
             if isinstance(fecha_res, str):
@@ -4,12 +4,15 @@ from datetime import datetime
 from src.models.sancion_model import (
     crear_sancion,
     listar_sanciones,
+    resumen_sanciones,
     eliminar_sancion,
     aplicar_sanciones_por_reserva,
     procesar_reservas_vencidas,
     extender_sanciones_existentes,
 )
 from src.utils.response import with_auth_link
+from src.utils.pagination import leer_paginacion, pagina
+from src.utils.report_cache import invalidar_reportes
 from src.auth.jwt_utils import jwt_required
 from src.middleware.permissions import require_admin
 from src.config.database import get_connection
@@ -118,6 +121,7 @@ def actualizar_sancion_ruta(id_sancion: int):
             conn.commit()
             cur.close()
             conn.close()
+            invalidar_reportes('sanciones')
 
             # calcular activo (fecha_fin >= hoy)
             activo = False
@@ -159,15 +163,44 @@ def actualizar_sancion_ruta(id_sancion: int):
 def listar_sanciones_ruta():
     """
     GET /sanciones?ci=123&activas=true
-    Devuelve las sanciones y un resumen con totales
+    Devuelve las sanciones y un resumen con totales.
+    Con ?limit=&after= pagina por cursor (id_sancion); el resumen sigue siendo del total.
     """
     ci = request.args.get("ci", type=int)
     activas = request.args.get("activas", default="false").lower() in ("1", "true", "t", "yes", "y")
+    try:
+        limit, after = leer_paginacion(request.args, 1)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        after_id = int(after[0]) if after else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "Cursor de paginación inválido"}), 400
     try:
         # Control de acceso: participantes solo ven sus propias sanciones
         if g.user_type != 'admin':
             ci = g.user_id  # Forzar filtro por CI del participante logueado
         
+        from datetime import date
+        hoy = date.today()
+
+        if limit:
+            # Página por cursor; el resumen se calcula en la BD sobre todas las sanciones
+            filas = listar_sanciones(ci_participante=ci, solo_activas=activas, limit=limit + 1, after_id=after_id)
+            data, next_cursor = pagina(filas, limit, lambda s: (s['id_sancion'],))
+            totales = resumen_sanciones(ci_participante=ci, solo_activas=activas)
+            fecha_fin_max = totales.get('fecha_fin_max')
+            return jsonify(with_auth_link({
+                "sanciones": data,
+                "limit": limit,
+                "next_cursor": next_cursor,
+                "resumen": {
+                    "total_sanciones": int(totales.get('total_sanciones') or 0),
+                    "total_dias_sancionados": int(totales.get('total_dias_sancionados') or 0),
+                    "dias_restantes_total": (fecha_fin_max - hoy).days if fecha_fin_max else 0
+                }
+            })), 200
+
         data = listar_sanciones(ci_participante=ci, solo_activas=activas)
         
         # Calcular resumen
@@ -175,8 +208,6 @@ def listar_sanciones_ruta():
         total_dias_sancionados = sum(s.get('duracion_dias', 0) for s in data)
         
         # Para dias_restantes_total: encontrar la fecha_fin más lejana de sanciones vigentes
-        from datetime import date
-        hoy = date.today()
         sanciones_vigentes = [s for s in data if s.get('dias_restantes', 0) >= 0]
         
         if sanciones_vigentes:
@@ -1,8 +1,13 @@
+from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
-from src.config.database import execute_query
+from src.models.turno_cache import listar_turnos
+from src.models.reserva_model import listar_turnos_ocupados, mapa_ocupacion
 
 turno_bp = Blueprint('turno_bp', __name__)
 
+# Rango máximo (en días) que se puede pedir en /turnos/disponibilidad
+DISPONIBILIDAD_MAX_DIAS = 31
+
 
 @turno_bp.route('/', methods=['GET'])
 def list_turnos():
@@ -11,20 +16,18 @@ def list_turnos():
     edificio = request.args.get('edificio')
 
     # Obtener turnos (sólo horas)
-    rows = execute_query("SELECT id_turno, TIME(hora_inicio) AS hora_inicio, TIME(hora_fin) AS hora_fin FROM turno", (), role='readonly') or []
+    rows = listar_turnos()
+
+    # Una sola consulta agrupada con los turnos ocupados de esa sala y fecha
+    ocupados = None
+    if fecha and nombre_sala and edificio:
+        ocupados = listar_turnos_ocupados(nombre_sala, edificio, fecha)
 
     result = []
     for r in rows:
         disponible = None
-        if fecha and nombre_sala and edificio:
-            q = """
-                SELECT COUNT(*) AS cnt
-                FROM reserva
-                WHERE nombre_sala = %s AND edificio = %s AND fecha = %s AND id_turno = %s AND estado = 'activa'
-            """
-            res = execute_query(q, (nombre_sala, edificio, fecha, r['id_turno']), role='readonly')
-            cnt = res[0]['cnt'] if res else 0
-            disponible = (cnt == 0)
+        if ocupados is not None:
+            disponible = r['id_turno'] not in ocupados
         result.append({
             'id_turno': r['id_turno'],
             'hora_inicio': str(r['hora_inicio']),
@@ -32,3 +35,58 @@ def list_turnos():
             'disponible': disponible
         })
     return jsonify({'turnos': result}), 200
+
+
+@turno_bp.route('/disponibilidad', methods=['GET'])
+def disponibilidad():
+    """
+    GET /turnos/disponibilidad?edificio=X&desde=YYYY-MM-DD&hasta=YYYY-MM-DD
+
+    Devuelve la grilla sala x fecha x turno de un edificio en formato compacto:
+    para cada sala, `ocupacion` tiene un string por fecha (en el orden de `fechas`)
+    con un caracter por turno (en el orden de `turnos`): '1' ocupado, '0' libre.
+    """
+    edificio = request.args.get('edificio')
+    desde = request.args.get('desde')
+    hasta = request.args.get('hasta') or desde
+    if not edificio or not desde:
+        return jsonify({'error': 'Parámetros requeridos: edificio, desde (y opcionalmente hasta)'}), 400
+
+    try:
+        desde_d = datetime.strptime(desde, '%Y-%m-%d').date()
+        hasta_d = datetime.strptime(hasta, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Formato de fecha inválido. Use YYYY-MM-DD'}), 400
+    if hasta_d < desde_d:
+        return jsonify({'error': 'hasta no puede ser anterior a desde'}), 400
+    dias = (hasta_d - desde_d).days + 1
+    if dias > DISPONIBILIDAD_MAX_DIAS:
+        return jsonify({'error': f'El rango no puede superar {DISPONIBILIDAD_MAX_DIAS} días'}), 400
+
+    try:
+        turnos = listar_turnos()
+        fechas = [(desde_d + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(dias)]
+        salas, ocupados = mapa_ocupacion(edificio, desde_d, hasta_d)
+
+        result = []
+        for sala in salas:
+            nombre = sala['nombre_sala']
+            ocupacion = [
+                ''.join('1' if (nombre, f, t['id_turno']) in ocupados else '0' for t in turnos)
+                for f in fechas
+            ]
+            result.append({
+                'nombre_sala': nombre,
+                'capacidad': sala.get('capacidad'),
+                'tipo_sala': sala.get('tipo_sala'),
+                'ocupacion': ocupacion
+            })
+
+        return jsonify({
+            'edificio': edificio,
+            'fechas': fechas,
+            'turnos': [{'id_turno': t['id_turno'], 'hora_inicio': t['hora_inicio'], 'hora_fin': t['hora_fin']} for t in turnos],
+            'salas': result
+        }), 200
+    except Exception as e:
+        return jsonify({'error': 'Error interno', 'detalle': str(e)}), 500
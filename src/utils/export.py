@@ -0,0 +1,194 @@
+"""
+Exportación en streaming (`?format=csv|ndjson`) para listados y reportes.
+
+- `iterar_consulta` recorre una consulta con un cursor del lado del servidor
+  (SSDictCursor): las filas llegan de MySQL de a una, sin cargar el resultado
+  completo en memoria. Usa una conexión propia del pool (no la del request),
+  porque el cuerpo se genera después de que termina la vista; la consulta se
+  ejecuta antes de devolver, para que sus errores terminen en un 500.
+- `respuesta_stream` arma la respuesta de Flask a partir de cualquier iterable
+  de dicts y empieza a enviar bytes con la primera fila.
+- `@exportable(clave)` agrega el modo export a un endpoint que ya devuelve JSON
+  (los reportes), tomando la lista `clave` de la respuesta.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from functools import wraps
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pymysql
+from flask import Response, jsonify, make_response, request, stream_with_context
+
+from src.config.database import ROLE_TIMEOUTS, get_connection
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+FILAS_POR_LOTE = 1000
+FILAS_POR_ESCRITURA = 200
+
+
+def formato_solicitado() -> Optional[str]:
+    """Formato de export pedido en `?format=` (None para la respuesta JSON normal).
+
+    Lanza ValueError si el formato no es válido.
+    """
+    formato = (request.args.get('format') or '').strip().lower()
+    if formato in ('', 'json'):
+        return None
+    if formato not in FORMATOS:
+        raise ValueError(f"format inválido: {formato}. Usar: json, {', '.join(FORMATOS)}")
+    return formato
+
+
+def iterar_consulta(query: str, params=None, role: str = 'readonly',
+                    tamano_lote: int = FILAS_POR_LOTE) -> Iterator[Dict[str, Any]]:
+    """Filas de `query` con un cursor sin buffer (memoria constante).
+
+    La conexión y el execute se hacen al llamar (se lee el primer lote), no al
+    empezar a enviar el cuerpo: así un error de pool o de SQL llega a la vista
+    mientras todavía puede responder 500. Si el consumidor corta antes de
+    terminar (cliente que se desconecta), la conexión se descarta en lugar de
+    leer el resto del resultado.
+    """
+    filas = _filas_consulta(query, params, role, tamano_lote)
+    try:
+        primera = next(filas)
+    except StopIteration:
+        return iter(())
+    return chain((primera,), filas)
+
+
+def _filas_consulta(query, params, role, tamano_lote):
+    conn = get_connection(role, request_scoped=False)
+    tope_ms = ROLE_TIMEOUTS.get(role, {}).get('max_execution_ms', 0)
+    terminado = False
+    try:
+        cur = conn.cursor(pymysql.cursors.SSDictCursor)
+        if tope_ms:
+            # El tope de MAX_EXECUTION_TIME cuenta mientras se envían las filas: un
+            # export largo (y un cliente lento) lo superaría, así que se quita acá
+            cur.execute("SET SESSION MAX_EXECUTION_TIME = 0")
+        cur.execute(query, params or ())
+        while True:
+            filas = cur.fetchmany(tamano_lote)
+            if not filas:
+                break
+            yield from filas
+        if tope_ms:
+            cur.execute("SET SESSION MAX_EXECUTION_TIME = %s", (int(tope_ms),))
+        cur.close()
+        terminado = True
+    finally:
+        if terminado:
+            conn.close()
+        else:
+            conn.invalidate()
+
+
+def _valor(v):
+    if isinstance(v, (datetime, date, time)):
+        return v.isoformat()
+    if isinstance(v, timedelta):
+        # Columnas TIME de MySQL llegan como timedelta
+        segundos = int(v.total_seconds())
+        return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+    if isinstance(v, Decimal):
+        return int(v) if v == v.to_integral_value() else float(v)
+    return v
+
+
+def _aplanar(fila: Dict[str, Any], prefijo: str = '') -> Dict[str, Any]:
+    """Objetos anidados como columnas `padre_hijo`; listas como JSON (para CSV)."""
+    plano = {}
+    for clave, valor in fila.items():
+        nombre = f"{prefijo}{clave}"
+        if isinstance(valor, dict):
+            plano.update(_aplanar(valor, f"{nombre}_"))
+        elif isinstance(valor, (list, tuple)):
+            plano[nombre] = json.dumps(valor, default=_valor, ensure_ascii=False)
+        else:
+            plano[nombre] = _valor(valor)
+    return plano
+
+
+def _lineas_csv(filas: Iterable[Dict[str, Any]], columnas: Optional[List[str]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = None
+    pendientes = 0
+    for fila in filas:
+        plana = _aplanar(fila)
+        if writer is None:
+            # Encabezado: columnas pedidas o las de la primera fila
+            writer = csv.DictWriter(buffer, fieldnames=columnas or list(plana), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow(plana)
+        pendientes += 1
+        if pendientes >= FILAS_POR_ESCRITURA:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pendientes = 0
+    if writer is None and columnas:
+        csv.writer(buffer).writerow(columnas)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _lineas_ndjson(filas: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    lote = []
+    for fila in filas:
+        lote.append(json.dumps(fila, default=_valor, ensure_ascii=False))
+        if len(lote) >= FILAS_POR_ESCRITURA:
+            yield '\n'.join(lote) + '\n'
+            lote = []
+    if lote:
+        yield '\n'.join(lote) + '\n'
+
+
+def respuesta_stream(filas: Iterable[Dict[str, Any]], formato: str, nombre: str,
+                     columnas: Optional[List[str]] = None) -> Response:
+    """Respuesta en streaming (CSV o NDJSON) a partir de un iterable de dicts."""
+    if formato == 'csv':
+        cuerpo = _lineas_csv(filas, columnas)
+    else:
+        cuerpo = _lineas_ndjson(filas)
+    respuesta = Response(stream_with_context(cuerpo), mimetype=FORMATOS[formato].split(';')[0])
+    respuesta.headers['Content-Type'] = FORMATOS[formato]
+    respuesta.headers['Content-Disposition'] = f'attachment; filename="{nombre}.{formato}"'
+    respuesta.headers['X-Accel-Buffering'] = 'no'  # que un proxy nginx no acumule el cuerpo
+    return respuesta
+
+
+def exportable(clave: Optional[str] = None):
+    """
+    Agrega `?format=csv|ndjson` a un endpoint que devuelve JSON.
+
+    Exporta la lista `clave` del cuerpo (o el objeto completo como una fila si
+    `clave` es None). Pensado para reportes, cuyo resultado es un agregado
+    acotado; los listados grandes usan `iterar_consulta` directamente.
+    Usar debajo de @jwt_required y encima de @cached_report.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                formato = formato_solicitado()
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if formato is None:
+                return fn(*args, **kwargs)
+
+            respuesta = make_response(fn(*args, **kwargs))
+            if respuesta.status_code != 200 or not respuesta.is_json:
+                return respuesta
+            cuerpo = respuesta.get_json()
+            filas = [cuerpo] if clave is None else cuerpo.get(clave, [])
+            return respuesta_stream(filas, formato, request.endpoint.split('.')[-1])
+        return wrapper
+    return decorator
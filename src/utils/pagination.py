@@ -0,0 +1,78 @@
+"""
+Paginación por cursor (keyset) para listados: `?limit=&after=`.
+
+En lugar de LIMIT/OFFSET (que recorre y descarta todas las filas anteriores),
+cada página pide las filas posteriores a la última clave de orden devuelta.
+Esa clave viaja como un cursor opaco (base64 de un JSON) en `next_cursor`.
+
+Si el request no trae `limit` ni `after`, el listado se devuelve completo como antes.
+"""
+import base64
+import binascii
+import json
+import os
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', '50'))
+PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', '500'))
+
+
+class CursorInvalido(ValueError):
+    """El parámetro `after` no es un cursor válido para este listado."""
+
+
+def _serializable(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def codificar_cursor(valores: Sequence[Any]) -> str:
+    """Cursor opaco a partir de los valores de la clave de orden de la última fila."""
+    raw = json.dumps([_serializable(v) for v in valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor: str, cantidad: int) -> List[Any]:
+    """Valores de la clave de orden guardados en `cursor` (deben ser `cantidad`)."""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode('utf-8'))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise CursorInvalido('Cursor de paginación inválido')
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        raise CursorInvalido('Cursor de paginación inválido')
+    return valores
+
+
+def leer_paginacion(args, cantidad_claves: int) -> Tuple[Optional[int], Optional[List[Any]]]:
+    """
+    Lee `limit` y `after` de los query params.
+
+    Devuelve (limit, claves_after); (None, None) si el request no pide paginar.
+    `limit` se acota a PAGE_SIZE_MAX. Lanza ValueError / CursorInvalido si son inválidos.
+    """
+    limit = args.get('limit')
+    after = args.get('after')
+    if limit is None and not after:
+        return None, None
+    try:
+        limit = int(limit) if limit is not None else PAGE_SIZE_DEFAULT
+    except ValueError:
+        raise ValueError('limit debe ser un entero')
+    if limit <= 0:
+        raise ValueError('limit debe ser positivo')
+    limit = min(limit, PAGE_SIZE_MAX)
+    return limit, (decodificar_cursor(after, cantidad_claves) if after else None)
+
+
+def pagina(filas: List[Any], limit: int, clave) -> Tuple[List[Any], Optional[str]]:
+    """
+    Recorta `filas` (pedidas con LIMIT limit + 1) a `limit` y arma el próximo cursor
+    con `clave(ultima_fila)`; None si no hay más páginas.
+    """
+    if len(filas) <= limit:
+        return filas, None
+    filas = filas[:limit]
+    return filas, codificar_cursor(clave(filas[-1]))
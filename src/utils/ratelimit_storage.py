@@ -0,0 +1,101 @@
+"""
+Storage de `limits` (Flask-Limiter) sobre SQLite: `RATELIMIT_STORAGE_URI=sqlite:///ruta/al/archivo.db`.
+
+Comparte los contadores entre todos los procesos/workers de una máquina sin
+necesitar Redis (para una sola máquina o para pruebas); con varias máquinas
+usar `redis://`. Solo implementa la estrategia fixed-window (la que usa la app).
+
+Cada contador es una fila (clave, valor, expira). `incr` corre en una
+transacción `BEGIN IMMEDIATE`, así dos procesos no pierden incrementos.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from limits.storage import Storage
+
+_LIMPIAR_CADA = 1000  # incrementos entre barridos de contadores vencidos
+
+
+class SQLiteStorage(Storage):
+    """Contadores de rate limit en un archivo SQLite (modo WAL)."""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri: str, **options):
+        super().__init__(uri, **options)
+        self.ruta = uri.split('://', 1)[1] or os.path.join('/tmp', 'ratelimit.db')
+        self.timeout = float(options.get('timeout', 5))
+        self._local = threading.local()
+        self._incrementos = 0
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with self._conexion() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS limites ("
+                "clave TEXT PRIMARY KEY, valor INTEGER NOT NULL, expira REAL NOT NULL)"
+            )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conexion(self) -> sqlite3.Connection:
+        """Una conexión por hilo (y por proceso: no se reutiliza después de un fork)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.ruta, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        conn = self._conexion()
+        ahora = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            fila = conn.execute("SELECT valor, expira FROM limites WHERE clave = ?", (key,)).fetchone()
+            if fila is None or fila[1] <= ahora:
+                valor, expira = amount, ahora + expiry
+            else:
+                valor = fila[0] + amount
+                expira = ahora + expiry if elastic_expiry else fila[1]
+            conn.execute(
+                "INSERT INTO limites (clave, valor, expira) VALUES (?, ?, ?) "
+                "ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor, expira = excluded.expira",
+                (key, valor, expira)
+            )
+            self._incrementos += 1
+            if self._incrementos % _LIMPIAR_CADA == 0:
+                conn.execute("DELETE FROM limites WHERE expira <= ?", (ahora,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return valor
+
+    def get(self, key: str) -> int:
+        fila = self._conexion().execute(
+            "SELECT valor FROM limites WHERE clave = ? AND expira > ?", (key, time.time())
+        ).fetchone()
+        return fila[0] if fila else 0
+
+    def get_expiry(self, key: str) -> float:
+        fila = self._conexion().execute("SELECT expira FROM limites WHERE clave = ?", (key,)).fetchone()
+        return fila[0] if fila and fila[0] > time.time() else time.time()
+
+    def check(self) -> bool:
+        try:
+            self._conexion().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int:
+        return self._conexion().execute("DELETE FROM limites").rowcount
+
+    def clear(self, key: str) -> None:
+        self._conexion().execute("DELETE FROM limites WHERE clave = ?", (key,))
@@ -0,0 +1,364 @@
+"""
+Cache de resultados de los endpoints de /api/reports.
+
+La clave es (endpoint, query params normalizados, alcance del usuario, host)
+más la generación de cada dominio del que depende el reporte ('reservas',
+'sanciones'). Las escrituras llaman a `invalidar_reportes(...)`, que incrementa
+la generación: las entradas anteriores quedan inalcanzables y se van por TTL/LRU.
+
+Backends (REPORT_CACHE_BACKEND):
+- memory (default): LRU en memoria del proceso
+- file: directorio compartido entre procesos/workers (REPORT_CACHE_DIR)
+- redis: servidor compatible con Redis (REPORT_CACHE_URL, requiere el paquete `redis`)
+- none: sin cache
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Iterable, Optional, Tuple
+
+from flask import current_app, g, make_response, request
+
+from src.config.database import on_commit
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos para los contadores
+    fcntl = None
+
+REPORT_CACHE_BACKEND = os.getenv('REPORT_CACHE_BACKEND', 'memory').lower()
+REPORT_CACHE_TTL = int(os.getenv('REPORT_CACHE_TTL', '60'))
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv('REPORT_CACHE_MAX_ENTRIES', '256'))
+REPORT_CACHE_DIR = os.getenv('REPORT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'report_cache'))
+REPORT_CACHE_URL = os.getenv('REPORT_CACHE_URL', 'redis://localhost:6379/0')
+
+logger = logging.getLogger(__name__)
+
+# (status, body JSON en bytes)
+Valor = Tuple[int, bytes]
+
+
+class MemoryBackend:
+    """LRU + TTL en memoria del proceso."""
+
+    def __init__(self, max_entries: int = REPORT_CACHE_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._data = OrderedDict()  # clave -> (expira, valor)
+        self._generaciones = {}
+        self._lock = threading.Lock()
+
+    def get(self, clave: str) -> Optional[Valor]:
+        with self._lock:
+            item = self._data.get(clave)
+            if item is None:
+                return None
+            expira, valor = item
+            if expira < time.monotonic():
+                del self._data[clave]
+                return None
+            self._data.move_to_end(clave)
+            return valor
+
+    def set(self, clave: str, valor: Valor, ttl: int) -> None:
+        with self._lock:
+            self._data[clave] = (time.monotonic() + ttl, valor)
+            self._data.move_to_end(clave)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def generacion(self, dominio: str) -> int:
+        return self._generaciones.get(dominio, 0)
+
+    def incrementar(self, dominio: str) -> None:
+        with self._lock:
+            self._generaciones[dominio] = self._generaciones.get(dominio, 0) + 1
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class FileBackend:
+    """Un archivo JSON por entrada; sirve para compartir el cache entre workers de una máquina.
+
+    El LRU usa el mtime (se actualiza en cada lectura) y las generaciones son
+    archivos con un entero, incrementados bajo flock.
+    """
+
+    def __init__(self, directorio: str = REPORT_CACHE_DIR, max_entries: int = REPORT_CACHE_MAX_ENTRIES):
+        self.directorio = directorio
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, f"{clave}.json")
+
+    def _ruta_generacion(self, dominio: str) -> str:
+        return os.path.join(self.directorio, f"gen_{dominio}")
+
+    def get(self, clave: str) -> Optional[Valor]:
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('expira', 0) < time.time():
+            self._borrar(ruta)
+            return None
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+        return data['status'], data['body'].encode('utf-8')
+
+    def set(self, clave: str, valor: Valor, ttl: int) -> None:
+        status, body = valor
+        fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'expira': time.time() + ttl, 'status': status, 'body': body.decode('utf-8')}, f)
+            os.replace(tmp, self._ruta(clave))
+        except OSError:
+            self._borrar(tmp)
+            return
+        self._desalojar()
+
+    def _desalojar(self) -> None:
+        try:
+            entradas = [e for e in os.scandir(self.directorio) if e.name.endswith('.json')]
+        except OSError:
+            return
+        sobrantes = len(entradas) - self.max_entries
+        if sobrantes <= 0:
+            return
+        entradas.sort(key=lambda e: e.stat().st_mtime)
+        for entrada in entradas[:sobrantes]:
+            self._borrar(entrada.path)
+
+    @staticmethod
+    def _borrar(ruta: str) -> None:
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+    def generacion(self, dominio: str) -> int:
+        try:
+            with open(self._ruta_generacion(dominio), 'r') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def incrementar(self, dominio: str) -> None:
+        with self._lock, open(self._ruta_generacion(dominio), 'a+') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                actual = int(f.read().strip() or 0)
+            except ValueError:
+                actual = 0
+            f.seek(0)
+            f.truncate()
+            f.write(str(actual + 1))
+            f.flush()
+
+    def limpiar(self) -> None:
+        for entrada in os.scandir(self.directorio):
+            if entrada.name.endswith('.json'):
+                self._borrar(entrada.path)
+
+
+class RedisBackend:
+    """Backend sobre un cliente compatible con Redis (get/set con ex/incr/scan_iter/delete).
+
+    El desalojo LRU queda a cargo del servidor (maxmemory-policy allkeys-lru).
+    """
+
+    def __init__(self, cliente, prefijo: str = 'reports:'):
+        self.cliente = cliente
+        self.prefijo = prefijo
+
+    def get(self, clave: str) -> Optional[Valor]:
+        raw = self.cliente.get(self.prefijo + clave)
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return data['status'], data['body'].encode('utf-8')
+
+    def set(self, clave: str, valor: Valor, ttl: int) -> None:
+        status, body = valor
+        self.cliente.set(self.prefijo + clave, json.dumps({'status': status, 'body': body.decode('utf-8')}), ex=ttl)
+
+    def generacion(self, dominio: str) -> int:
+        return int(self.cliente.get(f"{self.prefijo}gen:{dominio}") or 0)
+
+    def incrementar(self, dominio: str) -> None:
+        self.cliente.incr(f"{self.prefijo}gen:{dominio}")
+
+    def limpiar(self) -> None:
+        for clave in self.cliente.scan_iter(match=f"{self.prefijo}*"):
+            if b':gen:' not in (clave if isinstance(clave, bytes) else clave.encode()):
+                self.cliente.delete(clave)
+
+
+class ReportCache:
+    """Cache de reportes sobre un backend, con TTL y un lock por clave (por franjas)
+    para que los pedidos simultáneos de un mismo reporte consulten la BD una sola vez."""
+
+    def __init__(self, backend, ttl: int = REPORT_CACHE_TTL, franjas: int = 64):
+        self.backend = backend
+        self.ttl = ttl
+        self._locks = [threading.Lock() for _ in range(franjas)]
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidaciones': 0}
+
+    def clave(self, endpoint: str, params, alcance, dominios: Iterable[str]) -> str:
+        if hasattr(params, 'lists'):
+            normalizados = sorted((k, sorted(v)) for k, v in params.lists())
+        else:
+            normalizados = sorted((k, [str(v)]) for k, v in dict(params or {}).items())
+        generaciones = [f"{d}:{self.backend.generacion(d)}" for d in sorted(dominios)]
+        raw = json.dumps([endpoint, normalizados, alcance, generaciones], default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def lock(self, clave: str) -> threading.Lock:
+        return self._locks[int(clave[:8], 16) % len(self._locks)]
+
+    def get(self, clave: str) -> Optional[Valor]:
+        try:
+            valor = self.backend.get(clave)
+        except Exception as e:
+            logger.warning("Cache de reportes: error leyendo (%s)", e)
+            valor = None
+        with self._stats_lock:
+            self._stats['hits' if valor is not None else 'misses'] += 1
+        return valor
+
+    def set(self, clave: str, valor: Valor) -> None:
+        try:
+            self.backend.set(clave, valor, self.ttl)
+        except Exception as e:
+            logger.warning("Cache de reportes: error escribiendo (%s)", e)
+
+    def invalidar(self, dominios: Iterable[str]) -> None:
+        for dominio in dominios:
+            try:
+                self.backend.incrementar(dominio)
+            except Exception as e:
+                logger.warning("Cache de reportes: no se pudo invalidar '%s' (%s)", dominio, e)
+        with self._stats_lock:
+            self._stats['invalidaciones'] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+
+_cache: Optional[ReportCache] = None
+_cache_lock = threading.Lock()
+_cache_creado = False
+
+
+def _crear_backend(nombre: str):
+    if nombre == 'none':
+        return None
+    if nombre == 'file':
+        return FileBackend()
+    if nombre == 'redis':
+        try:
+            import redis
+        except ImportError:
+            logger.warning("REPORT_CACHE_BACKEND=redis pero falta el paquete 'redis'; se usa cache en memoria")
+            return MemoryBackend()
+        return RedisBackend(redis.Redis.from_url(REPORT_CACHE_URL))
+    if nombre != 'memory':
+        logger.warning("REPORT_CACHE_BACKEND '%s' desconocido; se usa cache en memoria", nombre)
+    return MemoryBackend()
+
+
+def get_report_cache() -> Optional[ReportCache]:
+    """Cache de reportes del proceso (None si REPORT_CACHE_BACKEND=none)."""
+    global _cache, _cache_creado
+    if _cache_creado:
+        return _cache
+    with _cache_lock:
+        if not _cache_creado:
+            backend = _crear_backend(REPORT_CACHE_BACKEND)
+            _cache = ReportCache(backend) if backend is not None else None
+            _cache_creado = True
+    return _cache
+
+
+def set_report_cache(cache: Optional[ReportCache]) -> None:
+    """Reemplaza el cache del proceso (por ejemplo para usar otro backend)."""
+    global _cache, _cache_creado
+    with _cache_lock:
+        _cache = cache
+        _cache_creado = True
+
+
+def invalidar_reportes(*dominios: str, al_confirmar: bool = True) -> None:
+    """
+    Invalida los reportes que dependen de `dominios` ('reservas', 'sanciones').
+
+    Por defecto espera a que confirme la transacción del request (ver
+    `database.on_commit`); con `al_confirmar=False` invalida en el momento, para
+    escrituras que ya confirmaron en su propia transacción.
+    """
+    cache = get_report_cache()
+    if cache is None or not dominios:
+        return
+    if al_confirmar:
+        on_commit(lambda: cache.invalidar(dominios))
+    else:
+        cache.invalidar(dominios)
+
+
+def cached_report(*dominios: str):
+    """
+    Cachea la respuesta JSON (status 200) de un endpoint de reportes.
+
+    Usar debajo de @jwt_required: el alcance de la clave es g.user_type.
+    Agrega el header X-Cache: HIT/MISS.
+    """
+    dominios = dominios or ('reservas',)
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = get_report_cache()
+            if cache is None:
+                return fn(*args, **kwargs)
+
+            alcance = [getattr(g, 'user_type', None), request.host_url]
+            # ?format= (export) reutiliza el mismo JSON cacheado
+            params = request.args.copy()
+            params.poplist('format')
+            clave = cache.clave(request.endpoint, params, alcance, dominios)
+            valor = cache.get(clave)
+            if valor is None:
+                with cache.lock(clave):
+                    # Otro request pudo haberlo calculado mientras esperábamos
+                    valor = cache.backend.get(clave)
+                    if valor is None:
+                        respuesta = make_response(fn(*args, **kwargs))
+                        if respuesta.status_code == 200 and respuesta.mimetype == 'application/json':
+                            cache.set(clave, (respuesta.status_code, respuesta.get_data()))
+                            respuesta.headers['X-Cache'] = 'MISS'
+                        return respuesta
+
+            status, body = valor
+            respuesta = current_app.response_class(body, status=status, mimetype='application/json')
+            respuesta.headers['X-Cache'] = 'HIT'
+            return respuesta
+        return wrapper
+    return decorator
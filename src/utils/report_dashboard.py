@@ -0,0 +1,90 @@
+"""
+Dashboard de reportes: `/api/reports/dashboard?reports=a,b,c`.
+
+Ejecuta los reportes pedidos en paralelo sobre un pool acotado
+(`DASHBOARD_WORKERS`, 4 por defecto) y arma una sola respuesta; el tiempo total
+pasa a ser el del reporte más lento en lugar de la suma.
+
+Cada reporte corre como `despachar_reporte` (request sintético con su propia
+conexión, mismo JWT y cache de reportes que el endpoint directo) y tiene hasta
+`DASHBOARD_TIMEOUT` segundos desde que se pide el dashboard. Los que no
+terminan a tiempo, o fallan, se informan en `errores` sin afectar al resto. Un
+reporte vencido no se interrumpe: termina en segundo plano y deja su resultado
+en el cache de reportes para el próximo pedido.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from typing import Any, Dict, Optional, Tuple
+
+from src.utils.report_jobs import despachar_reporte
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_WORKERS = int(os.getenv('DASHBOARD_WORKERS', '4'))
+DASHBOARD_TIMEOUT = float(os.getenv('DASHBOARD_TIMEOUT', '10'))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, DASHBOARD_WORKERS),
+                                               thread_name_prefix='report-dashboard')
+    return _executor
+
+
+def _ejecutar(app, path, params, headers, base_url) -> Tuple[int, bytes, float]:
+    inicio = time.monotonic()
+    status, cuerpo = despachar_reporte(app, path, params, headers, base_url)
+    return status, cuerpo, (time.monotonic() - inicio) * 1000
+
+
+def ejecutar_dashboard(app, reportes: Dict[str, str], params: Dict[str, Any], headers: Dict[str, str],
+                       base_url: str, timeout: float = DASHBOARD_TIMEOUT) -> Dict[str, Any]:
+    """
+    Ejecuta en paralelo `reportes` ({nombre: path}) con los mismos `params`.
+
+    Devuelve {'reportes': {nombre: json}, 'errores': {nombre: {...}},
+    'duracion_ms': {nombre: ms}, 'parcial': bool}.
+    """
+    executor = _get_executor()
+    limite = time.monotonic() + timeout
+    futuros = {nombre: executor.submit(_ejecutar, app, path, params, headers, base_url)
+               for nombre, path in reportes.items()}
+
+    resultado = {'reportes': {}, 'errores': {}, 'duracion_ms': {}}
+    for nombre, futuro in futuros.items():
+        try:
+            status, cuerpo, ms = futuro.result(timeout=max(0.0, limite - time.monotonic()))
+        except FuturesTimeout:
+            # Si todavía no empezó, se descarta; si está corriendo, termina solo
+            futuro.cancel()
+            resultado['errores'][nombre] = {'status': 504, 'error': f'Tiempo agotado ({timeout:g}s)'}
+            continue
+        except Exception as e:
+            logger.exception("Dashboard: el reporte %s falló", nombre)
+            resultado['errores'][nombre] = {'status': 500, 'error': str(e)}
+            continue
+
+        resultado['duracion_ms'][nombre] = round(ms, 1)
+        try:
+            datos = json.loads(cuerpo)
+        except ValueError:
+            datos = None
+        if status == 200 and datos is not None:
+            resultado['reportes'][nombre] = datos
+        else:
+            error = (datos.get('error') or datos.get('mensaje')) if isinstance(datos, dict) else None
+            resultado['errores'][nombre] = {'status': status, 'error': error or f'HTTP {status}',
+                                            'detalle': datos}
+
+    resultado['parcial'] = bool(resultado['errores'])
+    return resultado
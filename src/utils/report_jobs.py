@@ -0,0 +1,273 @@
+"""
+Reportes asincrónicos: `/api/reports/jobs`.
+
+Un reporte pesado (p. ej. peak-hours-by-room sin limit, repeat-offenders sobre
+todo el historial) se encola en lugar de ocupar un worker de Flask mientras corre:
+
+- `POST /api/reports/jobs` encola el reporte y responde 202 con el id del job.
+- `GET /api/reports/jobs/<id>` devuelve el estado (pendiente|ejecutando|completado|error).
+- `GET /api/reports/jobs/<id>/result` devuelve el JSON del reporte.
+
+Los jobs corren en un pool propio de hilos (`REPORT_JOBS_WORKERS`, 2 por
+defecto), así que a lo sumo esa cantidad de consultas analíticas ocupa
+conexiones a la vez y el resto del tráfico no espera detrás de ellas. Cada job
+ejecuta el endpoint real (mismos decoradores, JWT y cache de reportes) dentro
+de un request sintético con el Authorization del pedido original.
+
+El estado y el resultado se guardan en un directorio de spool
+(`REPORT_JOBS_DIR`), que comparten los workers de la máquina para el polling,
+y se borran pasado `REPORT_JOBS_TTL`. Dos pedidos iguales (reporte, params,
+tipo de usuario, host) mientras el primero sigue en curso reciben el mismo job,
+aunque lleguen a workers distintos: el job en curso se marca en el spool con
+`<clave>.lock` (creado con O_EXCL, contiene el job_id) y `REPORT_JOBS_MAX_PENDING`
+cuenta esas marcas, así que el tope es por máquina y no por proceso.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from src.extensions import PEDIDO_INTERNO
+
+logger = logging.getLogger(__name__)
+
+REPORT_JOBS_WORKERS = int(os.getenv('REPORT_JOBS_WORKERS', '2'))
+REPORT_JOBS_MAX_PENDING = int(os.getenv('REPORT_JOBS_MAX_PENDING', '20'))
+REPORT_JOBS_TTL = int(os.getenv('REPORT_JOBS_TTL', '3600'))
+REPORT_JOBS_DIR = os.getenv('REPORT_JOBS_DIR', os.path.join(tempfile.gettempdir(), 'report_jobs'))
+
+PENDIENTE = 'pendiente'
+EJECUTANDO = 'ejecutando'
+COMPLETADO = 'completado'
+ERROR = 'error'
+EN_CURSO = (PENDIENTE, EJECUTANDO)
+
+
+def despachar_reporte(app, path: str, params: Dict[str, Any], headers: Dict[str, str],
+                      base_url: str) -> Tuple[int, bytes]:
+    """Ejecuta `GET path` en un request sintético (con su propia conexión del pool)
+    y devuelve (status, cuerpo). Pasa por los mismos decoradores que un pedido real,
+    salvo el rate limit: el pedido original ya pagó el costo del reporte."""
+    with app.test_request_context(path, base_url=base_url, method='GET',
+                                  query_string=params, headers=headers,
+                                  environ_base={PEDIDO_INTERNO: True}):
+        respuesta = app.full_dispatch_request()
+        return respuesta.status_code, respuesta.get_data()
+
+
+class ColaLlena(RuntimeError):
+    """Hay demasiados jobs pendientes; reintentar más tarde."""
+
+
+class ReportJobs:
+    """Pool de ejecución de reportes con deduplicación y resultados en disco."""
+
+    def __init__(self, directorio: str = REPORT_JOBS_DIR, workers: int = REPORT_JOBS_WORKERS,
+                 max_pendientes: int = REPORT_JOBS_MAX_PENDING, ttl: int = REPORT_JOBS_TTL):
+        self.directorio = directorio
+        self.max_pendientes = max(1, max_pendientes)
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='report-job')
+        self._lock = threading.Lock()
+        self._ultima_limpieza = 0.0
+        os.makedirs(directorio, exist_ok=True)
+
+    # --- spool ---
+
+    def _ruta(self, job_id: str, sufijo: str = 'json') -> str:
+        return os.path.join(self.directorio, f"{job_id}.{sufijo}")
+
+    def _escribir(self, ruta: str, data: bytes) -> None:
+        # Escritura atómica: quien hace polling nunca ve un archivo a medias
+        fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, ruta)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _guardar_estado(self, job: Dict[str, Any]) -> None:
+        self._escribir(self._ruta(job['job_id']), json.dumps(job).encode('utf-8'))
+
+    def _borrar(self, ruta: str) -> None:
+        try:
+            os.unlink(ruta)
+        except OSError:
+            pass
+
+    # --- marcas de jobs en curso (compartidas entre procesos) ---
+
+    def _marcar(self, clave: str, job_id: str) -> bool:
+        """Crea `<clave>.lock` con el job_id; False si ya hay un job en curso con esa clave."""
+        try:
+            fd = os.open(self._ruta(clave, 'lock'), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w', encoding='ascii') as f:
+            f.write(job_id)
+        return True
+
+    def _marcado(self, clave: str) -> Optional[str]:
+        """job_id de la marca de `clave` ('' si se está escribiendo, None si no hay)."""
+        try:
+            with open(self._ruta(clave, 'lock'), 'r', encoding='ascii') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _desmarcar(self, clave: str, job_id: str) -> None:
+        if self._marcado(clave) == job_id:
+            self._borrar(self._ruta(clave, 'lock'))
+
+    def _limpiar(self) -> None:
+        """Borra jobs vencidos (a lo sumo una vez por minuto)."""
+        ahora = time.time()
+        if ahora - self._ultima_limpieza < 60:
+            return
+        self._ultima_limpieza = ahora
+        try:
+            nombres = os.listdir(self.directorio)
+        except OSError:
+            return
+        for nombre in nombres:
+            ruta = os.path.join(self.directorio, nombre)
+            # Incluye las marcas `.lock` de jobs cuyo proceso murió sin terminarlos
+            try:
+                if ahora - os.path.getmtime(ruta) > self.ttl:
+                    os.unlink(ruta)
+            except OSError:
+                pass
+
+    # --- API ---
+
+    @staticmethod
+    def clave(reporte: str, params: Dict[str, Any], alcance) -> str:
+        normalizados = sorted((k, str(v)) for k, v in (params or {}).items())
+        raw = json.dumps([reporte, normalizados, alcance], default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def estado(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Estado del job (o None si no existe o ya venció)."""
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._ruta(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def resultado(self, job_id: str) -> Optional[bytes]:
+        """Cuerpo JSON de la respuesta del reporte (None si todavía no terminó)."""
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._ruta(job_id, 'result.json'), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def encolar(self, app, path: str, params: Dict[str, Any], headers: Dict[str, str],
+                base_url: str, reporte: str, alcance) -> Tuple[Dict[str, Any], bool]:
+        """
+        Encola `GET base_url + path?params` y devuelve (estado del job, deduplicado).
+
+        Si ya hay un job igual en curso devuelve ese. Lanza ColaLlena si se
+        alcanzó REPORT_JOBS_MAX_PENDING.
+        """
+        clave = self.clave(reporte, params, alcance)
+        with self._lock:
+            self._limpiar()
+
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'reporte': reporte,
+            'params': params,
+            'alcance': alcance,
+            'estado': PENDIENTE,
+            'creado': time.time(),
+            'iniciado': None,
+            'terminado': None,
+            'status_code': None,
+            'error': None,
+        }
+        # El estado se escribe antes que la marca: quien encuentre la marca
+        # siempre puede leer el job al que apunta
+        self._guardar_estado(job)
+        for _ in range(50):
+            if self._marcar(clave, job['job_id']):
+                break
+            otro_id = self._marcado(clave)
+            if otro_id == '':
+                time.sleep(0.01)  # la marca se acaba de crear y todavía no tiene el id
+                continue
+            if otro_id:
+                otro = self.estado(otro_id)
+                if otro and otro['estado'] in EN_CURSO:
+                    self._borrar(self._ruta(job['job_id']))
+                    return otro, True
+                # Marca de un job ya terminado (o vencido): se reemplaza
+                self._desmarcar(clave, otro_id)
+        else:
+            self._borrar(self._ruta(job['job_id']))
+            raise ColaLlena('No se pudo encolar el reporte; reintentar')
+
+        if self.pendientes() > self.max_pendientes:
+            self._desmarcar(clave, job['job_id'])
+            self._borrar(self._ruta(job['job_id']))
+            raise ColaLlena('Demasiados reportes en cola')
+        self._executor.submit(self._ejecutar, app, job, clave, path, params, headers, base_url)
+        return job, False
+
+    def _ejecutar(self, app, job: Dict[str, Any], clave: str, path: str,
+                  params: Dict[str, Any], headers: Dict[str, str], base_url: str) -> None:
+        job = dict(job, estado=EJECUTANDO, iniciado=time.time())
+        try:
+            self._guardar_estado(job)
+            status, cuerpo = despachar_reporte(app, path, params, headers, base_url)
+            self._escribir(self._ruta(job['job_id'], 'result.json'), cuerpo)
+            job['status_code'] = status
+            job['estado'] = COMPLETADO if status == 200 else ERROR
+            if job['estado'] == ERROR:
+                job['error'] = cuerpo.decode('utf-8', 'replace')[:500]
+        except Exception as e:
+            logger.exception("Job de reporte %s falló", job['job_id'])
+            job.update(estado=ERROR, status_code=500, error=str(e))
+        finally:
+            job['terminado'] = time.time()
+            try:
+                self._guardar_estado(job)
+            except OSError as e:
+                logger.warning("Job de reporte %s: no se pudo guardar el estado (%s)", job['job_id'], e)
+            self._desmarcar(clave, job['job_id'])
+
+    def pendientes(self) -> int:
+        """Jobs en curso en todos los procesos que comparten el spool."""
+        try:
+            return sum(1 for nombre in os.listdir(self.directorio) if nombre.endswith('.lock'))
+        except OSError:
+            return 0
+
+
+_jobs: Optional[ReportJobs] = None
+_jobs_lock = threading.Lock()
+
+
+def get_report_jobs() -> ReportJobs:
+    """Pool de jobs de reportes del proceso (se crea la primera vez que se usa)."""
+    global _jobs
+    if _jobs is None:
+        with _jobs_lock:
+            if _jobs is None:
+                _jobs = ReportJobs()
+    return _jobs
@@ -0,0 +1,12 @@
+"""
+Entrypoint WSGI de producción.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Con `preload_app` la app se crea una sola vez en el master y los workers la
+heredan por fork (ver los hooks en gunicorn.conf.py). Para desarrollo sigue
+estando `python app.py`.
+"""
+from app import create_app
+
+app = create_app()